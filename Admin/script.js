@@ -27,9 +27,7 @@ document.addEventListener('DOMContentLoaded', function() {
     const alertMessage = document.getElementById('alert-message');
 
     // WebSocket 连接
-    let roomInfoSocket = null;
-    let scheduleSocket = null;
-    let roomDetailSocket = null; // 新增：用于查询房间详情的单一WebSocket连接
+    let subscribeSocket = null; // 订阅推送：先收到完整快照，之后只收到变化部分
     let currentRoomId = null;
     let roomsData = {};
     let servingQueue = [];
@@ -43,102 +41,36 @@ document.addEventListener('DOMContentLoaded', function() {
     function initWebSockets() {
         updateConnectionStatus('正在连接...', 'connecting');
 
-        // 连接房间信息 WebSocket
-        roomInfoSocket = new WebSocket('ws://127.0.0.1:10043/ws/roominfo');
-        
-        roomInfoSocket.onopen = function() {
-            console.log('房间信息 WebSocket 已连接');
+        subscribeSocket = new WebSocket('ws://127.0.0.1:10043/ws/subscribe');
+
+        subscribeSocket.onopen = function() {
+            console.log('订阅 WebSocket 已连接');
             updateConnectionStatus('已连接', 'connected');
-            requestRoomInfo();
         };
-        
-        roomInfoSocket.onmessage = function(event) {
+
+        subscribeSocket.onmessage = function(event) {
             const data = JSON.parse(event.data);
-            if (data.rooms) {
-                handleRoomsData(data.rooms);
+            if (data.type === 'snapshot') {
+                handleSnapshot(data);
+            } else if (data.type === 'diff') {
+                handleDiff(data);
             }
         };
-        
-        roomInfoSocket.onerror = function(error) {
-            console.error('房间信息 WebSocket 错误:', error);
+
+        subscribeSocket.onerror = function(error) {
+            console.error('订阅 WebSocket 错误:', error);
             updateConnectionStatus('连接错误', 'disconnected');
-            showAlert('连接错误', '无法连接到房间信息服务，请检查网络或服务器状态。');
-        };
-        
-        roomInfoSocket.onclose = function() {
-            console.log('房间信息 WebSocket 已关闭');
-            updateConnectionStatus('未连接', 'disconnected');
-            
-            // 尝试重新连接
-            setTimeout(function() {
-                if (roomInfoSocket.readyState === WebSocket.CLOSED) {
-                    initWebSockets();
-                }
-            }, 5000);
+            showAlert('连接错误', '无法连接到服务器，请检查网络或服务器状态。');
         };
 
-        // 连接调度信息 WebSocket
-        scheduleSocket = new WebSocket('ws://127.0.0.1:10043/ws/query_schedule');
-        
-        scheduleSocket.onopen = function() {
-            console.log('调度信息 WebSocket 已连接');
-            requestScheduleInfo();
-        };
-        
-        scheduleSocket.onmessage = function(event) {
-            const data = JSON.parse(event.data);
-            if (data.serving_queue && data.waiting_queue) {
-                servingQueue = data.serving_queue;
-                waitingQueue = data.waiting_queue;
-                renderQueues();
-            }
-        };
-        
-        scheduleSocket.onerror = function(error) {
-            console.error('调度信息 WebSocket 错误:', error);
-            showAlert('连接错误', '无法连接到调度信息服务，请检查网络或服务器状态。');
-        };
-        
-        scheduleSocket.onclose = function() {
-            console.log('调度信息 WebSocket 已关闭');
-            
-            // 尝试重新连接
-            setTimeout(function() {
-                if (scheduleSocket.readyState === WebSocket.CLOSED) {
-                    scheduleSocket = new WebSocket('ws://127.0.0.1:10043/ws/query_schedule');
-                }
-            }, 5000);
-        };
+        subscribeSocket.onclose = function() {
+            console.log('订阅 WebSocket 已关闭');
+            updateConnectionStatus('未连接', 'disconnected');
 
-        // 新增：连接房间详情查询 WebSocket
-        roomDetailSocket = new WebSocket('ws://127.0.0.1:10043/ws/query_room_info');
-        
-        roomDetailSocket.onopen = function() {
-            console.log('房间详情 WebSocket 已连接');
-        };
-        
-        roomDetailSocket.onmessage = function(event) {
-            const data = JSON.parse(event.data);
-            if (data.roomId) {
-                // 根据返回的roomId更新对应房间信息
-                updateRoomData(data.roomId, data);
-            } else {
-                console.warn('收到的房间详情数据没有roomId:', data);
-            }
-        };
-        
-        roomDetailSocket.onerror = function(error) {
-            console.error('房间详情 WebSocket 错误:', error);
-            showAlert('连接错误', '无法连接到房间详情服务，请检查网络或服务器状态。');
-        };
-        
-        roomDetailSocket.onclose = function() {
-            console.log('房间详情 WebSocket 已关闭');
-            
-            // 尝试重新连接
+            // 尝试重新连接，重连后会重新收到完整快照
             setTimeout(function() {
-                if (roomDetailSocket.readyState === WebSocket.CLOSED) {
-                    roomDetailSocket = new WebSocket('ws://127.0.0.1:10043/ws/query_room_info');
+                if (subscribeSocket.readyState === WebSocket.CLOSED) {
+                    initWebSockets();
                 }
             }, 5000);
         };
@@ -213,8 +145,7 @@ document.addEventListener('DOMContentLoaded', function() {
             e.preventDefault();
             showAlert('退出系统', '确定要退出系统吗？', function() {
                 // 关闭所有WebSocket连接
-                if (roomInfoSocket) roomInfoSocket.close();
-                if (scheduleSocket) scheduleSocket.close();
+                if (subscribeSocket) subscribeSocket.close();
                 
                 // 重定向到登录页面
                 window.location.href = '../index.html';
@@ -228,79 +159,76 @@ document.addEventListener('DOMContentLoaded', function() {
         connectionStatus.className = status;
     }
 
-    // 请求房间信息
-    function requestRoomInfo() {
-        if (roomInfoSocket.readyState === WebSocket.OPEN) {
-            roomInfoSocket.send(JSON.stringify({ request: 1 }));
-        } else {
-            console.error('房间信息WebSocket未连接');
-        }
-    }
-
-    // 请求调度信息
-    function requestScheduleInfo() {
-        if (scheduleSocket.readyState === WebSocket.OPEN) {
-            scheduleSocket.send(JSON.stringify({ request: 1 }));
-        } else {
-            console.error('调度信息WebSocket未连接');
-        }
-    }
-
-    // 处理房间数据
-    function handleRoomsData(rooms) {
+    // 处理完整快照
+    function handleSnapshot(data) {
         roomsContainer.innerHTML = '';
-        
-        if (rooms.length === 0) {
+        roomsData = {};
+
+        const roomIds = Object.keys(data.rooms);
+        if (roomIds.length === 0) {
             roomsContainer.innerHTML = '<div class="queue-empty">暂无房间信息</div>';
-            return;
         }
-        
-        rooms.forEach(room => {
-            const roomId = room.roomId;
-            
-            // 存储房间基本信息
-            if (!roomsData[roomId]) {
-                roomsData[roomId] = {
-                    id: roomId,
-                    status: room.status || 'unknown',
-                    currentTemp: '--',
-                    targetTemp: '--',
-                    mode: '--',
-                    speed: '--',
-                    bill: 0
-                };
-            } else {
-                roomsData[roomId].status = room.status || roomsData[roomId].status;
-            }
-            
-            // 创建房间卡片
-            createRoomCard(roomId);
-            
-            // 请求房间详细信息
-            requestRoomDetailInfo(roomId);
+
+        roomIds.forEach(roomId => {
+            addRoom(roomId);
+            updateRoomData(roomId, data.rooms[roomId]);
         });
+
+        servingQueue = data.serving_queue;
+        waitingQueue = data.waiting_queue;
+        renderQueues();
     }
 
-    // 请求房间详细信息 - 修改后的函数
-    function requestRoomDetailInfo(roomId) {
-        if (roomDetailSocket && roomDetailSocket.readyState === WebSocket.OPEN) {
-            roomDetailSocket.send(JSON.stringify({ roomId: roomId }));
-        } else {
-            console.error(`房间详情WebSocket未连接，无法请求房间 ${roomId} 的详细信息`);
-            // 如果连接未就绪，5秒后重试
-            setTimeout(function() {
-                if (roomDetailSocket && roomDetailSocket.readyState === WebSocket.OPEN) {
-                    roomDetailSocket.send(JSON.stringify({ roomId: roomId }));
+    // 处理变化推送：只更新发生变化的房间与队列
+    function handleDiff(data) {
+        if (data.rooms) {
+            Object.keys(data.rooms).forEach(roomId => {
+                if (!roomsData[roomId]) {
+                    addRoom(roomId);
                 }
-            }, 5000);
+                updateRoomData(roomId, data.rooms[roomId]);
+            });
+        }
+
+        if (data.removed) {
+            data.removed.forEach(roomId => {
+                delete roomsData[roomId];
+                const card = document.querySelector(`.room-card[data-room-id="${roomId}"]`);
+                if (card) card.remove();
+            });
+        }
+
+        if (data.serving_queue && data.waiting_queue) {
+            servingQueue = data.serving_queue;
+            waitingQueue = data.waiting_queue;
+            renderQueues();
         }
     }
 
+    // 登记房间并创建房间卡片
+    function addRoom(roomId) {
+        const empty = roomsContainer.querySelector('.queue-empty');
+        if (empty) empty.remove();
+
+        roomsData[roomId] = {
+            id: roomId,
+            status: 'unknown',
+            occupancy: 'unknown',
+            currentTemp: '--',
+            targetTemp: '--',
+            mode: '--',
+            speed: '--',
+            bill: 0
+        };
+        createRoomCard(roomId);
+    }
+
     // 更新房间数据
     function updateRoomData(roomId, data) {
         if (!roomsData[roomId]) return;
         
         roomsData[roomId].status = data.status !== undefined ? data.status : roomsData[roomId].status;
+        roomsData[roomId].occupancy = data.occupancy !== undefined ? data.occupancy : roomsData[roomId].occupancy;
         roomsData[roomId].currentTemp = data.now_temp !== undefined ? data.now_temp : roomsData[roomId].currentTemp;
         roomsData[roomId].targetTemp = data.set_temp !== undefined ? data.set_temp : roomsData[roomId].targetTemp;
         roomsData[roomId].mode = data.mode !== undefined ? data.mode : roomsData[roomId].mode;
@@ -573,11 +501,8 @@ document.addEventListener('DOMContentLoaded', function() {
                     roomsData[currentRoomId].bill = response.bill;
                 }
                 
-                // 更新UI
+                // 更新UI（调度队列的变化由订阅推送更新）
                 updateRoomCard(currentRoomId);
-                
-                // 刷新调度信息
-                requestScheduleInfo();
             }
             
             controlSocket.close();
@@ -655,12 +580,6 @@ document.addEventListener('DOMContentLoaded', function() {
                 
                 if (completedCount === totalCount) {
                     showAlert('操作完成', `已${state === 'on' ? '开启' : '关闭'}所有房间，成功: ${successCount}，失败: ${totalCount - successCount}`);
-                    
-                    // 刷新调度信息
-                    requestScheduleInfo();
-                    
-                    // 刷新房间状态
-                    requestRoomInfo();
                 }
                 
                 controlSocket.close();
@@ -672,12 +591,6 @@ document.addEventListener('DOMContentLoaded', function() {
                 
                 if (completedCount === totalCount) {
                     showAlert('操作完成', `已${state === 'on' ? '开启' : '关闭'}所有房间，成功: ${successCount}，失败: ${totalCount - successCount}`);
-                    
-                    // 刷新调度信息
-                    requestScheduleInfo();
-                    
-                    // 刷新房间状态
-                    requestRoomInfo();
                 }
             };
         });
@@ -722,22 +635,4 @@ document.addEventListener('DOMContentLoaded', function() {
         
         alertModal.style.display = 'flex';
     }
-
-    // 定期刷新数据
-    setInterval(function() {
-        if (roomInfoSocket.readyState === WebSocket.OPEN) {
-            requestRoomInfo();
-        }
-        
-        if (scheduleSocket.readyState === WebSocket.OPEN) {
-            requestScheduleInfo();
-        }
-        
-        // 定期刷新每个房间的详细信息
-        if (roomDetailSocket.readyState === WebSocket.OPEN) {
-            Object.keys(roomsData).forEach(roomId => {
-                requestRoomDetailInfo(roomId);
-            });
-        }
-    }, 5000); // 每5秒刷新一次
 });
\ No newline at end of file
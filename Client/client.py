@@ -1,15 +1,4 @@
-class RequestMessage:
-    def __init__(self,request_on_off ,request_temp, request_mode, request_fan, request_type, now_room_temp):
-        self.on_off = request_on_off
-        self.temp = request_temp
-        self.room_temp = now_room_temp
-        self.mode = request_mode
-        self.fan = request_fan
-        self.type = request_type
-        # type = 0 : 仅改变了温度（不发送新请求）
-        # type = 1 : 开启/关闭空调
-        # type = 2 : 改变了风速
-
+from controller import RequestMessage
 from PyQt5.QtWebSockets import QWebSocket
 from PyQt5.QtCore import QUrl
 import json
@@ -63,27 +52,6 @@ class AirconClient:
     def send_message(self, msg: RequestMessage):
         print(f'Message: {msg.on_off}, {msg.temp}, {msg.mode}, {msg.fan}, {msg.type}')
         if self.ws is not None and self.ws.isValid():
-            if msg.type == 1 or msg.type == 2:
-                json_msg = {
-                    "roomId": self.room_id,
-                    "state": msg.on_off,
-                    "speed": msg.fan,
-                    "now_temp": msg.room_temp,
-                    "set_temp": msg.temp,
-                    "mode": msg.mode,
-                    "new_request": 1
-                }
-                self.ws.sendTextMessage(json.dumps(json_msg))
-            elif msg.type == 0:
-                json_msg = {
-                    "roomId": self.room_id,
-                    "state": msg.on_off,
-                    "speed": msg.fan,
-                    "now_temp": msg.room_temp,
-                    "set_temp": msg.temp,
-                    "mode": msg.mode,
-                    "new_request": 0
-                }
-                self.ws.sendTextMessage(json.dumps(json_msg))
+            self.ws.sendTextMessage(json.dumps(msg.to_json(self.room_id)))
         else:
-            print("WebSocket is not connected.")
\ No newline at end of file
+            print("WebSocket is not connected.")
@@ -0,0 +1,150 @@
+# 空调面板的控制逻辑，与界面无关：开关机、调温、调风速、切换模式产生的请求，到达目标温度后的自动暂停与恢复，
+# 以及服务端答复与推送引起的状态变化。Qt 界面（main.py）、无界面客户端（headless.py）与场景测试（scenario.py）共用
+class RequestMessage:
+    def __init__(self,request_on_off ,request_temp, request_mode, request_fan, request_type, now_room_temp):
+        self.on_off = request_on_off
+        self.temp = request_temp
+        self.room_temp = now_room_temp
+        self.mode = request_mode
+        self.fan = request_fan
+        self.type = request_type
+        # type = 0 : 仅改变了温度（不发送新请求）
+        # type = 1 : 开启/关闭空调
+        # type = 2 : 改变了风速
+
+    def to_json(self, room_id):
+        """/ws/room 请求的 JSON 对象"""
+        return {
+            "roomId": room_id,
+            "state": self.on_off,
+            "speed": self.fan,
+            "now_temp": self.room_temp,
+            "set_temp": self.temp,
+            "mode": self.mode,
+            "new_request": 1 if self.type == 1 or self.type == 2 else 0
+        }
+
+class RoomController:
+    FAN_SPEEDS = 3
+
+    def __init__(self, room, send, on_request=None):
+        self.room = room # room.py 中的 Room，温度与费用模型
+        self.send = send # 立即发送一个 RequestMessage
+        # 有新请求等待合并发送时调用，由界面在短暂延迟后调用 flush()；为 None 时立即发送
+        self.on_request = on_request
+
+        self.power_on = False
+        self.sleep_mode = False # 房间的温度达到目标值以后，客户端自动发送停止送风请求给服务端。此时进入睡眠模式
+        self.mode = 'cool'
+        self.set_temp = 25.0
+        self.fan_index = 1 # 缺省风速为中速
+        self.request_list = [] # 请求列表
+
+    def blowing(self):
+        """是否正在送风（界面显示用）"""
+        return self.power_on and not self.sleep_mode
+
+    def toggle_power(self):
+        self.set_power(not self.power_on)
+
+    def set_power(self, power_on):
+        self.power_on = power_on
+        self.sleep_mode = False
+        self.request_service(type=1)
+        if self.power_on and (not self.sleep_mode):
+            self.room.set_wind(self.set_temp, self.fan_index, self.mode)
+        else:
+            self.room.stop_wind()
+
+    def switch_mode(self):
+        self.mode = 'heat' if self.mode == 'cool' else 'cool'
+        self.set_temp = 25.0
+        self.request_service(type=1)
+        if self.power_on and (not self.sleep_mode):
+            self.room.set_wind(self.set_temp, self.fan_index, self.mode)
+
+    def temp_range(self):
+        return (18, 25) if self.mode == 'cool' else (25, 30)
+
+    def increase_set_temp(self):
+        if self.set_temp < self.temp_range()[1]:
+            self.change_set_temp(self.set_temp + 1)
+
+    def decrease_set_temp(self):
+        if self.set_temp > self.temp_range()[0]:
+            self.change_set_temp(self.set_temp - 1)
+
+    def change_set_temp(self, temp):
+        """直接设定目标温度（超出当前模式的范围时取边界）"""
+        low, high = self.temp_range()
+        self.set_temp = float(min(max(temp, low), high))
+        self.sleep_mode = False
+        self.request_service(type=0)
+        if self.power_on and (not self.sleep_mode):
+            self.room.set_wind(self.set_temp, self.fan_index, self.mode)
+
+    def cycle_fan(self):
+        self.set_fan((self.fan_index + 1) % self.FAN_SPEEDS)
+
+    def set_fan(self, fan_index):
+        self.fan_index = fan_index
+        self.request_service(type=2)
+        if self.power_on and (not self.sleep_mode):
+            self.room.set_wind(self.set_temp, self.fan_index, self.mode)
+
+    def _message(self, on_off, type):
+        return RequestMessage(
+            request_on_off=on_off,
+            request_temp=self.set_temp,
+            request_mode=self.mode,
+            request_fan=self.fan_index,
+            request_type=type,
+            now_room_temp=self.room.get_current_temp()
+        )
+
+    def request_service(self, type):
+        self.request_list.append(self._message("pause" if self.sleep_mode else ("on" if self.power_on else "off"), type))
+        if self.on_request:
+            self.on_request()
+        else:
+            self.flush()
+
+    def flush(self):
+        """只发送最后一次的指令参数，中间的请求会被丢弃"""
+        if self.request_list:
+            msg = self.request_list.pop()
+            self.request_list.clear()
+            self.send(msg)
+
+    def receive_server_schedule(self, schedule_on_off: bool):
+        if self.power_on == schedule_on_off:
+            return # 如果当前状态和服务器的调度状态相同，则不需要更新
+        self.power_on = schedule_on_off
+        if self.power_on:
+            self.room.set_wind(self.set_temp, self.fan_index, self.mode)
+        else:
+            self.room.stop_wind()
+
+    def on_message(self, json_msg):
+        """服务端的答复或推送：'state' == 'pause' 时，虽然休眠，但是系统本身开机"""
+        self.receive_server_schedule(json_msg['state'] != 'off')
+        self.room.set_cost(json_msg['bill'])
+
+    def refresh(self):
+        """按当前室温检查是否到达目标温度（暂停送风）或偏离超过 1 度（恢复送风），界面每次刷新温度时调用"""
+        current_temp = self.room.get_current_temp()
+        reached = (self.mode == 'cool' and current_temp <= self.set_temp) or \
+                  (self.mode == 'heat' and current_temp >= self.set_temp)
+        if reached and self.power_on and (not self.sleep_mode):
+            self.sleep_mode = True
+            self.room.stop_wind()
+            self.request_list.clear()
+            self.send(self._message("pause", 1))
+
+        if abs(current_temp - self.set_temp) > 1 and self.sleep_mode and self.power_on:
+            if reached:
+                return
+            self.sleep_mode = False
+            self.request_list.clear()
+            self.send(self._message("on", 1))
+            self.room.set_wind(self.set_temp, self.fan_index, self.mode)
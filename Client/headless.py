@@ -0,0 +1,245 @@
+# 无界面的房间客户端：复用 room.py 的温度与费用模型和 controller.py 的请求逻辑（含到达目标温度后的暂停与恢复），
+# 经 asyncio 连接 /ws/room，不依赖 PyQt5，一个进程可以模拟成千上万个房间。
+# 作为脚本运行时是负载生成器：房间按到达模式陆续入住并开机，随机调温、调风速，住满停留时间后关机离开。
+#   python headless.py --rooms 2000 --arrival poisson --rate 20 --duration 120 --speed 10
+# 服务端以 SOFTAIR_CLOCK_SPEED 加速时 --speed 应与之相同。--inventory 给出房间清单（CSV，含 roomId 列）时
+# 使用其中的房间号并在开机前办理入住、离开时退房，否则使用生成的房间号，只产生调度负载
+import sys
+import csv
+import json
+import random
+import asyncio
+import argparse
+
+from room import Room
+from controller import RoomController
+
+TICKS_PER_MINUTE = 10 # 每模拟分钟的刷新次数（room.py 中每次刷新对应 0.1 分钟的温度变化）
+ARRIVALS = ('uniform', 'poisson', 'burst')
+
+class HeadlessRoom:
+    """一个模拟房间：Room 模型、RoomController 与一个 /ws/room 连接"""
+    def __init__(self, room_id, init_temp=25.0):
+        self.room = Room()
+        self.room.set_room_id(room_id)
+        self.room.init_current_temp(init_temp)
+        # 每次操作只产生一个请求，无需像界面那样合并连续点击，请求立即进入发送队列
+        self.controller = RoomController(self.room, self._send)
+        self.outbox = asyncio.Queue()
+        self.ws = None
+        self.tasks = []
+        self.sent = 0
+        self.received = 0
+        self.outstanding = 0 # 已发送但未收到答复的请求数（答复按请求顺序返回，期间的推送也会被计入答复）
+        self.idle = asyncio.Event() # 请求都已答复
+
+    @property
+    def room_id(self):
+        return self.room.get_room_id()
+
+    def _send(self, msg):
+        self.outbox.put_nowait(msg.to_json(self.room_id))
+
+    async def connect(self, url):
+        from websockets.asyncio.client import connect
+
+        self.ws = await connect(f'{url}/ws/room?roomId={self.room_id}')
+        self.tasks = [asyncio.create_task(self._write()), asyncio.create_task(self._read())]
+
+    async def _write(self):
+        while True:
+            msg = await self.outbox.get()
+            self.outstanding += 1
+            self.idle.clear()
+            await self.ws.send(json.dumps(msg))
+            self.sent += 1
+
+    async def _read(self):
+        async for message in self.ws:
+            self.received += 1
+            if self.outstanding:
+                self.outstanding -= 1
+                if not self.outstanding and self.outbox.empty():
+                    self.idle.set()
+            self.controller.on_message(json.loads(message))
+
+    def tick(self):
+        """推进一次温度与费用，并检查是否需要暂停或恢复送风"""
+        self.room.tick()
+        self.controller.refresh()
+
+    async def power_off(self, timeout=1.0):
+        """关机并等待全部请求的答复（最多 timeout 秒），避免服务端向已关闭的连接答复"""
+        self.controller.set_power(False)
+        self.idle.clear()
+        try:
+            await asyncio.wait_for(self.idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def close(self):
+        """断开连接（服务端随之关闭该房间的空调）"""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.ws:
+            await self.ws.close()
+
+def arrival_offsets(arrival, count, rate, burst, rng):
+    """各房间的到达时刻（模拟分钟），平均每分钟 rate 个：均匀、泊松过程或每 burst 个同时到达"""
+    offsets = []
+    now = 0.0
+    for i in range(count):
+        if arrival == 'uniform':
+            offsets.append(i / rate)
+        elif arrival == 'poisson':
+            now += rng.expovariate(rate)
+            offsets.append(now)
+        else:
+            offsets.append(i // burst * burst / rate)
+    return offsets
+
+class Swarm:
+    def __init__(self, url, room_ids, arrival='poisson', rate=10.0, burst=50, stay=(5.0, 30.0), change_rate=0.2,
+                 speed=1.0, checkin=False, seed=0):
+        self.url = url.rstrip('/')
+        self.room_ids = room_ids
+        self.stay = stay # 停留时间范围（模拟分钟）
+        self.change_rate = change_rate # 每个房间每分钟调温或调风速的平均次数
+        self.speed = speed
+        self.checkin = checkin
+        self.rng = random.Random(seed)
+        self.offsets = arrival_offsets(arrival, len(room_ids), rate, burst, self.rng)
+
+        self.rooms = {} # roomId -> 在住的 HeadlessRoom
+        self.departures = [] # (离开时刻, roomId)
+        self.pending = set() # 正在入住或离开的任务
+        self.stats = {'arrived': 0, 'departed': 0, 'failed': 0, 'sent': 0, 'received': 0}
+        self.desk = None # 入住 / 退房连接
+        self.desk_lock = asyncio.Lock()
+
+    async def _desk(self, route, data):
+        from websockets.asyncio.client import connect
+
+        async with self.desk_lock: # 一个连接上请求与答复一一对应
+            if self.desk is None:
+                self.desk = {}
+            if route not in self.desk:
+                self.desk[route] = await connect(f'{self.url}/ws/{route}')
+            await self.desk[route].send(json.dumps(data))
+            return json.loads(await self.desk[route].recv())
+
+    async def _arrive(self, roomId, now):
+        room = HeadlessRoom(roomId, init_temp=round(self.rng.uniform(26.0, 34.0), 1))
+        try:
+            if self.checkin:
+                ret = await self._desk('checkin', {'roomId': roomId, 'client_name': f'swarm-{roomId}',
+                                                   'client_id': f'swarm-{roomId}'})
+                if ret['status'] != 'OK':
+                    raise RuntimeError(f'checkin {roomId}: {ret}')
+            await room.connect(self.url)
+        except Exception as e:
+            print(f'房间 {roomId} 连接失败: {e}')
+            self.stats['failed'] += 1
+            return
+        self.rooms[roomId] = room
+        self.stats['arrived'] += 1
+        room.controller.change_set_temp(self.rng.randint(18, 24))
+        room.controller.set_fan(self.rng.randrange(RoomController.FAN_SPEEDS))
+        room.controller.set_power(True)
+        self.departures.append((now + self.rng.uniform(*self.stay), roomId))
+
+    async def _depart(self, roomId):
+        room = self.rooms.pop(roomId)
+        await room.power_off()
+        await room.close()
+        if self.checkin:
+            await self._desk('checkout', {'roomId': roomId})
+        self.stats['departed'] += 1
+        self.stats['sent'] += room.sent
+        self.stats['received'] += room.received
+
+    def _spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    def _act(self, room):
+        """随机调温或调风速"""
+        if self.rng.random() < 0.5:
+            room.controller.change_set_temp(self.rng.randint(18, 24))
+        else:
+            room.controller.set_fan(self.rng.randrange(RoomController.FAN_SPEEDS))
+
+    def report(self, now):
+        sent = self.stats['sent'] + sum(room.sent for room in self.rooms.values())
+        received = self.stats['received'] + sum(room.received for room in self.rooms.values())
+        print(f"第 {now:6.1f} 分钟  在住 {len(self.rooms):>6}  到达 {self.stats['arrived']:>6}  "
+              f"离开 {self.stats['departed']:>6}  失败 {self.stats['failed']:>4}  发送 {sent:>8}  收到 {received:>8}")
+
+    async def run(self, duration, report_every=1.0):
+        """运行 duration 模拟分钟，到时仍在住的房间全部离开"""
+        loop = asyncio.get_running_loop()
+        period = Room().tick_interval() / self.speed # 一次刷新的真实秒数
+        start = loop.time()
+        arrivals = sorted(zip(self.offsets, self.room_ids), reverse=True)
+        next_report = report_every
+        tick = 0
+        while True:
+            now = tick / TICKS_PER_MINUTE
+            if now > duration:
+                break
+            while arrivals and arrivals[-1][0] <= now:
+                self._spawn(self._arrive(arrivals.pop()[1], now))
+            self.departures.sort(reverse=True)
+            while self.departures and self.departures[-1][0] <= now:
+                self._spawn(self._depart(self.departures.pop()[1]))
+            for room in list(self.rooms.values()):
+                room.tick()
+                if self.rng.random() < self.change_rate / TICKS_PER_MINUTE:
+                    self._act(room)
+            if now >= next_report:
+                self.report(now)
+                next_report += report_every
+            tick += 1
+            await asyncio.sleep(max(start + tick * period - loop.time(), 0))
+
+        await asyncio.gather(*self.pending, return_exceptions=True)
+        await asyncio.gather(*(self._depart(roomId) for roomId in list(self.rooms)), return_exceptions=True)
+        for ws in (self.desk or {}).values():
+            await ws.close()
+        self.report(duration)
+        return self.stats
+
+def load_room_ids(path):
+    with open(path, encoding='utf-8-sig') as file:
+        return [row['roomId'].strip() for row in csv.DictReader(file)]
+
+def main():
+    parser = argparse.ArgumentParser(description='在一个进程中模拟大量房间客户端，向运行中的服务产生负载')
+    parser.add_argument('--url', default='ws://localhost:10043')
+    parser.add_argument('--rooms', type=int, default=100, help='房间数（给出 --inventory 时最多为清单中的房间数）')
+    parser.add_argument('--inventory', help='房间清单 CSV，给出时使用其中的房间号并办理入住')
+    parser.add_argument('--prefix', default='sim', help='生成房间号的前缀')
+    parser.add_argument('--arrival', choices=ARRIVALS, default='poisson')
+    parser.add_argument('--rate', type=float, default=10.0, help='平均每模拟分钟到达的房间数')
+    parser.add_argument('--burst', type=int, default=50, help='burst 模式下每批同时到达的房间数')
+    parser.add_argument('--stay', type=float, nargs=2, default=(5.0, 30.0), metavar=('MIN', 'MAX'),
+                        help='停留时间范围（模拟分钟）')
+    parser.add_argument('--change-rate', type=float, default=0.2, help='每个房间每分钟调温或调风速的平均次数')
+    parser.add_argument('--duration', type=float, default=60.0, help='运行时长（模拟分钟）')
+    parser.add_argument('--speed', type=float, default=1.0, help='时间倍速，与服务端的 SOFTAIR_CLOCK_SPEED 相同')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.inventory:
+        room_ids = load_room_ids(args.inventory)[:args.rooms]
+    else:
+        room_ids = [f'{args.prefix}{i:05d}' for i in range(args.rooms)]
+    swarm = Swarm(args.url, room_ids, args.arrival, args.rate, args.burst, tuple(args.stay), args.change_rate,
+                  args.speed, checkin=bool(args.inventory), seed=args.seed)
+    stats = asyncio.run(swarm.run(args.duration))
+    sys.exit(1 if stats['failed'] else 0)
+
+if __name__ == '__main__':
+    main()
@@ -9,7 +9,8 @@ from PyQt5.QtGui import QIcon
 from PyQt5.QtSvg import QSvgWidget
 from PyQt5.QtCore import Qt, QSize, pyqtBoundSignal, QTimer, QEventLoop
 
-from client import AirconClient, RequestMessage
+from client import AirconClient
+from controller import RoomController
 from room import Room
 
 class ClientGUI(QMainWindow):
@@ -41,21 +42,21 @@ class ClientGUI(QMainWindow):
                     break
                 except ValueError:
                     QMessageBox.critical(self, "格式错误", "请输入有效的浮点数作为温度。")
+        # 系统状态与请求逻辑（controller.py），界面只负责显示与转发按钮操作
+        self.controller = RoomController(self.room, self._send_message, on_request=self._schedule_send)
+
+        # 温度与费用模型按 Room 的刷新间隔推进
+        self.room_timer = QTimer(self)
+        cast(pyqtBoundSignal, self.room_timer.timeout).connect(self.room.tick)
+        self.room_timer.start(int(self.room.tick_interval() * 1000))
         self.current_temp_timer = QTimer(self)
         cast(pyqtBoundSignal, self.current_temp_timer.timeout).connect(self.refresh_current_temp)
         self.current_temp_timer.start(1000) # 每秒刷新一次当前温度
 
-        # 系统状态
-        self.power_on = False
-        self.sleep_mode = False # 房间的温度达到目标值以后，客户端自动发送停止送风请求给服务端。此时进入睡眠模式
-        self.mode = 'cool'
         self.current_temp = self.room.get_current_temp()
-        self.set_temp = 25.0
         self.fan_speeds_show = ['|  ', '|| ', '|||']
-        self.fan_index = 1 # 缺省风速为中速
         self.now_cost = 0.0 # 当前费用
 
-        self.request_list = [] # 请求列表
         self.send_timer = QTimer(self) # 发送请求计时器
         cast(pyqtBoundSignal, self.send_timer.timeout).connect(self._send_request)
 
@@ -166,7 +167,7 @@ class ClientGUI(QMainWindow):
         self.lcd_set.setDigitCount(4)
         self.lcd_set.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
         self.lcd_set.setFixedSize(300, 200)
-        self.lcd_set.display(f'{self.set_temp:.1f}')
+        self.lcd_set.display(f'{self.controller.set_temp:.1f}')
         set_widget = self._labeled_widget("设定温度", self.lcd_set)
         top_layout.addWidget(set_widget)
 
@@ -197,7 +198,7 @@ class ClientGUI(QMainWindow):
         below_layout.addStretch(5)
 
         # 风速文字显示
-        self.lbl_fan_speed = QLabel(f"风速: {self.fan_speeds_show[self.fan_index]} 停止送风")
+        self.lbl_fan_speed = QLabel(f"风速: {self.fan_speeds_show[self.controller.fan_index]} 停止送风")
         self.lbl_fan_speed.setAlignment(Qt.AlignCenter)
         below_layout.addWidget(self.lbl_fan_speed, stretch=1)
         below_layout.addStretch(5)
@@ -224,172 +225,71 @@ class ClientGUI(QMainWindow):
         layout.addWidget(widget)
         return container
 
-    def toggle_power(self):
-        self.power_on = not self.power_on
-        self.sleep_mode = False
-        self.request_service(type=1)
-        icon = "toggle-on.svg" if self.power_on else "toggle-off.svg"
+    def _update_fan_label(self):
+        state = "正在送风" if self.controller.blowing() else "停止送风"
+        self.lbl_fan_speed.setText(f"风速: {self.fan_speeds_show[self.controller.fan_index]} {state}")
+
+    def _update_power_icon(self):
+        icon = "toggle-on.svg" if self.controller.power_on else "toggle-off.svg"
         self.btn_power.setIcon(QIcon(f"./resource/{icon}"))
+        self.btn_power.setChecked(self.controller.power_on)
 
-        if self.power_on and (not self.sleep_mode):
-            self.lbl_fan_speed.setText(f"风速: {self.fan_speeds_show[self.fan_index]} 正在送风")
-            self.room.set_wind(self.set_temp, self.fan_index, self.mode)
-        else:
-            self.lbl_fan_speed.setText(f"风速: {self.fan_speeds_show[self.fan_index]} 停止送风")
-            self.room.stop_wind()
+    def toggle_power(self):
+        self.controller.toggle_power()
+        self._update_power_icon()
+        self._update_fan_label()
 
     def switch_mode(self):
-        self.mode = 'heat' if self.mode == 'cool' else 'cool'
+        self.controller.switch_mode()
         self._update_mode_icon()
-        self.set_temp = 25.0
-        self.lcd_set.display(f'{self.set_temp:.1f}')
-        self.request_service(type=1)
-        if self.power_on and (not self.sleep_mode):
-            self.room.set_wind(self.set_temp, self.fan_index, self.mode)
+        self.lcd_set.display(f'{self.controller.set_temp:.1f}')
 
     def _update_mode_icon(self):
-        file = "snowflake.svg" if self.mode == 'cool' else "sun.svg"
+        file = "snowflake.svg" if self.controller.mode == 'cool' else "sun.svg"
         self.btn_mode.setIcon(QIcon(f"./resource/{file}"))
         self.btn_mode.setIconSize(QSize(48, 48))
 
     def increase_set_temp(self):
-        if self.mode == 'cool' and self.set_temp < 25:
-            self.set_temp += 1
-            self.lcd_set.display(f'{self.set_temp:.1f}')
-            self.sleep_mode = False
-
-            self.request_service(type=0)
-            if self.power_on and (not self.sleep_mode):
-                self.lbl_fan_speed.setText(f"风速: {self.fan_speeds_show[self.fan_index]} 正在送风")
-                self.room.set_wind(self.set_temp, self.fan_index, self.mode)
-        elif self.mode == 'heat' and self.set_temp < 30:
-            self.set_temp += 1
-            self.lcd_set.display(f'{self.set_temp:.1f}')
-            self.sleep_mode = False
-
-            self.request_service(type=0)
-            if self.power_on and (not self.sleep_mode):
-                self.lbl_fan_speed.setText(f"风速: {self.fan_speeds_show[self.fan_index]} 正在送风")
-                self.room.set_wind(self.set_temp, self.fan_index, self.mode)
+        self.controller.increase_set_temp()
+        self.lcd_set.display(f'{self.controller.set_temp:.1f}')
+        self._update_fan_label()
 
     def decrease_set_temp(self):
-        if self.mode == 'cool' and self.set_temp > 18:
-            self.set_temp -= 1
-            self.lcd_set.display(f'{self.set_temp:.1f}')
-            self.sleep_mode = False
-
-            self.request_service(type=0)
-            if self.power_on and (not self.sleep_mode):
-                self.lbl_fan_speed.setText(f"风速: {self.fan_speeds_show[self.fan_index]} 正在送风")
-                self.room.set_wind(self.set_temp, self.fan_index, self.mode)
-        elif self.mode == 'heat' and self.set_temp > 25:
-            self.set_temp -= 1
-            self.lcd_set.display(f'{self.set_temp:.1f}')
-            self.sleep_mode = False
-
-            self.request_service(type=0)
-            if self.power_on and (not self.sleep_mode):
-                self.lbl_fan_speed.setText(f"风速: {self.fan_speeds_show[self.fan_index]} 正在送风")
-                self.room.set_wind(self.set_temp, self.fan_index, self.mode)
+        self.controller.decrease_set_temp()
+        self.lcd_set.display(f'{self.controller.set_temp:.1f}')
+        self._update_fan_label()
 
     def cycle_fan(self):
-        self.fan_index = (self.fan_index + 1) % len(self.fan_speeds_show)
-        self.request_service(type=2)
-        if self.power_on and (not self.sleep_mode):
-            self.lbl_fan_speed.setText(f"风速: {self.fan_speeds_show[self.fan_index]} 正在送风")
-            self.room.set_wind(self.set_temp, self.fan_index, self.mode)
-        else:
-            self.lbl_fan_speed.setText(f"风速: {self.fan_speeds_show[self.fan_index]} 停止送风")
-
-    def request_service(self, type):
-        self.request_list.append(RequestMessage(
-            request_on_off="pause" if self.sleep_mode else ("on" if self.power_on else "off"),
-            request_temp=self.set_temp,
-            request_mode=self.mode,
-            request_fan=self.fan_index,
-            request_type=type,
-            now_room_temp=self.current_temp
-        ))
+        self.controller.cycle_fan()
+        self._update_fan_label()
+
+    def _schedule_send(self):
         # 计时：刷新计时器为1s，1s到后只发送最后1次的指令参数
         if self.send_timer.isActive():
             self.send_timer.stop()
         self.send_timer.start(10) # 实际为10ms 因为1min的倍率缩放
 
     def _send_request(self):
-        if self.request_list:
-            msg = self.request_list.pop()
-            self.client.send_message(msg)
-            self.request_list.clear() # 可能会有多次的请求，中间的请求会被丢弃
+        self.controller.flush()
         self.send_timer.stop()
 
+    def _send_message(self, msg):
+        if self.send_timer.isActive(): # 直接发送的请求（暂停 / 恢复送风）取代尚未发送的请求
+            self.send_timer.stop()
+        self.client.send_message(msg)
+
     def receive_server_schedule(self, schedule_on_off: bool):
-        if self.power_on == schedule_on_off:
-            return # 如果当前状态和服务器的调度状态相同，则不需要更新
-        self.power_on = schedule_on_off
-        if self.power_on:
-            self.btn_power.setIcon(QIcon("./resource/toggle-on.svg"))
-            self.btn_power.setChecked(True)
-            self.lbl_fan_speed.setText(f"风速: {self.fan_speeds_show[self.fan_index]} 正在送风")
-            self.room.set_wind(self.set_temp, self.fan_index, self.mode)
-        else:
-            self.btn_power.setIcon(QIcon("./resource/toggle-off.svg"))
-            self.btn_power.setChecked(False)
-            self.lbl_fan_speed.setText(f"风速: {self.fan_speeds_show[self.fan_index]} 停止送风")
-            self.room.stop_wind()
+        self.controller.receive_server_schedule(schedule_on_off)
+        self._update_power_icon()
+        self._update_fan_label()
 
     def refresh_current_temp(self):
         self.current_temp = self.room.get_current_temp()
         self.lcd_current.display(f'{self.current_temp:.1f}')
         self.now_cost = self.room.get_cost()
         self.lbl_cost.setText(f"当前费用: {self.now_cost:.2f} 元")
-        if (self.mode=='cool' and self.current_temp<=self.set_temp) and self.power_on and (not self.sleep_mode):
-            self.sleep_mode = True
-            self.room.stop_wind()
-            self.lbl_fan_speed.setText(f"风速: {self.fan_speeds_show[self.fan_index]} 停止送风")
-            self.client.send_message(RequestMessage(
-                request_on_off="pause",
-                request_temp=self.set_temp,
-                request_mode=self.mode,
-                request_fan=self.fan_index,
-                request_type=1,
-                now_room_temp= self.current_temp
-            ))
-            if self.send_timer.isActive():
-                self.send_timer.stop()
-                self.request_list.clear()
-        elif (self.mode=='heat' and self.current_temp>=self.set_temp) and self.power_on and (not self.sleep_mode):
-            self.sleep_mode = True
-            self.room.stop_wind()
-            self.lbl_fan_speed.setText(f"风速: {self.fan_speeds_show[self.fan_index]} 停止送风")
-            self.client.send_message(RequestMessage(
-                request_on_off="pause",
-                request_temp=self.set_temp,
-                request_mode=self.mode,
-                request_fan=self.fan_index,
-                request_type=1,
-                now_room_temp= self.current_temp
-            ))
-            if self.send_timer.isActive():
-                self.send_timer.stop()
-                self.request_list.clear()
-
-        if abs(self.current_temp - self.set_temp) > 1 and self.sleep_mode and self.power_on:
-            if (self.mode=='heat' and self.current_temp>=self.set_temp) or (self.mode=='cool' and self.current_temp<=self.set_temp):
-                return
-            self.sleep_mode = False
-            self.lbl_fan_speed.setText(f"风速: {self.fan_speeds_show[self.fan_index]} 正在送风")
-            self.client.send_message(RequestMessage(
-                request_on_off="on",
-                request_temp=self.set_temp,
-                request_mode=self.mode,
-                request_fan=self.fan_index,
-                request_type=1,
-                now_room_temp= self.current_temp
-            ))
-            if self.send_timer.isActive():
-                self.send_timer.stop()
-                self.request_list.clear()
-            self.room.set_wind(self.set_temp, self.fan_index, self.mode)
+        self.controller.refresh()
+        self._update_fan_label()
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
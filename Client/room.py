@@ -1,6 +1,4 @@
-from typing import cast
-from PyQt5.QtCore import pyqtBoundSignal, QTimer
-
+# 房间的温度与费用模型，与界面无关：由调用方每隔 tick_interval() 秒调用一次 tick()（Qt 界面中为 QTimer）
 class Room:
     def __init__(self):
         self.room_id = '000'
@@ -14,13 +12,13 @@ class Room:
 
         self.TIME_SPEED = 6 # 时间流速倍率
 
-        self.refresh_temp_timer = QTimer()
-        cast(pyqtBoundSignal, self.refresh_temp_timer.timeout).connect(self.change_temp)
-        self.refresh_temp_timer.start(int(6000 / self.TIME_SPEED))
+    def tick_interval(self):
+        """温度与费用的刷新间隔（秒）"""
+        return 6 / self.TIME_SPEED
 
-        self.calculate_cost_timer = QTimer()
-        cast(pyqtBoundSignal, self.calculate_cost_timer.timeout).connect(self.calculate_cost)
-        self.calculate_cost_timer.start(int(6000 / self.TIME_SPEED))
+    def tick(self):
+        self.change_temp()
+        self.calculate_cost()
 
     def set_room_id(self, room_id):
         self.room_id = room_id
@@ -44,10 +42,6 @@ class Room:
             self.fan_speed = wind
             self.mode = mode
             self.running = True
-            self.refresh_temp_timer.stop()
-            self.refresh_temp_timer.start(int(6000 / self.TIME_SPEED))
-            self.calculate_cost_timer.stop()
-            self.calculate_cost_timer.start(int(6000 / self.TIME_SPEED))
         else:
             self.set_temp = temp
             self.fan_speed = wind
@@ -57,10 +51,6 @@ class Room:
         self.running = False
         self.set_temp = 25.0
         self.fan_speed = 0
-        self.refresh_temp_timer.stop()
-        self.refresh_temp_timer.start(int(6000 / self.TIME_SPEED))
-        self.calculate_cost_timer.stop()
-        self.calculate_cost_timer.start(int(6000 / self.TIME_SPEED))
 
     def change_temp(self):
         if self.running:
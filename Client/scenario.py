@@ -0,0 +1,339 @@
+# 无界面场景测试：代替 autoclick.py 的屏幕点击，从场景文件读取逐分钟的房间操作（开关机、设定温度、风速、模式），
+# 直接按 /ws/room 协议向服务端发送请求，并在每分钟中点核对服务队列、等待队列与各房间账单，输出差异报告。
+# 客户端一侧的状态（开关机、温度变化、到达目标温度后的暂停与恢复）直接使用界面共用的 controller.py / room.py。
+#   默认在进程内创建服务核心，使用虚拟时钟与临时数据库，整场测试在几秒内完成，结果可重复：
+#       python scenario.py scenarios/autoclick.json
+#   --url 连接运行中的服务（服务端需以 SOFTAIR_CLOCK_SPEED 启动，--speed 与之相同）。倍速过高时请求延迟
+#   相对模拟分钟不可忽略，结果可能与进程内运行不同，建议不超过 10 倍（25 分钟的场景约需 25 秒）：
+#       python scenario.py scenarios/autoclick.json --url ws://localhost:10043 --speed 10
+#   --record 将本次运行的结果写回场景文件作为期望值
+# 全部分钟与期望一致时退出状态为 0，否则为 1
+import os
+import sys
+import json
+import asyncio
+import argparse
+import tempfile
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Server')
+sys.path.insert(0, SERVER_DIR)
+import Clock as cl
+from Storage import parse_time
+
+from room import Room
+from controller import RoomController
+
+MINUTE = 9.6 # 模拟 1 分钟对应的时钟秒数，与服务端计费间隔相同
+# 连接运行中的服务时，每分钟操作前最多等待 SETTLE_WINDOW 时钟秒，等待名义上整分钟到期的计费推送送达；
+# 名义时刻与整分钟相差 PHASE_TOLERANCE 以内视为对齐
+SETTLE_WINDOW = 0.5
+PHASE_TOLERANCE = 0.1
+TICKS_PER_MINUTE = 10 # 客户端每模拟分钟刷新温度的次数（room.py 中每秒一次）
+START_TIME = '2025-01-01 08:00:00' # 进程内运行时虚拟时钟的起点
+SPEEDS = {'low': 0, 'medium': 1, 'high': 2}
+BILL_TOLERANCE = 0.01
+
+class ScenarioRoom:
+    """一个房间客户端：room.py 的 Room 与 controller.py 的 RoomController，与界面使用相同的规则"""
+    def __init__(self, room_id, init_temp=25.0, mode='cool'):
+        self.room = Room()
+        self.room.set_room_id(room_id)
+        self.room.init_current_temp(init_temp)
+        self.outbox = [] # 待发送的请求，每次操作或刷新后取走
+        self.controller = RoomController(self.room, lambda msg: self.outbox.append(msg.to_json(room_id)))
+        self.controller.mode = mode
+
+    @property
+    def room_id(self):
+        return self.room.get_room_id()
+
+    def _take(self):
+        messages, self.outbox = self.outbox, []
+        return messages
+
+    def apply(self, action):
+        """执行一个场景操作，返回需要发送的请求"""
+        controller = self.controller
+        if 'power' in action:
+            if action['power'] == 'toggle':
+                controller.toggle_power()
+            elif action['power'] == 'on':
+                if not controller.power_on:
+                    controller.set_power(True)
+            else:
+                # 关机总是发送：被抢占的房间在客户端显示关机，但仍在服务端的等待队列中
+                controller.set_power(False)
+        elif 'set_temp' in action:
+            controller.change_set_temp(action['set_temp'])
+        elif 'speed' in action:
+            controller.set_fan(SPEEDS[action['speed']])
+        elif 'mode' in action:
+            if action['mode'] != controller.mode:
+                controller.switch_mode()
+        else:
+            raise ValueError(f'unknown action: {action}')
+        return self._take()
+
+    def receive(self, message):
+        """服务端的答复与推送：同步开关机状态与账单（'pause' 视为开机）"""
+        self.controller.on_message(message)
+
+    def tick(self):
+        """刷新一次温度，返回到达目标温度或偏离超过 1 度时的暂停 / 恢复送风请求"""
+        self.room.tick()
+        self.controller.refresh()
+        return self._take()
+
+class _RoomSink:
+    """进程内运行时代替房间的 WebSocket，接收调度推送"""
+    def __init__(self, room):
+        self.room = room
+
+    async def send(self, message):
+        self.room.receive(json.loads(message))
+
+class LocalServer:
+    """进程内的服务核心，使用虚拟时钟与临时数据库"""
+    def __init__(self, inventory=None):
+        self.inventory = inventory
+        self.clock = cl.VirtualClock(parse_time(START_TIME))
+        self.core = None
+
+    async def start(self, rooms):
+        import Core as cr
+        import Inventory as inv
+
+        path = os.path.join(tempfile.mkdtemp(), 'scenario.db')
+        self.core = cr.Core(path, inventory=self.inventory or inv.DEFAULT_PATH, clock=self.clock)
+        for room in rooms.values():
+            await self.core.attach_room(room.room_id, _RoomSink(room))
+
+    async def call(self, method, data):
+        return await self.core.call(method, data)
+
+    async def send(self, room, message):
+        room.receive(await self.core.call('room', message))
+
+    async def run_until(self, deadline):
+        await self.clock.run_until(deadline)
+
+    async def settle(self, boundary):
+        # 虚拟时钟上 boundary 时刻到期的计费已在 run_until() 中处理，等其推送送达，与经过连接时的顺序相同
+        scheduler = self.core.airconSchedule.scheduler
+        while scheduler.send_tasks:
+            await asyncio.sleep(0)
+
+    async def act(self, boundary, sends):
+        for room, message in sends:
+            await self.send(room, message)
+
+    async def close(self):
+        await self.core.close()
+
+class RemoteServer:
+    """运行中的服务，每个房间一个 /ws/room 连接；服务端时钟需按 speed 加速"""
+    def __init__(self, url, speed):
+        self.url = url.rstrip('/')
+        self.clock = cl.ScaledClock(speed)
+        self.connections = {} # 路由 -> 连接
+        self.room_ws = {} # roomId -> 连接
+        self.readers = []
+        # 服务端的计费时刻由请求实际到达的时刻决定。按场景中的名义时刻记录各房间进入服务的时刻，
+        # 每分钟操作前等待名义上整分钟到期的计费推送送达，使处理顺序与进程内运行相同
+        self.serving = {} # roomId -> 进入服务的名义时刻，不在服务中的房间不出现
+        self.received_at = {} # roomId -> 最近一次答复或推送的时钟时刻
+        self.boundary = None # 正在执行的一分钟操作的名义时刻
+        self.snap_until = 0.0 # 该时刻前收到的进入服务推送由本分钟的操作引起
+
+    async def start(self, rooms):
+        from websockets.asyncio.client import connect # 只有连接运行中的服务时需要
+
+        self.connect = connect
+        for room in rooms.values():
+            ws = await connect(f'{self.url}/ws/room?roomId={room.room_id}')
+            self.room_ws[room.room_id] = ws
+            self.readers.append(asyncio.create_task(self._read(ws, room)))
+
+    def _nominal(self):
+        now = self.clock.time()
+        return self.boundary if self.boundary is not None and now <= self.snap_until else now
+
+    async def _read(self, ws, room):
+        async for message in ws:
+            message = json.loads(message)
+            self.received_at[room.room_id] = self.clock.time()
+            if message['state'] != 'on':
+                self.serving.pop(room.room_id, None)
+            elif room.room_id not in self.serving: # 开机成功、轮转或抢占后进入服务
+                self.serving[room.room_id] = self._nominal()
+            room.receive(message)
+
+    async def call(self, method, data):
+        if method not in self.connections:
+            self.connections[method] = await self.connect(f'{self.url}/ws/{method}')
+        ws = self.connections[method]
+        await ws.send(json.dumps(data or {}))
+        return json.loads(await ws.recv())
+
+    async def send(self, room, message):
+        if message['new_request'] == 1 and message['state'] == 'on' and room.room_id in self.serving:
+            self.serving[room.room_id] = self._nominal() # 改变风速等新请求重新开始计费
+        await self.room_ws[room.room_id].send(json.dumps(message)) # 答复由 _read 处理
+
+    async def run_until(self, deadline):
+        await self.clock.sleep(deadline - self.clock.time())
+
+    async def settle(self, boundary):
+        """等待 boundary 时刻到期的计费推送送达，最多等待 SETTLE_WINDOW"""
+        def due(roomId, served_at):
+            phase = (boundary - served_at) % MINUTE
+            return min(phase, MINUTE - phase) < PHASE_TOLERANCE and self.received_at[roomId] < boundary
+
+        while self.clock.time() < boundary + SETTLE_WINDOW and any(due(*item) for item in self.serving.items()):
+            await asyncio.sleep(0.0005)
+
+    async def act(self, boundary, sends):
+        """发送名义时刻为 boundary 的一分钟请求"""
+        self.boundary, self.snap_until = boundary, float('inf')
+        for room, message in sends:
+            await self.send(room, message)
+        self.snap_until = self.clock.time() + PHASE_TOLERANCE
+
+    async def close(self):
+        for ws in self.room_ws.values(): # 断开房间连接时服务端关闭其空调
+            await ws.close()
+        for reader in self.readers:
+            reader.cancel()
+        await asyncio.gather(*self.readers, return_exceptions=True)
+        for ws in self.connections.values():
+            await ws.close()
+
+class Scenario:
+    def __init__(self, spec, server):
+        self.spec = spec
+        self.server = server
+        self.rooms = {roomId: ScenarioRoom(roomId, float(room.get('init_temp', 25.0)), room.get('mode', 'cool'))
+                      for roomId, room in spec['rooms'].items()}
+        self.origin = None
+        self.ticking = None
+
+    async def _tick(self):
+        """按客户端的刷新频率推进各房间温度，并发送暂停 / 恢复请求"""
+        period = MINUTE / TICKS_PER_MINUTE
+        await self.server.clock.sleep(period / 2) # 与操作错开半个周期
+        while True:
+            for room in self.rooms.values():
+                for message in room.tick():
+                    await self.server.send(room, message)
+            await self.server.clock.sleep(period)
+
+    async def observe(self):
+        """当前的 (服务队列, 等待队列, {roomId: 账单})"""
+        schedule = await self.server.call('query_schedule', None)
+        info = await self.server.call('query_room_info', {'roomId': list(self.rooms)})
+        bills = {room['roomId']: round(room['bill'], 2) for room in info['rooms']}
+        return sorted(schedule['serving_queue']), sorted(schedule['waiting_queue']), bills
+
+    async def run(self):
+        """逐分钟执行操作并在分钟中点观察状态，返回 [(minute, serving, waiting, bills)]"""
+        await self.server.start(self.rooms)
+        results = []
+        checked_in = []
+        try:
+            for roomId in self.rooms: # 入住后服务端才为房间计费并记录详单
+                ret = await self.server.call('checkin', {'roomId': roomId, 'client_name': f'scenario-{roomId}',
+                                                          'client_id': f'scenario-{roomId}'})
+                if ret['status'] != 'OK':
+                    raise SystemExit(f'房间 {roomId} 入住失败，请确认房间空闲')
+                checked_in.append(roomId)
+            self.origin = self.server.clock.time()
+            self.ticking = asyncio.create_task(self._tick())
+            for step in self.spec['timeline']:
+                minute = step['minute']
+                boundary = self.origin + minute * MINUTE
+                await self.server.run_until(boundary)
+                await self.server.settle(boundary)
+                sends = []
+                for action in step.get('actions', []):
+                    room = self.rooms[action['room']]
+                    sends += [(room, message) for message in room.apply(action)]
+                await self.server.act(boundary, sends)
+                await self.server.run_until(self.origin + (minute + 0.5) * MINUTE)
+                results.append((minute, *await self.observe()))
+        finally:
+            if self.ticking:
+                self.ticking.cancel()
+            for roomId in checked_in: # 退房，运行中的服务可以重复执行场景
+                await self.server.call('checkout', {'roomId': roomId})
+            await self.server.close()
+        return results
+
+def compare(step, serving, waiting, bills):
+    """一分钟的期望与实际之间的差异描述，没有期望的项不比较"""
+    expect = step.get('expect', {})
+    diffs = []
+    if 'serving' in expect and sorted(expect['serving']) != serving:
+        diffs.append(f"服务队列 期望 {sorted(expect['serving'])} 实际 {serving}")
+    if 'waiting' in expect and sorted(expect['waiting']) != waiting:
+        diffs.append(f"等待队列 期望 {sorted(expect['waiting'])} 实际 {waiting}")
+    for roomId, bill in expect.get('bills', {}).items():
+        if abs(bills.get(roomId, 0.0) - bill) > BILL_TOLERANCE:
+            diffs.append(f'房间 {roomId} 账单 期望 {bill:.2f} 实际 {bills.get(roomId, 0.0):.2f}')
+    return diffs
+
+def report(spec, results, verbose=False):
+    """打印差异报告，返回是否全部一致"""
+    failed = 0
+    for step, (minute, serving, waiting, bills) in zip(spec['timeline'], results):
+        diffs = compare(step, serving, waiting, bills)
+        failed += bool(diffs)
+        if verbose or diffs:
+            status = '不一致' if diffs else 'OK'
+            print(f'第 {minute:>2} 分钟 {status}  服务 {serving} 等待 {waiting} 账单 {bills}')
+        for diff in diffs:
+            print(f'    {diff}')
+    print(f'{len(results) - failed}/{len(results)} 分钟与期望一致')
+    return failed == 0
+
+def record(spec, results):
+    """将观察到的状态写为各分钟的期望值"""
+    for step, (_, serving, waiting, bills) in zip(spec['timeline'], results):
+        step['expect'] = {'serving': serving, 'waiting': waiting, 'bills': bills}
+
+def dump(spec, file):
+    """写出场景文件：每个房间与每分钟的操作、期望各占一行"""
+    compact = lambda value: json.dumps(value, ensure_ascii=False)
+    rooms = ',\n'.join(f'    {compact(roomId)}: {compact(room)}' for roomId, room in spec['rooms'].items())
+    steps = []
+    for step in spec['timeline']:
+        lines = [f'    {{"minute": {step["minute"]}, "actions": {compact(step.get("actions", []))}']
+        if 'expect' in step:
+            lines.append(f'     "expect": {compact(step["expect"])}')
+        steps.append(',\n'.join(lines) + '}')
+    file.write(f'{{\n  "description": {compact(spec.get("description", ""))},\n'
+               f'  "rooms": {{\n{rooms}\n  }},\n  "timeline": [\n' + ',\n'.join(steps) + '\n  ]\n}\n')
+
+def main():
+    parser = argparse.ArgumentParser(description='按场景文件无界面地驱动房间客户端并核对调度结果')
+    parser.add_argument('scenario', help='场景文件（JSON）')
+    parser.add_argument('--url', help='运行中的服务，如 ws://localhost:10043；不给出时在进程内使用虚拟时钟运行')
+    parser.add_argument('--speed', type=float, default=10.0, help='服务端的时钟倍速（SOFTAIR_CLOCK_SPEED），仅用于 --url')
+    parser.add_argument('--inventory', help='进程内运行时的房间清单，默认为 Server/rooms.csv')
+    parser.add_argument('--record', action='store_true', help='将本次结果写回场景文件作为期望值')
+    parser.add_argument('-v', '--verbose', action='store_true', help='打印每分钟的观察结果')
+    args = parser.parse_args()
+
+    with open(args.scenario, encoding='utf-8') as file:
+        spec = json.load(file)
+    server = RemoteServer(args.url, args.speed) if args.url else LocalServer(args.inventory)
+    results = asyncio.run(Scenario(spec, server).run())
+    if args.record:
+        record(spec, results)
+        with open(args.scenario, 'w', encoding='utf-8') as file:
+            dump(spec, file)
+        print(f'已将 {len(results)} 分钟的结果写入 {args.scenario}')
+        return
+    sys.exit(0 if report(spec, results, args.verbose) else 1)
+
+if __name__ == '__main__':
+    main()
@@ -121,9 +121,11 @@ document.addEventListener('DOMContentLoaded', () => {
         
         setLoading(true);
         
+        // format: 'json' 返回由小时/日汇总表计算的各房间营收，不再逐条扫描营收明细
         const requestData = {
             start_time: formatDateTimeForWS(startDate),
-            end_time: formatDateTimeForWS(endDate)
+            end_time: formatDateTimeForWS(endDate),
+            format: 'json'
         };
         
         console.log('发送报表请求:', requestData);
@@ -134,13 +136,18 @@ document.addEventListener('DOMContentLoaded', () => {
     function handleReportData(data) {
         setLoading(false);
         
-        if (!data || !data.content) {
+        if (!data || !Array.isArray(data.rooms)) {
             showModal('接收到的报表数据无效或为空。');
             return;
         }
         
-        currentReportData = data;
-        displayReport(data.content);
+        // 每个房间一行，末尾为合计；表格显示与CSV导出共用这份数据
+        const rows = data.rooms.map(room => ({ '房间号': room.roomId, '营收（元）': room.earning }));
+        if (rows.length > 0) {
+            rows.push({ '房间号': '合计', '营收（元）': data.total });
+        }
+        currentReportData = { content: rows };
+        displayReport(rows);
         
         // 启用导出和打印按钮
         exportReportButton.disabled = false;
@@ -274,7 +281,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 }
             }
             
-            if (Array.isArray(reportData)) {
+            if (Array.isArray(reportData) && reportData.length > 0) {
                 // 创建表头
                 const headers = Object.keys(reportData[0]);
                 csvContent += headers.join(',') + '\n';
@@ -1,10 +1,7 @@
-import sqlite3
-import datetime
-import threading
-import time
 import json
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import heapq
+import itertools
 
 class ScheduleRoom:
     def __init__(self, ID, state, fan_speed, mode, set_temp, now_temp, running_time=0, billing_time=0, waiting_time=0):
@@ -17,262 +14,276 @@ class ScheduleRoom:
         self.mode = mode # 'cool' or 'heat'
         self.set_temp = set_temp
         self.now_temp = now_temp
+        self.serve_start = 0.0 # 进入服务队列的时刻
+        self.wait_deadline = 0.0 # 等待时间片到期的时刻
+        self.epoch = 0 # 每次进出队列时递增，使事件堆与优先队列中该房间的旧条目失效
+
+class RoomHeap:
+    """房间优先队列（最小堆），惰性删除：条目记录入堆时房间的 epoch，房间离开队列后条目自动作废"""
+    def __init__(self, key):
+        self.key = key
+        self.heap = []
+        self.seq = itertools.count()
+        self.compact_at = 64
+
+    def push(self, room):
+        heapq.heappush(self.heap, (self.key(room), next(self.seq), room, room.epoch))
+        if len(self.heap) > self.compact_at:
+            # 作废条目过多时整体重建，均摊 O(1)
+            self.heap = [entry for entry in self.heap if entry[2].epoch == entry[3]]
+            heapq.heapify(self.heap)
+            self.compact_at = max(64, 2 * len(self.heap))
+
+    def peek(self):
+        """返回堆顶的有效房间，队列为空时返回 None"""
+        while self.heap and self.heap[0][2].epoch != self.heap[0][3]:
+            heapq.heappop(self.heap)
+        return self.heap[0][2] if self.heap else None
 
 class Scheduler:
-    def __init__(self, room_ws):
-        self.room_ws = room_ws
-
-        self.serving_queue = []
-        self.waiting_queue = []
+    BILL_EVENT = 0
+    WAIT_EVENT = 1
 
-        self.MAX_SERVING = 3  # 最大同时服务的房间数
+    def __init__(self, room_ws, rooms, ledger, clock, max_serving=3):
+        self.room_ws = room_ws
+        self.rooms = rooms
+        self.ledger = ledger
+        self.clock = clock # 调度、计费与时间戳的时间来源（见 Clock.py）
+
+        # roomId -> ScheduleRoom，按加入顺序排列，同时作为房间索引
+        self.serving_queue = {}
+        self.waiting_queue = {}
+        # 抢占对象：风速最低、其次服务时间最长（serve_start 最早）
+        self.preempt_heap = RoomHeap(lambda room: (room.fan_speed, room.serve_start))
+        # 时间片轮转对象：服务时间最长
+        self.longest_heap = RoomHeap(lambda room: room.serve_start)
+        # 等待队列中剩余等待时长最小的房间
+        self.waiting_heap = RoomHeap(lambda room: room.wait_deadline)
+
+        self.MAX_SERVING = max_serving  # 最大同时服务的房间数
+        # 以时钟秒计；使用 ScaledClock / VirtualClock 时按时钟加速
         self.CIRCULATION_INTERVAL = 19.8  # 时间片间隔（模拟2min）
+        self.BILLING_INTERVAL = 9.6  # 计费间隔（模拟1min）
 
         self.low_per_minute = 2.0  # 每分钟的低速费用（6倍率）
         self.medium_per_minute = 3.0  # 每分钟的中速费用（6倍率）
         self.high_per_minute = 6.0  # 每分钟的高速费用（6倍率）
 
-        self.database = None
-        self.cursor = None
-
-        self.this_thread_database = sqlite3.connect('database.db')
-        self.this_thread_cursor = self.this_thread_database.cursor()
-
-        # 创建一个线程池用于处理异步任务
-        self.executor = ThreadPoolExecutor(max_workers=5)
-        # 创建一个事件循环用于发送消息
-        self.loop = asyncio.new_event_loop()
-        self.message_thread = threading.Thread(target=self._run_event_loop, daemon=True)
-        self.message_thread.start()
-
-    def _run_event_loop(self):
-        """在单独的线程中运行事件循环"""
-        asyncio.set_event_loop(self.loop)
-        self.loop.run_forever()
+        # 事件最小堆：(到期时刻, 序号, 事件类型, 房间, epoch)，调度任务只在最近的到期时刻醒来
+        self.events = []
+        self.event_seq = itertools.count()
+        # 调度任务与请求处理运行在同一个事件循环中，队列无需加锁；请求通过 wakeup 提前唤醒调度任务
+        self.wakeup = clock.event()
+        self.on_change = None # 队列、房间状态或账单变化时的回调
+        self.send_tasks = set() # 尚未完成的推送，保留引用防止被回收
+
+    def _push_event(self, deadline, kind, room):
+        heapq.heappush(self.events, (deadline, next(self.event_seq), kind, room, room.epoch))
+
+    def _start_serving(self, room, now):
+        """房间进入服务状态，并登记第一个计费截止时刻"""
+        room.epoch += 1
+        room.state = 'running'
+        room.serve_start = now
+        room.running_time = 0
+        room.billing_time = 0
+        self.serving_queue[room.ID] = room
+        self.preempt_heap.push(room)
+        self.longest_heap.push(room)
+        self._push_event(now + self.BILLING_INTERVAL, self.BILL_EVENT, room)
+
+    def _start_waiting(self, room, now):
+        """房间进入等待状态，并登记时间片到期时刻"""
+        room.epoch += 1
+        room.state = 'waiting'
+        room.waiting_time = self.CIRCULATION_INTERVAL
+        room.wait_deadline = now + self.CIRCULATION_INTERVAL
+        self.waiting_queue[room.ID] = room
+        self.waiting_heap.push(room)
+        self._push_event(room.wait_deadline, self.WAIT_EVENT, room)
+
+    def _find_room(self, roomId):
+        return self.serving_queue.get(roomId) or self.waiting_queue.get(roomId)
+
+    def _remove_room(self, roomId):
+        """将房间移出所在队列，其未到期的事件与堆中条目随之作废"""
+        room = self.serving_queue.pop(roomId, None) or self.waiting_queue.pop(roomId, None)
+        if room:
+            room.epoch += 1
+            room.state = 'off'
+        return room
+
+    def _changed(self):
+        if self.on_change:
+            self.on_change()
 
     def add_bill(self, roomId, bill):
-        self.cursor.execute('''INSERT INTO EARNING (roomId, op_time, money) VALUES (?, ?, ?)''',
-                            (roomId, datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), bill))
-        bill += self.search_bill(roomId)  # 累加当前账单
-        self.cursor.execute('''UPDATE ROOM SET bill = ? WHERE roomId = ?''', (bill, roomId))
-        self.database.commit()
+        # 按房间的费率倍数计费；写入账本缓存，由账本线程批量提交 EARNING 与 ROOM 账单
+        self.ledger.add_earning(roomId, self.clock.time(), bill * self.rooms.tariff(roomId))
 
     def update_request(self, roomId, set_temp, now_temp, mode):
-        for room in self.serving_queue:
-            if room.ID == roomId:
-                room.set_temp = set_temp
-                room.now_temp = now_temp
-                room.mode = mode
-        for room in self.waiting_queue:
-            if room.ID == roomId:
-                room.set_temp = set_temp
-                room.now_temp = now_temp
-                room.mode = mode
+        room = self._find_room(roomId)
+        if room:
+            room.set_temp = set_temp
+            room.now_temp = now_temp
+            room.mode = mode
+        self._changed()
 
     def request_off(self, roomId):
-        for room in self.serving_queue:
-            if room.ID == roomId:
-                self.serving_queue.remove(room)
-        for room in self.waiting_queue:
-            if room.ID == roomId:
-                self.waiting_queue.remove(room)
+        self._remove_room(roomId)
+        self.wakeup.set()  # 空出的服务位由调度任务立即补上
+        self._changed()
 
     def request_on(self, roomId, speed, set_temp, now_temp, mode):
+        served = self._request_on(roomId, speed, set_temp, now_temp, mode)
+        self.wakeup.set()
+        self._changed()
+        return served
+
+    def _request_on(self, roomId, speed, set_temp, now_temp, mode):
+        now = self.clock.time()
         # 首先检查是否已经在其中，在其中需要当作一次新的请求（移除后再考虑）
-        for room in self.serving_queue:
-            if room.ID == roomId:
-                self.serving_queue.remove(room)
-        for room in self.waiting_queue:
-            if room.ID == roomId:
-                self.waiting_queue.remove(room)
+        self._remove_room(roomId)
 
         # 创建新的房间请求
         new_room = ScheduleRoom(roomId, 'running', speed, mode, set_temp, now_temp)
 
         # 如果服务队列未满，直接加入服务队列
         if len(self.serving_queue) < self.MAX_SERVING:
-            self.serving_queue.append(new_room)
+            self._start_serving(new_room, now)
             return True
 
-        # 如果服务队列已满，尝试优先级调度
-        replace_rooms = []
-        # 先查找风速比新请求低的房间
-        for i, room in enumerate(self.serving_queue):
-            if room.fan_speed < speed:
-                replace_rooms.append((i, room))
-
-        if len(replace_rooms) == 0:
-            can_wait = False
-            for i, room in enumerate(self.serving_queue):
-                if room.fan_speed == speed:
-                    can_wait = True
-                    break
-
-            if can_wait:
-                new_room.state = 'waiting'
-                new_room.waiting_time = self.CIRCULATION_INTERVAL
-                self.waiting_queue.append(new_room)
-                return False
-            else:
-                return False
-        elif len(replace_rooms) == 1:
-            # 只有一个可抢占的房间，直接替换
-            index, longest_serving = replace_rooms[0]
-            longest_serving.state = 'waiting'
-            longest_serving.waiting_time = self.CIRCULATION_INTERVAL
-            self.waiting_queue.append(longest_serving) # 被抢占的房间进入等待队列
-            self.serving_queue[index] = new_room
-            self.this_thread_cursor.execute('''SELECT bill FROM ROOM WHERE roomId = ?''', (longest_serving.ID,))
-            bill = self.this_thread_cursor.fetchone()
-            bill = bill[0] if bill else 0.0
-            self.send_state_message(longest_serving.ID, "off", bill)
-            return True
-        else: # 取风速最小的房间进行替换，如果多个风速最小，再取运行时间最长的
-            # 找出风速最小的房间
-            min_speed = min(room.fan_speed for _, room in replace_rooms)
-            min_speed_rooms = [room for room in replace_rooms if room[1].fan_speed == min_speed]
-            # 找出运行时间最长的房间
-            longest_serving = max(min_speed_rooms, key=lambda x: x[1].running_time)
-            index, longest_serving = longest_serving
-            longest_serving.state = 'waiting'
-            longest_serving.waiting_time = self.CIRCULATION_INTERVAL
-            self.waiting_queue.append(longest_serving)  # 被抢占的房间进入等待队列
-            self.serving_queue[index] = new_room
-            self.this_thread_cursor.execute('''SELECT bill FROM ROOM WHERE roomId = ?''', (longest_serving.ID,))
-            bill = self.this_thread_cursor.fetchone()
-            bill = bill[0] if bill else 0.0
-            self.send_state_message(longest_serving.ID, "off", bill)
-            return True
+        # 如果服务队列已满，尝试优先级调度：候选为风速最小的房间，如果多个风速最小，取运行时间最长的
+        victim = self.preempt_heap.peek()
+        if victim is None:
+            return False
+        if victim.fan_speed >= speed:
+            # 没有风速更低的房间；存在同风速的房间时进入等待队列
+            if victim.fan_speed == speed:
+                self._start_waiting(new_room, now)
+            return False
+        del self.serving_queue[victim.ID]
+        self._start_waiting(victim, now) # 被抢占的房间进入等待队列
+        self._start_serving(new_room, now)
+        self.send_state_message(victim.ID, "off", self.search_bill(victim.ID), now)
+        return True
 
     def search_bill(self, roomId):
         """查询指定房间的账单"""
-        self.cursor.execute('''SELECT bill FROM ROOM WHERE roomId = ?''', (roomId,))
-        bill = self.cursor.fetchone()
-        return bill[0] if bill else 0.0
+        return self.rooms.bill(roomId)
 
-    async def _send_ws_message(self, ws, message):
+    async def _send_ws_message(self, roomId, ws, message):
         """异步发送WebSocket消息"""
-        await ws.send(message)
+        try:
+            await ws.send(message)
+        except Exception as e:
+            print(f"Error sending message to room {roomId}: {e}")
 
-    def send_state_message(self, roomId, state, bill):
-        """发送状态消息到客户端"""
+    def send_state_message(self, roomId, state, bill, due):
+        """发送状态消息到客户端，ts 为该推送应发出的时钟时刻（计费推送为计费截止时刻）"""
         if roomId in self.room_ws:
-            try:
-                message = json.dumps({
-                    "state": state,
-                    "bill": bill
-                })
-                # 将异步任务提交到事件循环中执行
-                asyncio.run_coroutine_threadsafe(
-                    self._send_ws_message(self.room_ws[roomId], message),
-                    self.loop
-                )
-            except Exception as e:
-                print(f"Error sending message to room {roomId}: {e}")
-
-    def run(self):
-        self.database = sqlite3.connect('database.db')
-        self.cursor = self.database.cursor()
-
-        last_time = time.time()
-        last_bill_time = time.time()
-
+            message = json.dumps({
+                "state": state,
+                "bill": bill,
+                "ts": due
+            })
+            # 连接与调度任务属于同一个事件循环，直接创建发送任务
+            task = asyncio.get_running_loop().create_task(self._send_ws_message(roomId, self.room_ws[roomId], message))
+            self.send_tasks.add(task)
+            task.add_done_callback(self.send_tasks.discard)
+
+    async def run(self):
         while True:
-            current_time = time.time()
-            time_delta = current_time - last_time
-
-            # 更新所有服务中房间的运行时间
-            for room in self.serving_queue:
-                room.running_time += time_delta
-                room.billing_time += time_delta
-
-            # 每0.2秒处理一次计费
-            if current_time - last_bill_time >= 0.2:
-                for room in self.serving_queue:
-                    if room.billing_time > 9.6:
-                        room.billing_time -= 9.6
-                        if room.fan_speed == 0:
-                            self.add_bill(room.ID, self.low_per_minute / 6)
-                        elif room.fan_speed == 1:
-                            self.add_bill(room.ID, self.medium_per_minute / 6)
-                        elif room.fan_speed == 2:
-                            self.add_bill(room.ID, self.high_per_minute / 6)
-                        self.send_state_message(room.ID, "on", self.search_bill(room.ID))
-                last_bill_time = current_time
-
-            self.time_slice_scheduling(time_delta)
-
-            last_time = current_time
-            time.sleep(0.1)  # 避免CPU使用率过高
-
-    def time_slice_scheduling(self, time_delta):
-        """执行时间片调度"""
-        if not self.waiting_queue:
-            return
-
-        if len(self.serving_queue) < self.MAX_SERVING:
-            # 如果服务队列未满，直接将等待队列中等待服务时长最小的对象加入
-            min_remain_waiting = min(self.waiting_queue, key=lambda r: r.waiting_time, default=None)
-            if min_remain_waiting:
-                min_remain_waiting.state = 'running'
-                min_remain_waiting.running_time = 0
-                min_remain_waiting.billing_time = 0
-                self.serving_queue.append(min_remain_waiting)
-                self.waiting_queue.remove(min_remain_waiting)
-                self.send_state_message(min_remain_waiting.ID, "on", self.search_bill(min_remain_waiting.ID))
-
-        # 检查是否有等待队列中的房间可以进入服务队列
-        for room in self.waiting_queue:
-            room.waiting_time -= time_delta
-            if room.waiting_time <= 0:
-                # 等待时间到，尝试将其加入服务队列。服务队列中服务时长最大的服务对象释放，该房间被放置于等待队列
-                max_serving = max(self.serving_queue, key=lambda r: r.running_time, default=None)
-                if max_serving:
-                    max_serving.state = 'waiting'
-                    max_serving.waiting_time = self.CIRCULATION_INTERVAL
-                    self.waiting_queue.append(max_serving)
-                    self.serving_queue.remove(max_serving)
-                    self.send_state_message(max_serving.ID, "off", self.search_bill(max_serving.ID))
-                    room.running_time = 0
-                    room.billing_time = 0
-                    room.state = 'running'
-                    self.serving_queue.append(room)
-                    self.waiting_queue.remove(room)
-                    self.send_state_message(room.ID, "on", self.search_bill(room.ID))
+            now = self.clock.time()
+            handled = self.handle_due_events(now)
+            handled += self.time_slice_scheduling(now)
+            if handled:
+                self._changed()
+
+            # 睡眠到最近的截止时刻；没有事件时无限期睡眠，直到 request_on / request_off 唤醒
+            timeout = max(self.events[0][0] - self.clock.time(), 0) if self.events else None
+            self.wakeup.clear()
+            await self.clock.wait(self.wakeup, timeout)
+
+    def handle_due_events(self, now):
+        """处理所有已到期的计费与等待事件，开销只与到期事件数相关。返回处理的有效事件数"""
+        handled = 0
+        while self.events and self.events[0][0] <= now:
+            deadline, _, kind, room, epoch = heapq.heappop(self.events)
+            if room.epoch != epoch:
+                continue # 房间已离开对应队列，事件作废
+            handled += 1
+            if kind == self.BILL_EVENT:
+                room.running_time = deadline - room.serve_start
+                if room.fan_speed == 0:
+                    self.add_bill(room.ID, self.low_per_minute / 6)
+                elif room.fan_speed == 1:
+                    self.add_bill(room.ID, self.medium_per_minute / 6)
+                elif room.fan_speed == 2:
+                    self.add_bill(room.ID, self.high_per_minute / 6)
+                self.send_state_message(room.ID, "on", self.search_bill(room.ID), deadline)
+                # 下一次计费严格落在整数个计费间隔处，不随唤醒延迟漂移
+                self._push_event(deadline + self.BILLING_INTERVAL, self.BILL_EVENT, room)
+            else:
+                self.rotate_waiting_room(room, now)
+        return handled
+
+    def rotate_waiting_room(self, room, now):
+        """等待时间到，将其加入服务队列。服务队列已满时，服务时长最大的服务对象释放，该房间被放置于等待队列"""
+        del self.waiting_queue[room.ID]
+        # 同一轮中先处理到期事件再补空位，此时可能已有空出的服务位，直接服务而不释放其他房间
+        max_serving = self.longest_heap.peek() if len(self.serving_queue) >= self.MAX_SERVING else None
+        if max_serving:
+            del self.serving_queue[max_serving.ID]
+            self._start_waiting(max_serving, now)
+            self.send_state_message(max_serving.ID, "off", self.search_bill(max_serving.ID), now)
+        self._start_serving(room, now)
+        self.send_state_message(room.ID, "on", self.search_bill(room.ID), now)
+
+    def time_slice_scheduling(self, now):
+        """服务队列未满时，依次将等待队列中剩余等待时长最小的对象加入。返回加入的房间数"""
+        moved = 0
+        while self.waiting_queue and len(self.serving_queue) < self.MAX_SERVING:
+            moved += 1
+            min_remain_waiting = self.waiting_heap.peek()
+            del self.waiting_queue[min_remain_waiting.ID]
+            self._start_serving(min_remain_waiting, now)
+            self.send_state_message(min_remain_waiting.ID, "on", self.search_bill(min_remain_waiting.ID), now)
+        return moved
+
+    def snapshot(self):
+        """一次性读取调度状态：(服务队列, 等待队列, {roomId: findRoomInfo 格式的房间信息})"""
+        fanSpeed = {0: 'low', 1: 'medium', 2: 'high'}
+        rooms = {room.ID: (room.state, fanSpeed[room.fan_speed], room.mode, room.now_temp, room.set_temp)
+                 for queue in (self.serving_queue, self.waiting_queue) for room in queue.values()}
+        return list(self.serving_queue), list(self.waiting_queue), rooms
 
     def findRoomInfo(self, roomId):
         fanSpeed = {0: 'low', 1: 'medium', 2: 'high'}
-        for room in self.serving_queue:
-            if room.ID == roomId:
-                return room.state, fanSpeed[room.fan_speed], room.mode, room.now_temp, room.set_temp
-        for room in self.waiting_queue:
-            if room.ID == roomId:
-                return room.state, fanSpeed[room.fan_speed], room.mode, room.now_temp, room.set_temp
+        room = self._find_room(roomId)
+        if room:
+            return room.state, fanSpeed[room.fan_speed], room.mode, room.now_temp, room.set_temp
         return 'off', 'off', 'off', '--', '--'
 
 class AirconSchedule:
-    def __init__(self, room_ws):
-        self.database = sqlite3.connect('database.db')
-        self.cursor = self.database.cursor()
-        self.cursor.execute('''CREATE TABLE IF NOT EXISTS USELIST(
-                roomId TEXT,
-                userId TEXT,
-                op_time TEXT,
-                operation TEXT,
-                set_temp REAL,
-                now_temp REAL,
-                fan_speed INTEGER,
-                mode TEXT,
-                total_bill REAL DEFAULT 0.0
-            )
-        ''')
-        self.database.commit()
-
-        self.scheduler = Scheduler(room_ws)
-        self.scheduler_thread = threading.Thread(target=self.scheduler.run) # 单开一个线程执行scheduler.run()
-        self.scheduler_thread.start()
-
-    def request(self, data):
+    def __init__(self, room_ws, rooms, ledger, telemetry, clock, max_serving=3):
+        self.rooms = rooms
+        self.ledger = ledger
+        self.telemetry = telemetry
+        self.clock = clock
+
+        self.scheduler = Scheduler(room_ws, rooms, ledger, clock, max_serving)
+        # 调度器作为当前事件循环（Sanic worker 或核心进程）中的任务运行
+        self.scheduler_task = asyncio.get_running_loop().create_task(self.scheduler.run())
+
+    async def close(self):
+        self.scheduler_task.cancel()
+        try:
+            await self.scheduler_task
+        except asyncio.CancelledError:
+            pass
+
+    async def request(self, data):
         roomId = data['roomId']
         state = data['state']
         speed = data['speed']
@@ -283,73 +294,41 @@ class AirconSchedule:
 
         if new_request == 1:
             if state == 'on' and self.scheduler.request_on(roomId, speed, set_temp, now_temp, mode):
-                self.cursor.execute('''SELECT client_id FROM ROOM WHERE roomId = ?''', (roomId,))
-                client_id = self.cursor.fetchone()
+                client_id = self.rooms.client_id(roomId)
                 ret_bill = 0.0
                 if client_id:
-                    client_id = client_id[0]
-                    op_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    self.cursor.execute('''SELECT bill FROM ROOM WHERE roomId = ?''', (roomId,))
-                    bill = self.cursor.fetchone()
-                    self.cursor.execute('''
-                        INSERT INTO USELIST (roomId, userId, op_time, operation, set_temp, now_temp, fan_speed, mode, total_bill)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (roomId, client_id, op_time, state, set_temp, now_temp, speed, mode, bill[0] if bill else 0.0))
-                    self.database.commit()
-                    ret_bill = bill[0] if bill else 0.0
+                    op_ts = self.clock.time()
+                    ret_bill = self.rooms.bill(roomId)
+                    self.ledger.add_uselist(roomId, client_id, op_ts, state, set_temp, now_temp, speed, mode, ret_bill)
                 return {'state': state, 'bill': ret_bill}
             else: # 'off' / 'pause' / 'on' but request failed
                 if state == 'off' or state == 'pause':
                     self.scheduler.request_off(roomId)
-                self.cursor.execute('''SELECT client_id FROM ROOM WHERE roomId = ?''', (roomId,))
-                client_id = self.cursor.fetchone()
+                client_id = self.rooms.client_id(roomId)
                 ret_bill = 0.0
                 if client_id:
-                    client_id = client_id[0]
-                    op_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    self.cursor.execute('''SELECT bill FROM ROOM WHERE roomId = ?''', (roomId,))
-                    bill = self.cursor.fetchone()
-                    self.cursor.execute('''
-                        INSERT INTO USELIST (roomId, userId, op_time, operation, set_temp, now_temp, fan_speed, mode, total_bill)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (roomId, client_id, op_time, 'off', set_temp, now_temp, speed, mode, bill[0] if bill else 0.0))
-                    self.database.commit()
-                    ret_bill = bill[0] if bill else 0.0
+                    op_ts = self.clock.time()
+                    ret_bill = self.rooms.bill(roomId)
+                    self.ledger.add_uselist(roomId, client_id, op_ts, 'off', set_temp, now_temp, speed, mode, ret_bill)
                 return {'state': 'off' if state != 'pause' else 'pause', 'bill': ret_bill}
 
-        else:
+        else: # 温度上报与设定温度调整只记入遥测，详单只记录状态变化
             self.scheduler.update_request(roomId, set_temp, now_temp, mode)
-            self.cursor.execute('''SELECT client_id FROM ROOM WHERE roomId = ?''', (roomId,))
-            client_id = self.cursor.fetchone()
-            ret_bill = 0.0
-            if client_id:
-                client_id = client_id[0]
-                op_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                self.cursor.execute('''SELECT bill FROM ROOM WHERE roomId = ?''', (roomId,))
-                bill = self.cursor.fetchone()
-                self.cursor.execute('''
-                    INSERT INTO USELIST (roomId, userId, op_time, operation, set_temp, now_temp, fan_speed, mode, total_bill)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (roomId, client_id, op_time, state, set_temp, now_temp, speed, mode, bill[0] if bill else 0.0))
-                self.database.commit()
-                ret_bill = bill[0] if bill else 0.0
+            self.telemetry.record(roomId, self.clock.time(), now_temp, set_temp)
+            ret_bill = self.rooms.bill(roomId) if self.rooms.client_id(roomId) else 0.0
             return {'state': state, 'bill': ret_bill}
 
     def querySchedule(self):
-        serving_queue = []
-        waiting_queue = [] # str
-        for room in self.scheduler.serving_queue:
-            serving_queue.append(room.ID)
-        for room in self.scheduler.waiting_queue:
-            waiting_queue.append(room.ID)
+        serving_queue = list(self.scheduler.serving_queue)
+        waiting_queue = list(self.scheduler.waiting_queue)
         return {"serving_queue": serving_queue, "waiting_queue": waiting_queue}
 
-    def queryRoomInfo(self, data):
+    async def queryRoomInfo(self, data):
         roomId = data['roomId']
+        if isinstance(roomId, list) or roomId == 'all': # 批量查询
+            return await self.queryRoomsInfo(roomId)
         status, speed, mode, now_temp, set_temp = self.scheduler.findRoomInfo(roomId)
-        self.cursor.execute('''SELECT bill FROM ROOM WHERE roomId = ?''', (roomId,))
-        bill = self.cursor.fetchone()
-        bill = bill[0] if bill else 0.0
+        bill = self.rooms.bill(roomId)
         return {
             'roomId': roomId,
             'status': status,
@@ -359,3 +338,25 @@ class AirconSchedule:
             'set_temp': set_temp,
             'bill': bill
         }
+
+    async def queryRoomsInfo(self, roomIds):
+        """批量查询房间信息：一次遍历调度状态加一次账单查询。roomIds 为房间号列表或 'all'"""
+        _, _, schedule = self.scheduler.snapshot()
+        if roomIds == 'all':
+            bills = {roomId: bill for roomId, _, bill in self.rooms.states()}
+            roomIds = list(bills)
+        else:
+            bills = self.rooms.bills(roomIds)
+        rooms = []
+        for roomId in roomIds:
+            status, speed, mode, now_temp, set_temp = schedule.get(roomId, ('off', 'off', 'off', '--', '--'))
+            rooms.append({
+                'roomId': roomId,
+                'status': status,
+                'speed': speed,
+                'mode': mode,
+                'now_temp': now_temp,
+                'set_temp': set_temp,
+                'bill': bills.get(roomId, 0.0)
+            })
+        return {'rooms': rooms}
@@ -0,0 +1,161 @@
+# 历史归档：超出保留期的 USELIST / EARNING 记录按天从数据库移出，按月追加到压缩的 CSV 文件中。
+# 每天追加一个独立的 gzip 成员，读取时 gzip 会依次读出全部成员。按时间范围查询时只打开涉及的月份文件，逐行读取。
+# 每个月份文件旁有一个清单（.days），记录每天的成员在文件中的起始位置：归档文件在删除数据库记录的事务提交前写入，
+# 提交失败后下次重新归档同一天时，先截去这一天之前写入的成员，归档中不会出现重复记录
+import os
+import csv
+import gzip
+import time
+import asyncio
+
+ARCHIVE_SUFFIX = '.csv.gz'
+DAYS_SUFFIX = '.days'
+
+def _month(op_ts):
+    return time.strftime('%Y%m', time.localtime(op_ts))
+
+def _day(op_ts):
+    return time.strftime('%Y%m%d', time.localtime(op_ts))
+
+def _number(value, type=float):
+    return type(value) if value != '' else None
+
+def _parse_uselist(record):
+    roomId, userId, op_time, operation, set_temp, now_temp, fan_speed, mode, total_bill = record
+    return (roomId, userId, op_time, operation, _number(set_temp), _number(now_temp), _number(fan_speed, int),
+            mode, _number(total_bill))
+
+def _parse_earning(record):
+    roomId, op_time, money = record
+    return roomId, op_time, _number(money)
+
+PARSERS = {'USELIST': _parse_uselist, 'EARNING': _parse_earning}
+
+class Archive:
+    """归档文件只由存储的写线程追加"""
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, table, month, suffix=ARCHIVE_SUFFIX):
+        return os.path.join(self.directory, f'{table.lower()}-{month}{suffix}')
+
+    def _days(self, table, month):
+        """月份文件的清单 {日期 YYYYMMDD: 该天的成员在文件中的起始位置}"""
+        try:
+            with open(self._path(table, month, DAYS_SUFFIX)) as file:
+                return {day: int(offset) for day, offset in (line.split() for line in file)}
+        except FileNotFoundError:
+            return {}
+
+    def _write_days(self, table, month, days):
+        path = self._path(table, month, DAYS_SUFFIX)
+        with open(path + '.tmp', 'w') as file:
+            file.writelines(f'{day} {offset}\n' for day, offset in sorted(days.items()))
+        os.replace(path + '.tmp', path)
+
+    def append(self, table, day, rows):
+        """追加 day（本地日期 YYYYMMDD）一天的 rows（第一列为 op_ts，其余与查询结果的列相同）。
+        这一天已经追加过时先截去之前写入的内容再重新写入，同一天重复归档的结果与只归档一次相同"""
+        if not rows:
+            return
+        month = day[:6]
+        path = self._path(table, month)
+        days = self._days(table, month)
+        if day in days: # 上次归档这一天后事务未能提交；按时间顺序归档，它之后不会有其他天的内容
+            offset = days[day]
+            with open(path, 'ab') as file:
+                file.truncate(offset)
+            days = {other: start for other, start in days.items() if start < offset}
+        # 先登记起始位置再写入成员：写入中途失败时，重新归档仍会截到这个位置
+        days[day] = os.path.getsize(path) if os.path.exists(path) else 0
+        self._write_days(table, month, days)
+        with gzip.open(path, 'at', newline='') as file:
+            csv.writer(file).writerows(rows)
+
+    def last_day(self, table):
+        """table 已归档的最后一天（YYYYMMDD），没有归档时为空字符串。没有清单的旧月份文件按整月计"""
+        prefix = table.lower() + '-'
+        months = [name[len(prefix):-len(ARCHIVE_SUFFIX)] for name in os.listdir(self.directory)
+                  if name.startswith(prefix) and name.endswith(ARCHIVE_SUFFIX)]
+        if not months:
+            return ''
+        month = max(months)
+        return max(self._days(table, month), default=month + '31')
+
+    def rows(self, table, begin=None, end=None):
+        """逐行生成 table 在 [begin, end] 内的归档记录 (op_ts, [原始字段...])，按时间顺序。
+        文件末尾正在追加的 gzip 成员可能不完整，读到不完整处即停止，这部分记录在提交前仍在数据库中"""
+        prefix = table.lower() + '-'
+        first = _month(begin) if begin is not None else ''
+        last = _month(end) if end is not None else '999999'
+        names = sorted(name for name in os.listdir(self.directory) if name.startswith(prefix)
+                       and name.endswith(ARCHIVE_SUFFIX) and first <= name[len(prefix):len(prefix) + 6] <= last)
+        for name in names:
+            with gzip.open(os.path.join(self.directory, name), 'rt', newline='') as file:
+                try:
+                    for line in file:
+                        if not line.endswith('\n'):
+                            break
+                        record = next(csv.reader([line]))
+                        op_ts = int(record[0])
+                        if end is not None and op_ts > end:
+                            return
+                        if begin is None or op_ts >= begin:
+                            yield op_ts, record[1:]
+                except EOFError:
+                    pass
+
+    def records(self, table, begin=None, end=None):
+        """逐条生成归档记录，格式与数据库查询结果相同"""
+        parse = PARSERS[table]
+        for _, record in self.rows(table, begin, end):
+            yield parse(record)
+
+    def uselist(self, roomId, usrId=None, begin=None, end=None):
+        """归档中的详单，格式与 USELIST 查询结果相同"""
+        return [_parse_uselist(record) for _, record in self.rows('USELIST', begin, end)
+                if record[0] == roomId and (usrId is None or record[1] == usrId)]
+
+    def earning(self, begin=None, end=None):
+        return list(self.records('EARNING', begin, end))
+
+class Retention:
+    """定期将超出保留期（retention_days 天）的记录归档，数据库只保留近期数据，大小与 VACUUM 耗时不随历史增长"""
+    def __init__(self, storage, retention_days, interval=3600):
+        self.storage = storage
+        self.retention_days = retention_days
+        self.interval = interval
+        self.lock = asyncio.Lock() # 归档期间记录在数据库与归档之间移动，批量导出持有该锁以读到完整的历史
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def archive(self, now=None):
+        """归档截止时刻之前的记录，每天一个写事务，返回归档的行数"""
+        now = time.time() if now is None else now
+        # 截止时刻对齐到本地日界，保证每天的记录整体归档
+        day = time.localtime(now - self.retention_days * 86400)
+        cutoff = int(time.mktime((day.tm_year, day.tm_mon, day.tm_mday, 0, 0, 0, 0, 0, -1)))
+        total = 0
+        async with self.lock:
+            while True:
+                count = await asyncio.wrap_future(self.storage.write(self.storage.archive_day, cutoff))
+                if not count:
+                    return total
+                total += count
+
+    async def _run(self):
+        while True:
+            try:
+                count = await self.archive()
+                if count:
+                    print(f"Archived {count} history records")
+            except Exception as e:
+                print(f"Error archiving history: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def close(self):
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
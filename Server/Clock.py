@@ -0,0 +1,115 @@
+# 时钟：调度、计费与记录时间戳统一从注入的时钟取时间、在时钟上等待。
+#   RealClock     墙上时间（默认）
+#   ScaledClock   按固定倍数加速的墙上时间，时钟上的 1 秒对应 1 / speed 真实秒
+#   VirtualClock  离散事件时间：时间只在 run_until() / advance() 中跳到下一个到期时刻，不真实等待，
+#                 整天的调度可在几秒内模拟完，同样的输入得到同样的结果
+import time
+import heapq
+import asyncio
+import itertools
+
+class ScaledClock:
+    def __init__(self, speed, start=None):
+        self.speed = speed
+        self.real_origin = time.time()
+        self.origin = self.real_origin if start is None else start
+
+    def time(self):
+        return self.origin + (time.time() - self.real_origin) * self.speed
+
+    def event(self):
+        """用于唤醒在本时钟上等待的任务的 Event"""
+        return asyncio.Event()
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(seconds / self.speed)
+
+    async def wait(self, event, timeout):
+        """等待 event 置位或经过 timeout 时钟秒（为 None 时不限时）"""
+        try:
+            await asyncio.wait_for(event.wait(), None if timeout is None else timeout / self.speed)
+        except asyncio.TimeoutError:
+            pass
+
+class RealClock(ScaledClock):
+    def __init__(self):
+        super().__init__(1.0)
+
+    def time(self):
+        return time.time()
+
+class _VirtualEvent(asyncio.Event):
+    """置位时通过时钟唤醒等待者，使时钟知道有任务尚未再次进入等待"""
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+        self.waiters = [] # (task, future)
+
+    def set(self):
+        super().set()
+        waiters, self.waiters = self.waiters, []
+        for task, future in waiters:
+            self.clock._wake(task, future)
+
+class VirtualClock:
+    def __init__(self, start=None):
+        self.now = time.time() if start is None else start
+        self.timers = [] # (到期时刻, 序号, task, future)
+        self.seq = itertools.count()
+        self.woken = set() # 已被唤醒、尚未再次在时钟上等待的任务
+
+    def time(self):
+        return self.now
+
+    def event(self):
+        return _VirtualEvent(self)
+
+    def _wake(self, task, future):
+        if not future.done():
+            self.woken.add(task)
+            future.set_result(None)
+
+    async def _park(self, future, timeout):
+        task = asyncio.current_task()
+        if timeout is not None:
+            heapq.heappush(self.timers, (self.now + max(timeout, 0), next(self.seq), task, future))
+        self.woken.discard(task)
+        await future
+
+    async def sleep(self, seconds):
+        await self._park(asyncio.get_running_loop().create_future(), seconds)
+
+    async def wait(self, event, timeout):
+        if event.is_set():
+            return
+        future = asyncio.get_running_loop().create_future()
+        entry = (asyncio.current_task(), future)
+        event.waiters.append(entry)
+        try:
+            await self._park(future, timeout)
+        finally:
+            if entry in event.waiters:
+                event.waiters.remove(entry)
+
+    async def _settle(self):
+        """让出事件循环，直到被唤醒的任务全部再次进入等待（或结束）"""
+        await asyncio.sleep(0)
+        while self.woken:
+            self.woken = {task for task in self.woken if not task.done()}
+            await asyncio.sleep(0)
+
+    async def run_until(self, deadline):
+        """按到期顺序唤醒 deadline 之前的全部等待，每次唤醒后等到各任务重新进入等待，最后将时间置为 deadline。
+        由驱动模拟的一方调用，调用方自身不在本时钟上等待"""
+        await self._settle()
+        while self.timers and self.timers[0][0] <= deadline:
+            when, _, task, future = heapq.heappop(self.timers)
+            if future.done(): # 已被 Event 唤醒或已取消
+                continue
+            self.now = max(self.now, when)
+            self._wake(task, future)
+            await self._settle()
+        self.now = max(self.now, deadline)
+
+    async def advance(self, seconds):
+        await self.run_until(self.now + seconds)
@@ -0,0 +1,125 @@
+import asyncio
+
+import Clock as cl
+import Storage as st
+import Inventory as inv
+import RoomTable as rt
+import Ledger as lg
+import Telemetry as tm
+import OpLog as ol
+import Archive as ar
+import Export as ex
+import FrontDesk as fd
+import AirconSchedule as acs
+import Manager as mg
+import Dashboard as db
+
+# 各接口同时处理的最大请求数，超出的请求排队等待。报表与详单占用只读连接和 CPU，
+# 限制其并发，避免大量慢查询挤占房间请求；房间请求只访问内存，上限较宽
+CONCURRENCY = {
+    'room': 256,
+    'checkin': 32,
+    'checkout': 32,
+    'bill': 64,
+    'uselist': 4,
+    'roominfo': 32,
+    'manager': 2,
+    'query_room_info': 32,
+    'query_schedule': 32,
+    'telemetry': 8,
+    'export': 2,
+}
+
+class Core:
+    """服务核心：存储、房间表、账本、调度、报表与看板。一个部署中只能有一个实例，
+    单进程部署时在 Sanic worker 中创建，多 worker 部署时运行在独立的核心进程中（见 Remote.py）"""
+    def __init__(self, path='database.db', oplog=None, archive=None, retention_days=None, inventory=inv.DEFAULT_PATH,
+                 clock=None, max_serving=3):
+        self.room_ws = {} # roomId -> 房间的 WebSocket（多 worker 部署时为转发代理）
+
+        # archive 为历史归档目录，给出时查询合并归档记录，并在给出 retention_days 时定期归档超出保留期的记录
+        self.storage = st.Storage(path, archive=ar.Archive(archive) if archive else None)
+        self.retention = ar.Retention(self.storage, retention_days) if archive and retention_days else None
+        inv.load(self.storage, inventory) # 房间清单先写入数据库，房间表随后从数据库加载
+        # 调度、计费与记录时间戳使用的时钟，默认为墙上时间；模拟运行时注入 ScaledClock / VirtualClock
+        self.clock = clock or cl.RealClock()
+        self.rooms = rt.RoomTable(self.storage, self.clock)
+        self.oplog = ol.OpLog(oplog) if oplog else None # oplog 为二进制详单日志目录，不给出时只使用 sqlite
+        # 日志只包含启用之后的详单，之前的详单仍从 sqlite（及归档）读取；取整到下一秒，此前的记录都已在 USELIST 中
+        start = self.storage.write(self.storage.oplog_start, int(self.clock.time()) + 1 if oplog else None).result()
+        if self.oplog:
+            self.oplog.start = start
+        self.ledger = lg.Ledger(self.storage, self.rooms, self.oplog)
+        self.telemetry = tm.Telemetry(self.storage, self.clock)
+        self.frontDesk = fd.FrontDesk(self.storage, self.rooms, self.ledger, self.oplog)
+        # max_serving 为同时送风的房间数上限
+        self.airconSchedule = acs.AirconSchedule(self.room_ws, self.rooms, self.ledger, self.telemetry, self.clock,
+                                                 max_serving)
+        self.manager = mg.Manager(self.storage, self.ledger)
+        self.exporter = ex.Exporter(self.storage, self.ledger, self.retention)
+        self.dashboard = db.Dashboard(self.airconSchedule.scheduler, self.rooms)
+        self.airconSchedule.scheduler.on_change = self.dashboard.notify
+        self.frontDesk.on_change = self.dashboard.notify
+
+        # 接口名 -> 处理函数，参数为请求数据，返回可 JSON 序列化的结果
+        self.methods = {
+            'room': self.airconSchedule.request,
+            'checkin': self.frontDesk.checkin,
+            'checkout': self.frontDesk.checkout,
+            'bill': self.frontDesk.bill,
+            'uselist': self.frontDesk.userList,
+            'roominfo': lambda _: self.frontDesk.roomInfo(),
+            'manager': self.manager.show,
+            'query_room_info': self.airconSchedule.queryRoomInfo,
+            'query_schedule': self._querySchedule,
+            'telemetry': self.telemetry.query,
+        }
+        # 分多帧返回的接口，处理函数为异步生成器
+        self.streams = {
+            'uselist': self.frontDesk.userListStream,
+            'export': self.exporter.export,
+        }
+        self.limits = {method: asyncio.Semaphore(limit) for method, limit in CONCURRENCY.items()}
+
+    async def _querySchedule(self, _):
+        return self.airconSchedule.querySchedule()
+
+    async def call(self, method, data=None):
+        async with self.limits[method]:
+            return await self.methods[method](data)
+
+    async def stream(self, method, data):
+        async with self.limits[method]: # 与同名的普通调用共用并发上限
+            async for frame in self.streams[method](data):
+                yield frame
+
+    async def attach_room(self, roomId, ws):
+        """登记房间的连接，调度产生的状态推送发往该连接"""
+        self.room_ws[roomId] = ws
+
+    async def release_room(self, roomId):
+        """房间连接断开：注销连接并关闭该房间的空调"""
+        if self.room_ws.pop(roomId, None) is not None:
+            await self.airconSchedule.request({'roomId': roomId, 'state': "off", 'speed': 0, 'mode': "off",
+                                               'now_temp': 0, 'set_temp': 0, 'new_request': 1})
+
+    async def send_room(self, roomId, message):
+        """向房间的连接发送消息（管理员代房间操作时使用），房间未连接时忽略"""
+        if roomId in self.room_ws:
+            await self.room_ws[roomId].send(message)
+
+    async def subscribe(self, ws):
+        await self.dashboard.subscribe(ws)
+
+    async def unsubscribe(self, ws):
+        self.dashboard.unsubscribe(ws)
+
+    async def close(self):
+        await self.airconSchedule.close()
+        await self.telemetry.close()
+        if self.retention:
+            await self.retention.close()
+        self.ledger.close() # 关闭服务前提交账本中剩余的写入
+        if self.oplog:
+            self.oplog.close()
+        self.storage.close()
@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+class Dashboard:
+    """管理员看板推送：订阅者先收到一次完整快照，之后只收到变化部分。
+    每次变化只构建一次快照与差异消息，所有订阅者共享同一份序列化结果"""
+    def __init__(self, scheduler, rooms):
+        self.scheduler = scheduler
+        self.room_table = rooms
+
+        self.subscribers = set()
+        self.loop = None # 服务端事件循环，第一次订阅时记录
+
+        self.version = 0
+        self.rooms = {} # roomId -> 房间信息，最近一次快照
+        self.serving_queue = []
+        self.waiting_queue = []
+        self.snapshot_message = None # 序列化后的完整快照
+
+        self.dirty = True # 快照是否落后于实际状态
+        self.refreshing = False
+        self.lock = asyncio.Lock() # 保证快照重建与推送按版本顺序进行
+
+    def notify(self):
+        """状态变化通知，可在任意线程调用；短时间内的多次通知合并为一次刷新"""
+        if self.loop is None:
+            return
+        self.loop.call_soon_threadsafe(self._mark_dirty)
+
+    def _mark_dirty(self):
+        self.dirty = True
+        if self.subscribers and not self.refreshing:
+            self.refreshing = True
+            self.loop.create_task(self._refresh())
+
+    async def _refresh(self):
+        try:
+            while self.dirty and self.subscribers:
+                async with self.lock:
+                    self.dirty = False
+                    message = await self._rebuild()
+                    if message:
+                        await self._broadcast(message)
+        finally:
+            self.refreshing = False
+
+    async def _rebuild(self):
+        """重新读取调度与房间状态，更新快照，返回序列化后的差异消息（无变化时为 None）"""
+        serving_queue, waiting_queue, schedule = self.scheduler.snapshot()
+        room_states = self.room_table.states()
+
+        rooms = {}
+        for roomId, occupancy, bill in room_states:
+            status, speed, mode, now_temp, set_temp = schedule.get(roomId, ('off', 'off', 'off', '--', '--'))
+            rooms[roomId] = {
+                'occupancy': occupancy,
+                'status': status,
+                'speed': speed,
+                'mode': mode,
+                'now_temp': now_temp,
+                'set_temp': set_temp,
+                'bill': bill
+            }
+
+        diff = {}
+        for roomId, info in rooms.items():
+            old = self.rooms.get(roomId, {})
+            changed = {key: value for key, value in info.items() if old.get(key) != value}
+            if changed:
+                diff[roomId] = changed
+        removed = [roomId for roomId in self.rooms if roomId not in rooms]
+
+        message = {'type': 'diff', 'version': self.version + 1}
+        if diff:
+            message['rooms'] = diff
+        if removed:
+            message['removed'] = removed
+        if serving_queue != self.serving_queue or waiting_queue != self.waiting_queue:
+            message['serving_queue'] = serving_queue
+            message['waiting_queue'] = waiting_queue
+
+        self.rooms = rooms
+        self.serving_queue = serving_queue
+        self.waiting_queue = waiting_queue
+        if len(message) == 2 and self.snapshot_message is not None:
+            return None
+        self.version += 1
+        self.snapshot_message = json.dumps({
+            'type': 'snapshot',
+            'version': self.version,
+            'rooms': rooms,
+            'serving_queue': serving_queue,
+            'waiting_queue': waiting_queue
+        })
+        return json.dumps(message)
+
+    async def _broadcast(self, message):
+        subscribers = list(self.subscribers)
+        results = await asyncio.gather(*(ws.send(message) for ws in subscribers), return_exceptions=True)
+        for ws, result in zip(subscribers, results):
+            if isinstance(result, Exception):
+                self.subscribers.discard(ws)
+
+    async def subscribe(self, ws):
+        """登记订阅者并发送当前完整快照"""
+        self.loop = asyncio.get_running_loop()
+        async with self.lock:
+            if self.dirty and not self.refreshing:
+                # 没有订阅者期间的变化直接并入新的快照，不产生差异推送
+                self.dirty = False
+                await self._rebuild()
+            self.subscribers.add(ws)
+            await ws.send(self.snapshot_message)
+
+    def unsubscribe(self, ws):
+        self.subscribers.discard(ws)
@@ -0,0 +1,101 @@
+# 详单与营收的批量导出：按时间范围流式生成 CSV 或 NDJSON 文本块。先读归档文件，再按 (op_ts, rowid) 键集分页读数据库，
+# 任何时刻只在内存中保留一块记录，导出多年历史也不会整体载入内存。
+# 命令行用法（服务运行时）：python Export.py earning --format csv --start "2025-01-01 00:00:00" -o earning.csv
+import io
+import sys
+import csv
+import json
+import asyncio
+import itertools
+import argparse
+import contextlib
+
+from Storage import parse_time
+from FrontDesk import USELIST_FIELDS
+
+FIELDS = {'USELIST': USELIST_FIELDS, 'EARNING': ('roomId', 'op_time', 'money')}
+FORMATS = ('csv', 'ndjson')
+CHUNK_SIZE = 1000 # 每帧的默认记录数
+MAX_CHUNK_SIZE = 10000
+
+def _encode(table, format, rows):
+    if format == 'ndjson':
+        return ''.join(json.dumps(dict(zip(FIELDS[table], row)), ensure_ascii=False) + '\n' for row in rows)
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+class Exporter:
+    def __init__(self, storage, ledger, retention=None):
+        self.storage = storage
+        self.ledger = ledger
+        self.retention = retention # 启用历史归档时，导出期间暂停归档
+
+    async def _chunks(self, table, begin, end, size):
+        """按时间顺序逐块生成记录"""
+        if self.storage.archive:
+            records = self.storage.archive.records(table, begin, end)
+            while rows := await asyncio.to_thread(lambda: list(itertools.islice(records, size))):
+                yield rows
+        after = None
+        while True:
+            rows, after = await self.storage.export_page(table, begin, end, after, size)
+            if rows:
+                yield rows
+            if after is None:
+                break
+
+    async def export(self, data):
+        """流式导出：table 为 'earning' 或 'uselist'，format 为 'csv'（首帧为表头）或 'ndjson'，时间范围可选。
+        逐块生成 {'data': 文本, 'done': False} 帧，最后一帧为 {'data': '', 'done': True}；参数错误时只生成一个 error 帧"""
+        table = str(data.get('table', '')).upper()
+        format = data.get('format', 'csv')
+        if table not in FIELDS or format not in FORMATS:
+            yield {'error': f"unsupported table or format: {data.get('table')}, {format}", 'done': True}
+            return
+        size = max(1, min(int(data.get('chunk_size', CHUNK_SIZE)), MAX_CHUNK_SIZE))
+        begin = parse_time(data['start_time']) if data.get('start_time') else None
+        end = parse_time(data['end_time']) if data.get('end_time') else None
+
+        await self.ledger.flush_async() # 包含账本中尚未提交的记录
+        async with self.retention.lock if self.retention else contextlib.nullcontext():
+            if format == 'csv':
+                yield {'data': _encode(table, format, [FIELDS[table]]), 'done': False}
+            async for rows in self._chunks(table, begin, end, size):
+                yield {'data': await asyncio.to_thread(_encode, table, format, rows), 'done': False}
+        yield {'data': '', 'done': True}
+
+async def _export_to_file(url, request, output):
+    from websockets.asyncio.client import connect # 只有命令行需要
+
+    async with connect(url, max_size=None) as ws:
+        await ws.send(json.dumps(request))
+        while True:
+            frame = json.loads(await ws.recv())
+            if 'error' in frame:
+                raise SystemExit(frame['error'])
+            output.write(frame['data'])
+            if frame['done']:
+                break
+
+def main():
+    parser = argparse.ArgumentParser(description='从运行中的服务导出营收或详单记录')
+    parser.add_argument('table', choices=('earning', 'uselist'))
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('--start', help="起始时间，如 '2025-01-01 00:00:00'")
+    parser.add_argument('--end', help='结束时间')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('-o', '--output', help='输出文件，默认为标准输出')
+    parser.add_argument('--url', default='ws://localhost:10043/ws/export')
+    args = parser.parse_args()
+
+    request = {'table': args.table, 'format': args.format, 'start_time': args.start, 'end_time': args.end,
+               'chunk_size': args.chunk_size}
+    if args.output:
+        with open(args.output, 'w', newline='', encoding='utf-8') as output:
+            asyncio.run(_export_to_file(args.url, request, output))
+    else:
+        asyncio.run(_export_to_file(args.url, request, sys.stdout))
+
+if __name__ == '__main__':
+    main()
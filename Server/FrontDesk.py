@@ -1,121 +1,148 @@
-import sqlite3
+import asyncio
+
+from Storage import parse_time
+
+USELIST_FIELDS = ('roomId', 'userId', 'op_time', 'operation', 'set_temp', 'now_temp', 'fan_speed', 'mode', 'total_bill')
+PAGE_SIZE = 200 # 流式详单每帧的默认记录数
+MAX_PAGE_SIZE = 1000
+
+def _encode_cursor(after):
+    """续页游标：上一页最后一行的 op_ts 与 rowid"""
+    return f'{after[0]}-{after[1]}' if after else None
+
+def _decode_cursor(cursor):
+    if not cursor:
+        return None
+    op_ts, rowid = cursor.split('-')
+    return int(op_ts), int(rowid)
 
 class FrontDesk:
-    def __init__(self):
-        self.database = sqlite3.connect('database.db')
-        self.cursor = self.database.cursor()
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS ROOM (
-                roomId TEXT PRIMARY KEY,
-                status TEXT,
-                client_name TEXT,
-                client_id TEXT,
-                bill REAL DEFAULT 0.0
-            )
-        ''')
-        self.database.commit()
-
-        # 初始化房间状态
-        for roomId in ['101', '102', '103', '104', '201', '202', '203', '204']:
-            self.cursor.execute('''
-                INSERT OR IGNORE INTO ROOM (roomId, status) VALUES (?, 'free')
-            ''', (roomId,))
-        self.database.commit()
-
-    def checkin(self, data):
+    def __init__(self, storage, rooms, ledger, oplog=None):
+        self.storage = storage
+        self.rooms = rooms
+        self.ledger = ledger
+        self.oplog = oplog # 启用时整段详单中日志启用之后的部分从二进制日志读取
+        self.on_change = None # 入住/退房改变房间状态时的回调
+
+    async def checkin(self, data):
         roomId = data['roomId']
         client_name = data['client_name']
         client_id = data['client_id']
-        if roomId == '000': # 系统自动分配空房
-            self.cursor.execute("SELECT * FROM ROOM WHERE status = 'free' LIMIT 1")
-            room = self.cursor.fetchone()
-            if room:
-                roomId = room[0]
-                self.cursor.execute('''
-                    UPDATE ROOM SET status = ?, client_name = ?, client_id = ?
-                    WHERE roomId = ?
-                ''', ('busy', client_name, client_id, roomId))
-                self.database.commit()
-                return {'status': 'OK', 'allocate_room': roomId }
-            return {'status': 'ERR', 'allocate_room': '000'}
-        else:
-            self.cursor.execute("SELECT status FROM ROOM WHERE roomId = ?", (roomId,))
-            room_status = self.cursor.fetchone()
-            if room_status and room_status[0] == 'free':
-                self.cursor.execute('''
-                    UPDATE ROOM SET status = ?, client_name = ?, client_id = ?
-                    WHERE roomId = ?
-                ''', ('busy', client_name, client_id, roomId))
-                self.database.commit()
-                return {'status': 'OK', 'allocate_room': roomId }
-            else:
-                return {'status': 'ERR', 'allocate_room': '000'}
-
-    def checkout(self, data):
+        # roomId 为 '000' 时由系统按可选的 floor / room_type / near 偏好分配空房；内存中原子完成，等待写穿提交后再答复
+        roomId, stay_id, committed = self.rooms.checkin(roomId, client_name, client_id, data.get('floor'),
+                                                        data.get('room_type'), data.get('near'))
+        if roomId:
+            await asyncio.wrap_future(committed)
+            if self.on_change:
+                self.on_change()
+            return {'status': 'OK', 'allocate_room': roomId, 'stay_id': stay_id}
+        return {'status': 'ERR', 'allocate_room': '000'}
+
+    async def checkout(self, data):
         roomId = data['roomId']
-        self.cursor.execute("SELECT status FROM ROOM WHERE roomId = ?", (roomId,))
-        room_status = self.cursor.fetchone()
-        if room_status and room_status[0] == 'busy':
-            self.cursor.execute('''SELECT bill FROM ROOM WHERE roomId = ?''', (roomId,))
-            bill = self.cursor.fetchone()[0]
-
-            self.cursor.execute('''
-            UPDATE ROOM SET status = 'free', client_name = NULL, client_id = NULL, bill = 0.0
-                WHERE roomId = ?
-            ''', (roomId,))
-            self.database.commit()
-            return {'status': 'OK', 'bill': bill}
+        bill, stay_id, committed = self.rooms.checkout(roomId)
+        if bill is not None:
+            await asyncio.wrap_future(committed)
+            if self.on_change:
+                self.on_change()
+            return {'status': 'OK', 'bill': bill, 'stay_id': stay_id}
         else:
             return {'status': 'ERR'}
 
-    def bill(self, data):
+    async def bill(self, data):
         roomId = data['roomId']
-        self.cursor.execute("SELECT bill FROM ROOM WHERE roomId = ?", (roomId,))
-        bill = self.cursor.fetchone()
-        if bill:
-            return {'bill': bill[0]}
-        else:
-            return {'bill': 0.0}
+        if data.get('stay_id') is not None: # 指定已退房的一次入住时返回其结算金额
+            stay = await self.storage.stay(int(data['stay_id']))
+            if stay and stay[5] is not None:
+                return {'bill': stay[6], 'stay_id': stay[0]}
+        return {'bill': self.rooms.bill(roomId), 'stay_id': self.rooms.stay_id(roomId)}
+
+    async def _stay(self, data):
+        """按住户查询的入住：请求给出 stay_id 时为该次入住，否则为住户在该房间最近的一次；没有 STAY 记录时为 None"""
+        if data.get('stay_id') is not None:
+            return await self.storage.stay(int(data['stay_id']))
+        if data['type'] == 'usr':
+            return await self.storage.latest_stay(data['usrId'], data['roomId'])
+        return None
+
+    async def userList(self, data):
+        await self.ledger.flush_async() # 详单需包含账本中尚未提交的记录
+        if 'page_size' in data: # 分页模式：结构化记录 + 续页游标
+            return await self._userListPage(data)
 
-    def userList(self, data):
-        uselist = ""
         roomId = data['roomId']
         type = data['type']
-        if type == 'usr':
-            usrId = data['usrId']
-            self.cursor.execute('''
-                SELECT * FROM USELIST WHERE userId = ? AND roomId = ?
-            ''', (usrId, roomId))
-            use_list = self.cursor.fetchall()
-            fan_speed = {0: '低', 1: '中', 2: '高'}
-            status = {'on': '开机', 'off': '关机', 'cool': '制冷', 'heat': '制热', 'pause': '暂停'}
-            for use in use_list:
-                uselist += f"- 房间号 {use[0]}, 住户ID {use[1]}\n"
-                uselist += f"\t时间 {use[2]} : {status[use[3]]}, 设定温度 {use[4]}℃, 房间温度 {round(float(use[5]), 1)}℃\n"
-                uselist += f"\t风速 {fan_speed[use[6]]}, {status[use[7]]} 模式, 总花费 {use[8]} 元\n"
-
+        stay = await self._stay(data) if type == 'usr' else None
+        if stay:
+            use_list = await self.storage.uselist_by_stay(stay)
+        elif self.oplog and type in ('usr', 'room'):
+            use_list = await self._oplog_uselist(data)
+        elif type == 'usr': # 没有入住记录（迁移前的历史）时按住户 ID 匹配
+            use_list = await self.storage.uselist_by_user(data['usrId'], roomId)
         elif type == 'room':
-            start_time = data['start_time']
-            end_time = data['end_time']
-            if start_time and end_time:
-                self.cursor.execute('''
-                    SELECT * FROM USELIST WHERE roomId = ? AND op_time >= ? AND op_time <= ?
-                ''', (roomId, start_time, end_time))
-            else:
-                self.cursor.execute('SELECT * FROM USELIST WHERE roomId = ?', (roomId,))
-            use_list = self.cursor.fetchall()
-            fan_speed = {0: '低', 1: '中', 2: '高'}
-            status = {'on': '开机', 'off': '关机', 'cool': '制冷', 'heat': '制热', 'pause': '暂停'}
-            for use in use_list:
-                uselist += f"- 房间号 {use[0]}, 住户ID {use[1]}, \n"
-                uselist += f"\t时间 {use[2]} : {status[use[3]]}, 设定温度 {use[4]}℃, 房间温度 {round(float(use[5]), 1)}℃\n"
-                uselist += f"\t风速 {fan_speed[use[6]]}, {status[use[7]]} 模式, 总花费 {use[8]} 元\n"
-
-        return {'uselist': uselist}
-
-    def roomInfo(self): # 各个房间状态
-        self.cursor.execute("SELECT * FROM ROOM")
-        rooms = self.cursor.fetchall()
+            use_list = await self.storage.uselist_by_room(roomId, data['start_time'], data['end_time'])
+        else:
+            use_list = []
+        # 格式化放到线程中进行，长详单不占用事件循环
+        return {'uselist': await asyncio.to_thread(self._format_uselist, type, use_list)}
+
+    async def _oplog_uselist(self, data):
+        """启用二进制日志时的详单：日志启用之前的部分从 sqlite（及归档）读取，之后的部分从日志读取，按时间拼接"""
+        roomId, start = data['roomId'], self.oplog.start
+        if data['type'] == 'usr':
+            usrId, begin, end = data['usrId'], None, None
+            history = await self.storage.uselist_by_user(usrId, roomId, before=start)
+        else:
+            usrId, begin, end = None, None, None
+            if data['start_time'] and data['end_time']:
+                begin, end = parse_time(data['start_time']), parse_time(data['end_time'])
+            history = await self.storage.uselist_by_room(roomId, data['start_time'], data['end_time'], before=start)
+        if end is not None and end < start:
+            return history
+        begin = start if begin is None else max(begin, start)
+        return history + await asyncio.to_thread(self.oplog.select, roomId, usrId, begin, end)
+
+    @staticmethod
+    def _format_uselist(type, use_list):
+        uselist = []
+        fan_speed = {0: '低', 1: '中', 2: '高'}
+        status = {'on': '开机', 'off': '关机', 'cool': '制冷', 'heat': '制热', 'pause': '暂停'}
+        # 按住户查询与按房间查询的首行格式略有不同
+        separator = '' if type == 'usr' else ', '
+        for use in use_list:
+            uselist.append(f"- 房间号 {use[0]}, 住户ID {use[1]}{separator}\n")
+            uselist.append(f"\t时间 {use[2]} : {status[use[3]]}, 设定温度 {use[4]}℃, 房间温度 {round(float(use[5]), 1)}℃\n")
+            uselist.append(f"\t风速 {fan_speed[use[6]]}, {status[use[7]]} 模式, 总花费 {use[8]} 元\n")
+        return ''.join(uselist)
+
+    async def _uselist_query(self, data):
+        """详单查询条件 (roomId, usrId, start_time, end_time, stay_id)"""
+        if data['type'] == 'usr':
+            stay = await self._stay(data)
+            return data['roomId'], data['usrId'], None, None, stay[0] if stay else None
+        return data['roomId'], None, data.get('start_time'), data.get('end_time'), None
+
+    async def _userListPage(self, data):
+        page_size = max(1, min(int(data['page_size']), MAX_PAGE_SIZE))
+        roomId, usrId, start_time, end_time, stay_id = await self._uselist_query(data)
+        rows, after = await self.storage.uselist_page(roomId, usrId, start_time, end_time,
+                                                      _decode_cursor(data.get('cursor')), page_size, stay_id)
+        return {'records': [dict(zip(USELIST_FIELDS, row)) for row in rows], 'next_cursor': _encode_cursor(after)}
+
+    async def userListStream(self, data):
+        """流式详单：逐页生成 {'records': [...], 'done': bool} 帧，最后一帧 done 为 True"""
+        await self.ledger.flush_async()
+        page_size = max(1, min(int(data.get('page_size', PAGE_SIZE)), MAX_PAGE_SIZE))
+        roomId, usrId, start_time, end_time, stay_id = await self._uselist_query(data)
+        after = _decode_cursor(data.get('cursor'))
+        while True:
+            rows, after = await self.storage.uselist_page(roomId, usrId, start_time, end_time, after, page_size, stay_id)
+            yield {'records': [dict(zip(USELIST_FIELDS, row)) for row in rows], 'done': after is None}
+            if after is None:
+                break
+
+    async def roomInfo(self): # 各个房间状态
+        rooms = self.rooms.states()
         room_list = []
         for room in rooms:
             room_info = {
@@ -0,0 +1,38 @@
+# 房间清单：从 CSV 或 JSON 文件读取房间号、楼层、房型与费率倍数，启动时在一个事务内批量写入 ROOM。
+# 文件内容的哈希保存在 META 表中，未变化时跳过加载。清单中没有的房间不会被删除
+#   CSV：表头 roomId,floor,room_type,tariff，除 roomId 外均可留空
+#   JSON：[{"roomId": "101", "floor": "1", "room_type": "standard", "tariff": 1.0}, ...]
+import os
+import io
+import csv
+import json
+import hashlib
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rooms.csv')
+HASH_KEY = 'inventory_hash'
+
+def parse(content, path):
+    """清单内容 -> [(roomId, floor, room_type, tariff)]，floor 为 None 时由房间号推断"""
+    if path.endswith('.json'):
+        records = json.loads(content)
+    else:
+        records = csv.DictReader(io.StringIO(content.decode('utf-8-sig')))
+    rooms = []
+    for record in records:
+        roomId = str(record['roomId']).strip()
+        floor = str(record.get('floor') or '').strip() or None
+        room_type = str(record.get('room_type') or '').strip() or 'standard'
+        tariff = float(record.get('tariff') or 1.0)
+        rooms.append((roomId, floor, room_type, tariff))
+    return rooms
+
+def load(storage, path=DEFAULT_PATH):
+    """将清单写入数据库，清单未变化时跳过。阻塞到提交完成，返回写入的房间数（跳过时为 0）"""
+    with open(path, 'rb') as file:
+        content = file.read()
+    digest = hashlib.sha256(content).hexdigest()
+    if storage.read(storage.select_meta, HASH_KEY).result() == digest:
+        return 0
+    rooms = parse(content, path)
+    storage.write(storage.write_inventory, rooms, HASH_KEY, digest).result()
+    return len(rooms)
@@ -0,0 +1,104 @@
+import threading
+import asyncio
+import atexit
+
+from Storage import format_time
+
+class Ledger:
+    """写回式账本：缓存 EARNING / USELIST 插入与 ROOM 账单写回，按时间或条数在一个事务内批量提交"""
+    def __init__(self, storage, rooms, oplog=None, flush_interval=0.2, max_pending=128):
+        self.storage = storage
+        self.rooms = rooms # 账单以 RoomTable 为准，这里只负责把变化写回数据库
+        self.oplog = oplog # 可选的二进制详单日志，与 USELIST 同时写入
+        self.flush_interval = flush_interval # 最长缓存时间（秒）
+        self.max_pending = max_pending # 缓存记录数达到该值时立即提交
+
+        self.earnings = [] # (roomId, op_time, op_ts, money, stay_id)
+        # (roomId, userId, op_time, op_ts, operation, set_temp, now_temp, fan_speed, mode, total_bill, stay_id)
+        self.uselist = []
+
+        # 只在登记与取出缓存时短暂持有，等待提交期间不持有，事件循环中的登记不会被数据库写入阻塞
+        self.condition = threading.Condition()
+        # 串行化提交；flush() 返回时之前登记的记录均已提交
+        self.flush_lock = threading.Lock()
+        self.closed = False
+        self.flush_thread = threading.Thread(target=self._run, daemon=True)
+        self.flush_thread.start()
+        atexit.register(self.close)
+
+    def _pending_count(self):
+        return len(self.earnings) + len(self.uselist)
+
+    def add_earning(self, roomId, op_ts, money):
+        """登记一笔营收（op_ts 为 epoch 秒），记入房间当前的入住，同时累加到房间账单"""
+        with self.condition:
+            self.earnings.append((roomId, format_time(op_ts), int(op_ts), money, self.rooms.stay_id(roomId)))
+            self.rooms.add_bill(roomId, money)
+            if self._pending_count() >= self.max_pending:
+                self.condition.notify()
+
+    def add_uselist(self, roomId, userId, op_ts, operation, set_temp, now_temp, fan_speed, mode, total_bill):
+        """登记一条详单记录（op_ts 为 epoch 秒），记入房间当前的入住"""
+        if self.oplog:
+            self.oplog.append(roomId, userId, op_ts, operation, set_temp, now_temp, fan_speed, mode, total_bill)
+        with self.condition:
+            self.uselist.append((roomId, userId, format_time(op_ts), int(op_ts), operation,
+                                 set_temp, now_temp, fan_speed, mode, total_bill, self.rooms.stay_id(roomId)))
+            if self._pending_count() >= self.max_pending:
+                self.condition.notify()
+
+    def flush(self):
+        """立即提交所有缓存的写入"""
+        with self.flush_lock:
+            self._flush()
+
+    async def flush_async(self):
+        """flush() 的协程版本"""
+        await asyncio.to_thread(self.flush)
+
+    def _flush(self):
+        # 调用方持有 flush_lock
+        if self.oplog:
+            self.oplog.flush()
+        earnings, uselist, bills = [], [], {}
+        try:
+            with self.condition:
+                earnings, uselist = self.earnings, self.uselist
+                self.earnings, self.uselist = [], []
+                # 账单在房间表锁内取出并入队，与入住/退房的写穿保持相同顺序
+                with self.rooms.lock:
+                    bills = self.rooms.take_dirty_bills()
+                    if not earnings and not uselist and not bills:
+                        return
+                    future = self.storage.write(self.storage.write_ledger, earnings, uselist, bills)
+            # 由存储写线程在一个事务内执行
+            future.result()
+        except Exception as e:
+            # 提交失败时放回缓存，下一个周期重试；取出后的任何异常都不能丢弃这批记录
+            with self.condition:
+                self.earnings[:0] = earnings
+                self.uselist[:0] = uselist
+            self.rooms.mark_dirty(bills)
+            print(f"Error flushing ledger: {e!r}")
+
+    def _run(self):
+        while True:
+            with self.condition:
+                if self.closed:
+                    break
+                self.condition.wait(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                # 提交线程不能因意外异常退出，否则之后登记的记录只会在缓存中累积
+                print(f"Error in ledger flush thread: {e!r}")
+
+    def close(self):
+        """停止后台提交线程，并提交剩余的缓存"""
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.condition.notify()
+        self.flush_thread.join()
+        self.flush()
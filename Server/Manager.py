@@ -1,34 +1,30 @@
-import sqlite3
+import asyncio
 
 class Manager:
-    def __init__(self):
-        self.database = sqlite3.connect('database.db')
-        self.cursor = self.database.cursor()
-        self.cursor.execute(
-            '''
-            CREATE TABLE IF NOT EXISTS EARNING(
-                roomId TEXT,
-                op_time TEXT,
-                money REAL
-            )
-            '''
-        )
-        self.database.commit()
+    def __init__(self, storage, ledger):
+        self.storage = storage
+        self.ledger = ledger
 
-    def show(self, data):
+    async def show(self, data):
         start_time = data.get('start_time')
         end_time = data.get('end_time') # YYYY-MM-DD HH:MM:SS
+        await self.ledger.flush_async() # 报表需包含账本中尚未提交的营收
+        if data.get('format') == 'json': # 结构化汇总：由小时/日预聚合表计算，耗时与历史规模无关
+            room_earn = await self.storage.revenue(start_time, end_time)
+            return {
+                'start_time': start_time,
+                'end_time': end_time,
+                'total': round(sum(room_earn.values()), 2),
+                'rooms': [{'roomId': room, 'earning': round(earn, 2)} for room, earn in sorted(room_earn.items())]
+            }
 
-        if start_time and end_time:
-            self.cursor.execute('''
-                SELECT * FROM EARNING WHERE op_time >= ? AND op_time <= ?
-            ''', (start_time, end_time))
-        else:
-            self.cursor.execute('SELECT * FROM EARNING')
-        all_earn = self.cursor.fetchall()
-        all_earn_str = ""
-        for earn in all_earn:
-            all_earn_str += f"-- 房间号 {earn[0]} 在时间点 {earn[1]} 新增营收 {earn[2]} 元\n"
+        all_earn = await self.storage.earning(start_time, end_time)
+        # 明细可能有数十万行，格式化放到线程中进行，不占用事件循环
+        return await asyncio.to_thread(self._format_report, start_time, end_time, all_earn)
+
+    @staticmethod
+    def _format_report(start_time, end_time, all_earn):
+        all_earn_str = ''.join(f"-- 房间号 {earn[0]} 在时间点 {earn[1]} 新增营收 {earn[2]} 元\n" for earn in all_earn)
         room_earn = {}
         for earn in all_earn:
             if earn[0] not in room_earn:
@@ -39,4 +35,3 @@ class Manager:
         for room, earn in room_earn.items():
             room_earn_str += f"- 房间号 {room} 总营收： {earn} 元\n"
         return {'content': room_earn_str + "\n具体营收情况：\n" + all_earn_str}
-
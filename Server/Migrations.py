@@ -0,0 +1,169 @@
+# 数据库版本迁移：按 PRAGMA user_version 依次执行尚未应用的迁移，每个迁移一个事务
+
+def _create_tables(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ROOM (
+            roomId TEXT PRIMARY KEY,
+            status TEXT,
+            client_name TEXT,
+            client_id TEXT,
+            bill REAL DEFAULT 0.0
+        )
+    ''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS USELIST(
+            roomId TEXT,
+            userId TEXT,
+            op_time TEXT,
+            operation TEXT,
+            set_temp REAL,
+            now_temp REAL,
+            fan_speed INTEGER,
+            mode TEXT,
+            total_bill REAL DEFAULT 0.0
+        )
+    ''')
+    cursor.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS EARNING(
+            roomId TEXT,
+            op_time TEXT,
+            money REAL
+        )
+        '''
+    )
+
+def _add_epoch_columns(cursor):
+    # op_time 为本地时间字符串，'utc' 修饰符将其换算为 UTC 秒数，与 time.time() 一致
+    cursor.execute('ALTER TABLE USELIST ADD COLUMN op_ts INTEGER')
+    cursor.execute("UPDATE USELIST SET op_ts = CAST(strftime('%s', op_time, 'utc') AS INTEGER)")
+    cursor.execute('ALTER TABLE EARNING ADD COLUMN op_ts INTEGER')
+    cursor.execute("UPDATE EARNING SET op_ts = CAST(strftime('%s', op_time, 'utc') AS INTEGER)")
+
+def _add_indexes(cursor):
+    # FrontDesk.userList: userId AND roomId / roomId AND 时间范围；Manager.show: 时间范围
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_uselist_room_user ON USELIST(roomId, userId, op_ts)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_uselist_room_time ON USELIST(roomId, op_ts)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_earning_time ON EARNING(op_ts)')
+
+def _add_earning_rollups(cursor):
+    # 按房间预聚合的小时/日营收，bucket_ts 为桶起点（epoch 秒，按 UTC 对齐）；主键前缀 bucket_ts 支持范围查询
+    for table, size in (('EARNING_HOURLY', 3600), ('EARNING_DAILY', 86400)):
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table}(
+                bucket_ts INTEGER,
+                roomId TEXT,
+                money REAL,
+                PRIMARY KEY (bucket_ts, roomId)
+            )
+        ''')
+        cursor.execute(f'''
+            INSERT INTO {table} (bucket_ts, roomId, money)
+            SELECT op_ts / {size} * {size}, roomId, SUM(money) FROM EARNING
+            WHERE op_ts IS NOT NULL GROUP BY 1, 2
+        ''')
+
+def _add_telemetry(cursor):
+    # 房间温度的分钟/小时汇总，now_sum / samples 为平均温度；主键前缀 roomId 支持按房间取时间段
+    for table in ('TELEMETRY_MINUTE', 'TELEMETRY_HOUR'):
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table}(
+                roomId TEXT,
+                bucket_ts INTEGER,
+                samples INTEGER,
+                now_sum REAL,
+                now_min REAL,
+                now_max REAL,
+                set_temp REAL,
+                PRIMARY KEY (roomId, bucket_ts)
+            )
+        ''')
+
+def _add_history_index(cursor):
+    # 历史归档按时间取出并删除最早一天的详单
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_uselist_time ON USELIST(op_ts)')
+
+def _add_stays(cursor):
+    # 一次入住为一条 STAY，入住时创建、退房时写入退房时间与结算金额；ROOM.stay_id 为当前未结束的入住。
+    # 详单与营收记录带 stay_id，取一次入住的记录为索引范围扫描。迁移前的记录没有 stay_id，已入住的房间补建 STAY：
+    # 当前住户在该房间的详单、以及其第一条详单之后该房间的营收记入这次入住，入住时间取第一条详单的时间（没有详单时为迁移时刻）
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS STAY(
+            stay_id INTEGER PRIMARY KEY,
+            roomId TEXT,
+            client_name TEXT,
+            client_id TEXT,
+            checkin_ts INTEGER,
+            checkout_ts INTEGER,
+            bill REAL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_stay_client ON STAY(client_id, roomId, checkin_ts)')
+    cursor.execute('ALTER TABLE ROOM ADD COLUMN stay_id INTEGER')
+    cursor.execute('ALTER TABLE USELIST ADD COLUMN stay_id INTEGER')
+    cursor.execute('ALTER TABLE EARNING ADD COLUMN stay_id INTEGER')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_uselist_stay ON USELIST(stay_id, op_ts)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_earning_stay ON EARNING(stay_id, op_ts)')
+    cursor.execute('''
+        INSERT INTO STAY (roomId, client_name, client_id, checkin_ts)
+        SELECT roomId, client_name, client_id, COALESCE(
+            (SELECT MIN(op_ts) FROM USELIST WHERE USELIST.roomId = ROOM.roomId AND USELIST.userId = ROOM.client_id),
+            CAST(strftime('%s', 'now') AS INTEGER))
+        FROM ROOM WHERE status = 'busy'
+    ''')
+    cursor.execute('''
+        UPDATE ROOM SET stay_id = (SELECT stay_id FROM STAY WHERE STAY.roomId = ROOM.roomId) WHERE status = 'busy'
+    ''')
+    cursor.execute('''
+        UPDATE USELIST SET stay_id = (
+            SELECT stay_id FROM ROOM WHERE ROOM.roomId = USELIST.roomId AND ROOM.client_id = USELIST.userId
+                AND ROOM.status = 'busy')
+        WHERE EXISTS (SELECT 1 FROM ROOM WHERE ROOM.roomId = USELIST.roomId AND ROOM.client_id = USELIST.userId
+                      AND ROOM.status = 'busy')
+    ''')
+    cursor.execute('''
+        UPDATE EARNING SET stay_id = (SELECT stay_id FROM STAY WHERE STAY.roomId = EARNING.roomId)
+        WHERE op_ts >= (SELECT checkin_ts FROM STAY WHERE STAY.roomId = EARNING.roomId)
+    ''')
+
+def _add_room_type(cursor):
+    # 房型，自动分配空房时可按房型选择
+    cursor.execute("ALTER TABLE ROOM ADD COLUMN room_type TEXT DEFAULT 'standard'")
+
+def _add_inventory(cursor):
+    # 房间清单（见 Inventory.py）中的楼层与费率倍数；META 保存清单哈希等键值
+    cursor.execute('ALTER TABLE ROOM ADD COLUMN floor TEXT')
+    cursor.execute('ALTER TABLE ROOM ADD COLUMN tariff REAL DEFAULT 1.0')
+    cursor.execute('CREATE TABLE IF NOT EXISTS META(key TEXT PRIMARY KEY, value TEXT)')
+
+# 只允许在末尾追加；第 i 个迁移执行后 user_version 为 i + 1
+MIGRATIONS = [
+    _create_tables,
+    _add_epoch_columns,
+    _add_indexes,
+    _add_earning_rollups,
+    _add_telemetry,
+    _add_history_index,
+    _add_stays,
+    _add_room_type,
+    _add_inventory,
+]
+
+def schema_version(cursor):
+    cursor.execute('PRAGMA user_version')
+    return cursor.fetchone()[0]
+
+def migrate(cursor, target=None):
+    """将数据库升级到 target 版本（默认最新），返回升级后的版本。cursor 所属连接需处于自动提交模式"""
+    target = len(MIGRATIONS) if target is None else target
+    version = schema_version(cursor)
+    while version < target:
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            MIGRATIONS[version](cursor)
+            cursor.execute(f'PRAGMA user_version = {version + 1}')
+            cursor.execute('COMMIT')
+        except Exception:
+            cursor.execute('ROLLBACK')
+            raise
+        version += 1
+    return version
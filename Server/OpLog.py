@@ -0,0 +1,195 @@
+# 操作记录（详单）的追加式二进制日志：每天一个段文件，只追加不修改。每条记录为定长头部加上 roomId、userId、
+# operation、mode 的 UTF-8 字节，头部记录各字符串的长度，任意长度的 ID 都原样保存，不会截断。
+# 每个段有一个索引文件（roomId -> 记录在段中的偏移）：打开日志时载入各段的索引，只为索引之后新增的记录补建，
+# 并在换日与关闭时保存，重启后的第一次查询不需要扫描整个日志。
+# 读取时将段文件只读映射到内存，按索引直接定位记录，只解析需要的字节。
+# 启用后 USELIST 表仍同步写入，分页/流式详单等依赖 rowid 的查询继续使用 sqlite；日志只包含启用（start）之后的记录，
+# 之前的历史由 FrontDesk 从 sqlite（及归档）读取后拼接
+import os
+import mmap
+import time
+import struct
+import threading
+from array import array
+
+from Storage import format_time
+
+# roomId、userId、operation、mode 的字节数，op_ts, set_temp, now_temp, fan_speed, total_bill；之后依次为四个字符串
+HEAD = struct.Struct('<HHBBdddBd')
+SEGMENT_SUFFIX = '.ops'
+INDEX_SUFFIX = '.idx'
+# 索引文件：魔数、已建立索引的段字节数、房间数；之后每个房间为 (roomId 字节数, 记录数)、roomId、各记录偏移
+INDEX_HEAD = struct.Struct('<8sQI')
+INDEX_ENTRY = struct.Struct('<HI')
+INDEX_MAGIC = b'SAOPIDX1'
+
+def _day(op_ts):
+    return time.strftime('%Y%m%d', time.localtime(op_ts))
+
+def _encode(name, value, limit):
+    data = str(value).encode()
+    if len(data) > limit:
+        raise ValueError(f'{name} is too long for the operation log ({len(data)} bytes, limit {limit})')
+    return data
+
+class Segment:
+    """一个段文件的只读映射，以及 roomId -> 记录偏移 的索引；文件增长后增量建立索引"""
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX
+        self.mm = None
+        self.mapped = 0 # 映射的字节数
+        self.size = 0 # 已建立索引的字节数（最后一条完整记录的末尾）
+        self.saved = 0 # 索引文件覆盖的字节数
+        self.index = {} # roomId（UTF-8 字节）-> array 记录偏移
+        self._load()
+
+    def _load(self):
+        """载入索引文件；文件缺失、损坏或与段不一致时从头建立"""
+        try:
+            with open(self.index_path, 'rb') as file:
+                data = file.read()
+            magic, size, count = INDEX_HEAD.unpack_from(data)
+            if magic != INDEX_MAGIC or size > os.path.getsize(self.path):
+                return
+            index = {}
+            offset = INDEX_HEAD.size
+            for _ in range(count):
+                length, records = INDEX_ENTRY.unpack_from(data, offset)
+                offset += INDEX_ENTRY.size
+                key = data[offset:offset + length]
+                offset += length
+                offsets = index[key] = array('Q')
+                offsets.frombytes(data[offset:offset + records * offsets.itemsize])
+                offset += records * offsets.itemsize
+        except (OSError, struct.error, ValueError):
+            return
+        self.index = index
+        self.size = self.saved = size
+
+    def refresh(self):
+        size = os.path.getsize(self.path)
+        if size == self.mapped:
+            return
+        with open(self.path, 'rb') as file:
+            # 旧的映射由仍在使用它的读者持有引用，不在这里关闭
+            self.mm = mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ)
+        self.mapped = size
+        offset = self.size
+        while offset + HEAD.size <= size:
+            room_len, user_len, op_len, mode_len = HEAD.unpack_from(self.mm, offset)[:4]
+            end = offset + HEAD.size + room_len + user_len + op_len + mode_len
+            if end > size:
+                break # 尚未写完整的末尾记录
+            key = self.mm[offset + HEAD.size:offset + HEAD.size + room_len]
+            self.index.setdefault(key, array('Q')).append(offset)
+            offset = end
+        self.size = offset
+
+    def save(self):
+        """保存索引文件：先写临时文件再替换，中途失败不会留下不完整的索引"""
+        if self.size == self.saved:
+            return
+        parts = [INDEX_HEAD.pack(INDEX_MAGIC, self.size, len(self.index))]
+        for key, offsets in self.index.items():
+            parts += [INDEX_ENTRY.pack(len(key), len(offsets)), key, offsets.tobytes()]
+        temp = self.index_path + '.tmp'
+        with open(temp, 'wb') as file:
+            file.write(b''.join(parts))
+        os.replace(temp, self.index_path)
+        self.saved = self.size
+
+class OpLog:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock() # 保护追加文件与段索引
+        self.file = None # 当天的追加文件
+        self.day = None
+        self.segments = {} # 文件名 -> Segment
+        self.sealed = [] # 已换日、待保存索引的段文件名
+        self.start = 0 # 启用时刻（epoch 秒），由 Core 从 META 中设置；此前的详单只在 sqlite 中
+        # 载入各段的索引并补建其后新增的记录（上次未正常关闭时），补建的结果立即保存
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(SEGMENT_SUFFIX):
+                segment = self.segments[name] = Segment(os.path.join(directory, name))
+                segment.refresh()
+                segment.save()
+
+    def append(self, roomId, userId, op_ts, operation, set_temp, now_temp, fan_speed, mode, total_bill):
+        """追加一条记录：一次缓冲写，不经过 sqlite。字符串超过头部可记录的长度时抛出 ValueError"""
+        room = _encode('roomId', roomId, 0xFFFF)
+        user = _encode('userId', userId, 0xFFFF)
+        op = _encode('operation', operation, 0xFF)
+        md = _encode('mode', mode, 0xFF)
+        record = HEAD.pack(len(room), len(user), len(op), len(md), op_ts, float(set_temp), float(now_temp),
+                           int(fan_speed), float(total_bill)) + room + user + op + md
+        day = _day(op_ts)
+        with self.lock:
+            if day != self.day:
+                if self.file:
+                    self.file.close()
+                    self.sealed.append(self.day + SEGMENT_SUFFIX)
+                self.file = open(os.path.join(self.directory, day + SEGMENT_SUFFIX), 'ab')
+                self.day = day
+            self.file.write(record)
+
+    def flush(self):
+        """将缓冲中的记录写入文件，使读者可见；换日后写完的段在这里补全并保存索引"""
+        with self.lock:
+            if self.file:
+                self.file.flush()
+            while self.sealed:
+                self._segment(self.sealed.pop()).save()
+
+    def close(self):
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+            for name in self.sealed + ([self.day + SEGMENT_SUFFIX] if self.day else []):
+                self._segment(name).save()
+            self.sealed = []
+
+    def _segment(self, name):
+        """取段并将索引补到文件末尾；调用方持有 self.lock"""
+        segment = self.segments.get(name)
+        if segment is None:
+            segment = self.segments[name] = Segment(os.path.join(self.directory, name))
+        segment.refresh()
+        return segment
+
+    def _indexed(self, name, key):
+        """取段的当前映射与某个房间的记录偏移"""
+        with self.lock:
+            segment = self._segment(name)
+            return segment.mm, segment.index.get(key, array('Q'))[:]
+
+    def select(self, roomId, usrId=None, begin=None, end=None):
+        """房间的详单记录（可按住户、[begin, end] epoch 秒过滤），格式与 USELIST 查询结果相同"""
+        self.flush()
+        first = _day(begin) if begin is not None else ''
+        last = _day(end) if end is not None else '99999999'
+        names = sorted(name for name in os.listdir(self.directory)
+                       if name.endswith(SEGMENT_SUFFIX) and first <= name[:-len(SEGMENT_SUFFIX)] <= last)
+        key = str(roomId).encode()
+        user = str(usrId).encode() if usrId is not None else None
+        rows = []
+        for name in names:
+            mm, records = self._indexed(name, key)
+            for offset in records:
+                room_len, user_len, op_len, mode_len, op_ts, set_temp, now_temp, fan_speed, total_bill = \
+                    HEAD.unpack_from(mm, offset)
+                if (begin is not None and op_ts < begin) or (end is not None and op_ts > end):
+                    continue
+                position = offset + HEAD.size + room_len
+                userId = mm[position:position + user_len]
+                if user is not None and userId != user:
+                    continue
+                position += user_len
+                operation = mm[position:position + op_len].decode()
+                position += op_len
+                mode = mm[position:position + mode_len].decode()
+                rows.append((roomId, userId.decode(), format_time(op_ts), operation, set_temp, now_temp, fan_speed,
+                             mode, total_bill))
+        return rows
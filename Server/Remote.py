@@ -0,0 +1,345 @@
+# 多 worker 部署：核心进程持有唯一的 Core（调度、计费、存储），各 Sanic worker 只负责 WebSocket 连接，
+# 通过本地 Unix socket 调用核心。帧格式为 4 字节长度前缀 + JSON：
+#   worker -> 核心 {'id', 'method', 'data', 'stream'?} / {'id', 'ack'} / {'id', 'cancel'}
+#   核心 -> worker {'id', 'result'} / {'id', 'error'} / {'id', 'frame'} / {'id', 'end'} / {'push', 'message'}
+# push 帧由核心主动发出（调度状态变化、看板推送），key 指明 worker 上的目标连接。
+# 流式调用按信用控制流量：worker 每消费一帧回送 ack，核心最多领先 STREAM_WINDOW 帧；调用方提前结束时回送 cancel。
+# 两端写入请求、结果与推送后都等待发送缓冲区回落（drain）；核心中每个 worker 同时处理的请求超过 MAX_INFLIGHT 时
+# 暂停读取，worker 的写入随之受阻，大量调用不会使任一端的缓冲区无限增长。
+# worker 的读取循环从不等待浏览器连接：每个连接的推送进入各自长度为 PUSH_QUEUE 的队列，由独立任务发送，
+# 队列满（浏览器读取过慢或停止读取）时关闭该连接
+import os
+import json
+import struct
+import signal
+import asyncio
+import itertools
+from contextlib import aclosing
+
+import Core as cr
+
+STREAM_WINDOW = 4
+MAX_INFLIGHT = 256
+PUSH_QUEUE = 64
+
+def _write_frame(writer, frame):
+    body = json.dumps(frame).encode()
+    writer.write(struct.pack('!I', len(body)) + body)
+
+async def _send_frame(writer, frame):
+    """写入一帧并等待发送缓冲区回落到低水位以下，对端读取变慢时发送方随之变慢"""
+    _write_frame(writer, frame)
+    await writer.drain()
+
+async def _read_frame(reader):
+    """读取一帧，连接关闭时返回 None"""
+    try:
+        header = await reader.readexactly(4)
+        body = await reader.readexactly(struct.unpack('!I', header)[0])
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    return json.loads(body)
+
+class _RemoteSocket:
+    """核心进程中代表 worker 上某个连接的代理"""
+    def __init__(self, conn, key):
+        self.conn = conn
+        self.key = key
+
+    async def send(self, message):
+        await self.conn.send({'push': self.key, 'message': message})
+
+class _WorkerConnection:
+    """核心进程中与一个 worker 的连接"""
+    def __init__(self, core, connections, reader, writer):
+        self.core = core
+        self.connections = connections
+        self.reader = reader
+        self.writer = writer
+        self.loop = asyncio.get_running_loop()
+        self.subscribers = {} # key -> _RemoteSocket
+        self.streams = {} # 流式调用 id -> (处理任务, 信用 Semaphore)
+        self.inflight = asyncio.Semaphore(MAX_INFLIGHT) # 正在处理的普通调用
+        self.closed = False
+
+    async def send(self, frame):
+        """向 worker 写入一帧并等待其读取跟上；worker 已断开时忽略，由读取循环清理"""
+        if self.closed:
+            return
+        try:
+            await _send_frame(self.writer, frame)
+        except ConnectionError:
+            pass
+
+    async def run(self):
+        self.task = asyncio.current_task()
+        self.connections.add(self)
+        try:
+            while True:
+                frame = await _read_frame(self.reader)
+                if frame is None:
+                    break
+                if 'ack' in frame or 'cancel' in frame:
+                    self._control(frame)
+                    continue
+                # 每个请求独立处理，慢请求（报表、详单）不阻塞同一 worker 的其他请求。
+                # 流式调用另有信用控制且需要继续读取 ack，不计入上限
+                if not frame.get('stream'):
+                    await self.inflight.acquire()
+                self.loop.create_task(self._handle(frame))
+        finally:
+            self.closed = True
+            self.writer.close()
+            for task, _ in self.streams.values():
+                task.cancel()
+            await self._release()
+            self.connections.discard(self)
+
+    async def _release(self):
+        """worker 断开：其持有的房间按断线处理，看板订阅随之注销"""
+        for roomId, ws in list(self.core.room_ws.items()):
+            if isinstance(ws, _RemoteSocket) and ws.conn is self:
+                await self.core.release_room(roomId)
+        for ws in self.subscribers.values():
+            await self.core.unsubscribe(ws)
+
+    def _control(self, frame):
+        stream = self.streams.get(frame['id'])
+        if stream is None:
+            return
+        task, credits = stream
+        if 'ack' in frame:
+            credits.release()
+        else:
+            task.cancel()
+
+    async def _stream(self, id, method, data):
+        credits = asyncio.Semaphore(STREAM_WINDOW)
+        self.streams[id] = (asyncio.current_task(), credits)
+        try:
+            async with aclosing(self.core.stream(method, data)) as items:
+                async for item in items:
+                    await credits.acquire() # worker 尚未消费的帧达到上限时暂停生成
+                    await self.send({'id': id, 'frame': item})
+            await self.send({'id': id, 'end': True})
+        finally:
+            del self.streams[id]
+
+    async def _handle(self, frame):
+        id = frame['id']
+        method = frame['method']
+        data = frame.get('data')
+        try:
+            if frame.get('stream'):
+                await self._stream(id, method, data)
+                return
+            if method == 'attach_room':
+                result = await self.core.attach_room(data['roomId'], _RemoteSocket(self, 'room:' + data['roomId']))
+            elif method == 'release_room':
+                result = await self.core.release_room(data['roomId'])
+            elif method == 'send_room':
+                result = await self.core.send_room(data['roomId'], data['message'])
+            elif method == 'subscribe':
+                ws = self.subscribers[data['key']] = _RemoteSocket(self, data['key'])
+                result = await self.core.subscribe(ws)
+            elif method == 'unsubscribe':
+                ws = self.subscribers.pop(data['key'], None)
+                result = await self.core.unsubscribe(ws) if ws else None
+            else:
+                result = await self.core.call(method, data)
+            await self.send({'id': id, 'result': result})
+        except Exception as e:
+            print(f"Error handling {method} from worker: {e}")
+            await self.send({'id': id, 'error': f'{type(e).__name__}: {e}'})
+        finally:
+            if not frame.get('stream'):
+                self.inflight.release()
+
+def serve(path, options=None):
+    """核心进程入口：以 options 为参数创建 Core，在 path 上监听 worker 连接，直到收到 SIGTERM / SIGINT"""
+    asyncio.run(_serve(path, options or {}))
+
+async def _serve(path, options):
+    core = cr.Core(**options)
+    if os.path.exists(path):
+        os.unlink(path)
+    connections = set()
+    server = await asyncio.start_unix_server(lambda r, w: _WorkerConnection(core, connections, r, w).run(), path=path)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    print(f"Core process listening on {path}")
+    try:
+        await stop.wait()
+    finally:
+        server.close()
+        # 断开仍在的 worker 连接，等待其房间按断线处理完毕后再关闭存储
+        for conn in list(connections):
+            conn.writer.close()
+        await asyncio.gather(*(conn.task for conn in list(connections)), return_exceptions=True)
+        await core.close()
+        os.unlink(path)
+
+class _Outbox:
+    """worker 中一个连接的推送队列与发送任务"""
+    def __init__(self, key, ws):
+        self.key = key
+        self.ws = ws
+        self.queue = asyncio.Queue(PUSH_QUEUE)
+        self.overflowed = False
+        self.task = asyncio.create_task(self._run())
+
+    def put(self, message):
+        """放入一条推送；队列已满时丢弃之后的推送并关闭连接，连接的处理函数随后照常注销房间或订阅"""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            print(f"Push queue of {self.key} is full, closing the connection")
+            self.overflowed = True
+            self.task.cancel()
+            self.task = asyncio.create_task(self.ws.close(1008, 'push queue overflow'))
+
+    async def _run(self):
+        while True:
+            message = await self.queue.get()
+            try:
+                await self.ws.send(message)
+            except Exception as e:
+                print(f"Error pushing to {self.key}: {e}")
+
+    def close(self):
+        if not self.overflowed: # 关闭连接的任务需完整执行
+            self.task.cancel()
+
+class CoreClient:
+    """worker 中的核心代理，接口与 Core 相同"""
+    def __init__(self, path):
+        self.path = path
+        self.ids = itertools.count()
+        self.pending = {} # id -> Future（普通调用）或 Queue（流式调用）
+        self.outboxes = {} # push key -> 本 worker 上该连接的 _Outbox
+        self.subscriber_keys = {} # ws -> push key
+        self.reader = None
+        self.writer = None
+        self.read_task = None
+
+    async def connect(self, timeout=10):
+        """连接核心进程；核心进程刚启动时 socket 可能尚未就绪，在 timeout 秒内重试"""
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            try:
+                self.reader, self.writer = await asyncio.open_unix_connection(self.path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if asyncio.get_running_loop().time() > deadline:
+                    raise
+                await asyncio.sleep(0.1)
+        self.read_task = asyncio.create_task(self._read())
+
+    async def _read(self):
+        while True:
+            frame = await _read_frame(self.reader)
+            if frame is None:
+                break
+            if 'push' in frame:
+                outbox = self.outboxes.get(frame['push'])
+                if outbox:
+                    outbox.put(frame['message'])
+                continue
+            target = self.pending.get(frame['id'])
+            if isinstance(target, asyncio.Queue):
+                target.put_nowait(frame)
+                if 'frame' not in frame:
+                    del self.pending[frame['id']]
+            elif target:
+                del self.pending[frame['id']]
+                if target.done(): # 调用方已取消
+                    continue
+                if 'error' in frame:
+                    target.set_exception(RuntimeError(frame['error']))
+                else:
+                    target.set_result(frame['result'])
+        # 核心进程断开，未完成的调用全部失败
+        for target in self.pending.values():
+            if isinstance(target, asyncio.Queue):
+                target.put_nowait({'error': 'core process disconnected'})
+            elif not target.done():
+                target.set_exception(ConnectionError('core process disconnected'))
+        self.pending = {}
+
+    async def _request(self, id, target, frame):
+        """登记调用并发出请求帧；核心进程读取跟不上时在此等待"""
+        self.pending[id] = target
+        try:
+            await _send_frame(self.writer, frame)
+        except BaseException:
+            self.pending.pop(id, None)
+            raise
+
+    async def call(self, method, data=None):
+        id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        await self._request(id, future, {'id': id, 'method': method, 'data': data})
+        return await future
+
+    async def stream(self, method, data):
+        id = next(self.ids)
+        queue = asyncio.Queue()
+        await self._request(id, queue, {'id': id, 'method': method, 'data': data, 'stream': True})
+        try:
+            while True:
+                frame = await queue.get()
+                if 'error' in frame:
+                    raise RuntimeError(frame['error'])
+                if 'end' in frame:
+                    break
+                yield frame['frame']
+                _write_frame(self.writer, {'id': id, 'ack': True})
+        finally:
+            if self.pending.pop(id, None) is not None: # 调用方提前结束，通知核心停止生成
+                _write_frame(self.writer, {'id': id, 'cancel': True})
+
+    def _attach(self, key, ws):
+        old = self.outboxes.get(key)
+        if old:
+            old.close()
+        self.outboxes[key] = _Outbox(key, ws)
+
+    def _detach(self, key):
+        outbox = self.outboxes.pop(key, None)
+        if outbox:
+            outbox.close()
+
+    async def attach_room(self, roomId, ws):
+        self._attach('room:' + roomId, ws)
+        await self.call('attach_room', {'roomId': roomId})
+
+    async def release_room(self, roomId):
+        self._detach('room:' + roomId)
+        await self.call('release_room', {'roomId': roomId})
+
+    async def send_room(self, roomId, message):
+        await self.call('send_room', {'roomId': roomId, 'message': message})
+
+    async def subscribe(self, ws):
+        key = f'sub:{next(self.ids)}'
+        self._attach(key, ws)
+        self.subscriber_keys[ws] = key
+        await self.call('subscribe', {'key': key})
+
+    async def unsubscribe(self, ws):
+        key = self.subscriber_keys.pop(ws, None)
+        if key:
+            self._detach(key)
+            await self.call('unsubscribe', {'key': key})
+
+    async def close(self):
+        for key in list(self.outboxes):
+            self._detach(key)
+        if self.writer:
+            self.writer.close()
+        if self.read_task:
+            await self.read_task
@@ -0,0 +1,169 @@
+import threading
+
+ADJACENT_RADIUS = 5 # 相邻偏好向两侧查找的房间数
+
+def floor_number(roomId):
+    """房间号 -> (楼层, 楼层内编号)，如 '203' -> ('2', 3)；不是这种格式时楼层为房间号本身"""
+    if len(roomId) > 2 and roomId[-2:].isdigit():
+        return roomId[:-2], int(roomId[-2:])
+    return roomId, 0
+
+class RoomInfo:
+    def __init__(self, roomId, status='free', client_name=None, client_id=None, bill=0.0, stay_id=None,
+                 room_type='standard', floor=None, tariff=1.0):
+        self.roomId = roomId
+        self.status = status # 'free' or 'busy'
+        self.client_name = client_name
+        self.client_id = client_id
+        self.bill = bill
+        self.stay_id = stay_id # 当前入住的 STAY，空房时为 None
+        self.room_type = room_type
+        self.floor = floor or floor_number(roomId)[0] # 清单中未给出楼层时由房间号推断
+        self.tariff = tariff # 费率倍数
+
+class FreeRooms:
+    """空房索引：(楼层, 房型) -> 空房集合（按插入顺序的 dict），登记与移除均为 O(1)，空的分组随即删除。
+    选房只查看非空分组与相邻的几个房间号，耗时与房间总数无关。由 RoomTable 在持锁时调用"""
+    def __init__(self):
+        self.groups = {} # (floor, room_type) -> {roomId: None}，只保留非空分组
+        self.keys = {} # 空房 roomId -> 所在分组
+
+    def add(self, room):
+        key = (room.floor, room.room_type)
+        self.groups.setdefault(key, {})[room.roomId] = None
+        self.keys[room.roomId] = key
+
+    def remove(self, roomId):
+        key = self.keys.pop(roomId, None)
+        if key:
+            group = self.groups[key]
+            del group[roomId]
+            if not group:
+                del self.groups[key]
+
+    def _first(self, floor, room_type):
+        if floor is not None and room_type is not None:
+            group = self.groups.get((floor, room_type))
+            return next(iter(group)) if group else None
+        for group_floor, group_type in self.groups:
+            if (floor is None or group_floor == floor) and (room_type is None or group_type == room_type):
+                return next(iter(self.groups[group_floor, group_type]))
+        return None
+
+    def find(self, floor=None, room_type=None, near=None):
+        """按偏好选一间空房（不移除），没有符合条件的空房时返回 None。楼层与房型为硬性条件；
+        near 为希望相邻的房间号，优先选同楼层编号最接近的空房，其次同楼层，最后其他楼层"""
+        floor = str(floor) if floor is not None else None
+        if near is not None:
+            near_floor, number = floor_number(str(near)) # JSON 客户端可能以数字给出房间号
+            if floor is None or floor == near_floor:
+                for offset in range(1, ADJACENT_RADIUS + 1):
+                    for candidate in (f'{near_floor}{number - offset:02d}', f'{near_floor}{number + offset:02d}'):
+                        key = self.keys.get(candidate)
+                        if key and (room_type is None or key[1] == room_type):
+                            return candidate
+                roomId = self._first(near_floor, room_type)
+                if roomId:
+                    return roomId
+        return self._first(floor, room_type)
+
+class RoomTable:
+    """内存中的房间状态表（入住状态、住户、账单），启动时从 ROOM 表加载，是房间状态的唯一权威来源。
+    入住/退房同步写穿到数据库；账单增量由 Ledger 批量写回"""
+    def __init__(self, storage, clock):
+        self.storage = storage
+        self.clock = clock # 入住/退房时刻的时间来源
+        # 保护房间表；写穿操作在持锁期间入队，保证数据库中的写入顺序与内存一致
+        self.lock = threading.Lock()
+        self.rooms = {}
+        self.free = FreeRooms()
+        for row in storage.read(storage.select_rooms_full).result():
+            room = self.rooms[row[0]] = RoomInfo(*row)
+            if room.status == 'free':
+                self.free.add(room)
+        # stay_id 在内存中分配，入住时即可给出，不必等待写入
+        self.last_stay_id = storage.read(storage.select_max_stay_id).result()
+        self.dirty_bills = set() # 账单已变化但尚未写回的房间
+
+    def bill(self, roomId):
+        with self.lock:
+            room = self.rooms.get(roomId)
+            return room.bill if room else 0.0
+
+    def bills(self, roomIds):
+        """多个房间的当前账单 {roomId: bill}，不存在的房间为 0.0"""
+        with self.lock:
+            return {roomId: self.rooms[roomId].bill if roomId in self.rooms else 0.0 for roomId in roomIds}
+
+    def client_id(self, roomId):
+        with self.lock:
+            room = self.rooms.get(roomId)
+            return room.client_id if room else None
+
+    def tariff(self, roomId):
+        with self.lock:
+            room = self.rooms.get(roomId)
+            return room.tariff if room else 1.0
+
+    def stay_id(self, roomId):
+        with self.lock:
+            room = self.rooms.get(roomId)
+            return room.stay_id if room else None
+
+    def states(self):
+        """所有房间的 (roomId, status, bill)"""
+        with self.lock:
+            return [(room.roomId, room.status, room.bill) for room in self.rooms.values()]
+
+    def add_bill(self, roomId, money):
+        with self.lock:
+            room = self.rooms.get(roomId)
+            if room:
+                room.bill += money
+                self.dirty_bills.add(roomId)
+
+    def take_dirty_bills(self):
+        """取出待写回的账单 {roomId: bill}；调用方需持有 self.lock，并在同一临界区内提交写入"""
+        bills = {roomId: self.rooms[roomId].bill for roomId in self.dirty_bills if roomId in self.rooms}
+        self.dirty_bills = set()
+        return bills
+
+    def mark_dirty(self, roomIds):
+        """写回失败时重新标记，下一次提交时重试"""
+        with self.lock:
+            self.dirty_bills.update(roomIds)
+
+    def checkin(self, roomId, client_name, client_id, floor=None, room_type=None, near=None):
+        """入住：roomId 为 '000' 时按偏好（楼层、房型、靠近某房间，见 FreeRooms.find）自动分配空房，
+        并开始一次 STAY。返回 (房间号, stay_id, 写穿 Future)，失败时返回 (None, None, None)"""
+        with self.lock:
+            if roomId == '000': # 系统自动分配空房
+                roomId = self.free.find(floor, room_type, near)
+            room = self.rooms.get(roomId) if roomId else None
+            if not room or room.status != 'free':
+                return None, None, None
+            self.free.remove(room.roomId)
+            self.last_stay_id += 1
+            room.status = 'busy'
+            room.client_name = client_name
+            room.client_id = client_id
+            room.stay_id = self.last_stay_id
+            return room.roomId, room.stay_id, self.storage.write(self.storage.update_checkin, room.roomId, client_name,
+                                                                 client_id, room.stay_id, int(self.clock.time()))
+
+    def checkout(self, roomId):
+        """退房、结束 STAY 并清零账单。返回 (结算金额, stay_id, 写穿 Future)，房间未入住时返回 (None, None, None)"""
+        with self.lock:
+            room = self.rooms.get(roomId)
+            if not room or room.status != 'busy':
+                return None, None, None
+            bill, stay_id = room.bill, room.stay_id
+            room.status = 'free'
+            room.client_name = None
+            room.client_id = None
+            room.bill = 0.0
+            room.stay_id = None
+            self.free.add(room)
+            self.dirty_bills.discard(roomId)
+            return bill, stay_id, self.storage.write(self.storage.update_checkout, roomId, stay_id,
+                                                    int(self.clock.time()), bill)
@@ -1,23 +1,71 @@
 from sanic import Sanic
+import os
 import json
+import asyncio
+import multiprocessing
+from contextlib import aclosing
+
+import Core as cr
+import Remote as rm
+import Inventory as inv
+import Clock as cl
 
 app = Sanic("SoftAirServer")
-room_ws = {}
 
-import FrontDesk as fd
-frontDesk = fd.FrontDesk()
+PORT = int(os.environ.get('SOFTAIR_PORT', 10043))
+# SOFTAIR_WORKERS > 1 时启动多个 WebSocket worker，调度与计费运行在唯一的核心进程中，经 Unix socket 通信
+WORKERS = int(os.environ.get('SOFTAIR_WORKERS', 1))
+CORE_SOCKET = os.environ.get('SOFTAIR_CORE_SOCKET', 'softair-core.sock')
+# 设置后详单同时写入该目录下的二进制日志，整段详单查询从日志读取
+OPLOG_DIR = os.environ.get('SOFTAIR_OPLOG')
+# 设置后调度与计费按该倍数加速（用于测试场景），默认为墙上时间
+CLOCK_SPEED = os.environ.get('SOFTAIR_CLOCK_SPEED')
+# 设置后超过该天数的详单与营收明细每小时归档到 SOFTAIR_ARCHIVE 目录下的压缩文件，查询时自动合并
+RETENTION_DAYS = os.environ.get('SOFTAIR_RETENTION_DAYS')
+CORE_OPTIONS = {
+    'oplog': OPLOG_DIR,
+    'archive': os.environ.get('SOFTAIR_ARCHIVE', 'archive') if RETENTION_DAYS else None,
+    'retention_days': float(RETENTION_DAYS) if RETENTION_DAYS else None,
+    # 房间清单（CSV 或 JSON，见 Inventory.py），默认为 Server 目录下的 rooms.csv
+    'inventory': os.environ.get('SOFTAIR_INVENTORY', inv.DEFAULT_PATH),
+    'clock': cl.ScaledClock(float(CLOCK_SPEED)) if CLOCK_SPEED else None,
+    'max_serving': int(os.environ.get('SOFTAIR_MAX_SERVING', 3)), # 同时送风的房间数上限
+}
+
+core = None # Core（单 worker）或 CoreClient（多 worker），在 worker 启动时创建
+core_process = None
+
+@app.main_process_start
+async def start_core_process(*_):
+    global core_process
+    if WORKERS > 1:
+        core_process = multiprocessing.get_context('spawn').Process(target=rm.serve, args=(CORE_SOCKET, CORE_OPTIONS))
+        core_process.start()
 
-import AirconSchedule as acs
-airconSchedule = acs.AirconSchedule(room_ws)
+@app.main_process_stop
+async def stop_core_process(*_):
+    if core_process:
+        core_process.terminate() # 核心进程收到 SIGTERM 后提交剩余写入再退出
+        core_process.join()
 
-import Manager as mg
-manager = mg.Manager()
+@app.before_server_start
+async def open_core(*_):
+    global core
+    if WORKERS > 1:
+        core = rm.CoreClient(CORE_SOCKET)
+        await core.connect()
+    else:
+        core = cr.Core(**CORE_OPTIONS)
+
+@app.after_server_stop
+async def close_core(*_):
+    await core.close()
 
 @app.websocket('/ws/room')
 async def room_request(request, ws):
     roomId = request.args.get('roomId', "000")
     if roomId != "000":
-        room_ws[roomId] = ws
+        await core.attach_room(roomId, ws)
     print(f"Client connected to room: {roomId}")
     try:
         while True:
@@ -25,18 +73,17 @@ async def room_request(request, ws):
             if msg is None:
                 break
             data = json.loads(msg)
-            ret = airconSchedule.request(data)
+            ret = await core.call('room', data)
             if roomId == data['roomId']:
                 await ws.send(json.dumps(ret))
-            else: # '000': 管理员
-                if data['roomId'] in room_ws: # 指定的房间发送
-                    await room_ws[data['roomId']].send(json.dumps(ret))
+            else: # '000': 管理员，结果发往指定房间的连接（可能在其他 worker 上）
+                await core.send_room(data['roomId'], json.dumps(ret))
     except Exception as e:
         print(f"Connection error in room {roomId}: {e}")
     finally:
-        if roomId in room_ws:
-            del room_ws[roomId]
-            airconSchedule.request({'roomId': roomId, 'state': "off", 'speed': 0, 'mode': "off", 'now_temp': 0, 'set_temp': 0, 'new_request': 1})
+        if roomId != "000":
+            # 连接关闭时处理函数可能被取消，shield 保证关机请求完整执行
+            await asyncio.shield(core.release_room(roomId))
         print(f"Client disconnected from room: {roomId}")
 
 @app.websocket('/ws/checkin')
@@ -47,7 +94,7 @@ async def checkin_request(_, ws):
             if msg is None:
                 break
             data = json.loads(msg)
-            ret = frontDesk.checkin(data)
+            ret = await core.call('checkin', data)
             await ws.send(json.dumps(ret))
     except Exception as e:
         print(f"Connection error in checkin: {e}")
@@ -62,7 +109,7 @@ async def checkout_request(_, ws):
             if msg is None:
                 break
             data = json.loads(msg)
-            ret = frontDesk.checkout(data)
+            ret = await core.call('checkout', data)
             await ws.send(json.dumps(ret))
     except Exception as e:
         print(f"Connection error in checkout: {e}")
@@ -77,7 +124,7 @@ async def bill_request(_, ws):
             if msg is None:
                 break
             data = json.loads(msg)
-            ret = frontDesk.bill(data)
+            ret = await core.call('bill', data)
             await ws.send(json.dumps(ret))
     except Exception as e:
         print(f"Connection error in bill: {e}")
@@ -92,13 +139,35 @@ async def uselist_request(_, ws):
             if msg is None:
                 break
             data = json.loads(msg)
-            ret = frontDesk.userList(data)
-            await ws.send(json.dumps(ret))
+            if data.get('stream'): # 流式模式：分多帧发送结构化记录；连接中断时立即结束流
+                async with aclosing(core.stream('uselist', data)) as frames:
+                    async for frame in frames:
+                        await ws.send(json.dumps(frame))
+            else:
+                ret = await core.call('uselist', data)
+                await ws.send(json.dumps(ret))
     except Exception as e:
         print(f"Connection error in user list: {e}")
     finally:
         print("Client disconnected from user list")
 
+@app.websocket('/ws/export')
+async def export_request(_, ws):
+    try:
+        while True:
+            msg = await ws.recv()
+            if msg is None:
+                break
+            data = json.loads(msg)
+            # 逐帧发送，发送完一帧再生成下一帧；连接中断时立即结束导出
+            async with aclosing(core.stream('export', data)) as frames:
+                async for frame in frames:
+                    await ws.send(json.dumps(frame, ensure_ascii=False))
+    except Exception as e:
+        print(f"Connection error in export: {e}")
+    finally:
+        print("Client disconnected from export")
+
 @app.websocket('/ws/roominfo')
 async def roominfo_request(_, ws):
     try:
@@ -106,7 +175,7 @@ async def roominfo_request(_, ws):
             msg = await ws.recv()
             if msg is None:
                 break
-            ret = frontDesk.roomInfo()
+            ret = await core.call('roominfo')
             await ws.send(json.dumps(ret))
     except Exception as e:
         print(f"Connection error in room info: {e}")
@@ -121,7 +190,7 @@ async def manager_request(_, ws):
             if msg is None:
                 break
             data = json.loads(msg)
-            ret = manager.show(data)
+            ret = await core.call('manager', data)
             await ws.send(json.dumps(ret))
     except Exception as e:
         print(f"Connection error in manager: {e}")
@@ -136,7 +205,7 @@ async def query_room_info_request(_, ws):
             if msg is None:
                 break
             data = json.loads(msg)
-            ret = airconSchedule.queryRoomInfo(data)
+            ret = await core.call('query_room_info', data)
             await ws.send(json.dumps(ret))
     except Exception as e:
         print(f"Connection error in query room info: {e}")
@@ -150,13 +219,42 @@ async def query_schedule_request(_, ws):
             msg = await ws.recv()
             if msg is None:
                 break
-            ret = airconSchedule.querySchedule()
+            ret = await core.call('query_schedule')
             await ws.send(json.dumps(ret))
     except Exception as e:
         print(f"Connection error in query schedule: {e}")
     finally:
         print("Client disconnected from query schedule")
 
+@app.websocket('/ws/telemetry')
+async def telemetry_request(_, ws):
+    try:
+        while True:
+            msg = await ws.recv()
+            if msg is None:
+                break
+            data = json.loads(msg)
+            ret = await core.call('telemetry', data)
+            await ws.send(json.dumps(ret))
+    except Exception as e:
+        print(f"Connection error in telemetry: {e}")
+    finally:
+        print("Client disconnected from telemetry")
+
+@app.websocket('/ws/subscribe')
+async def subscribe_request(_, ws):
+    try:
+        await core.subscribe(ws) # 先发送完整快照，之后由看板推送变化
+        while True:
+            msg = await ws.recv()
+            if msg is None:
+                break
+    except Exception as e:
+        print(f"Connection error in subscribe: {e}")
+    finally:
+        await core.unsubscribe(ws)
+        print("Client disconnected from subscribe")
+
 
 if __name__ == '__main__':
-    app.run(host="0.0.0.0", port=10043)
\ No newline at end of file
+    app.run(host="0.0.0.0", port=PORT, workers=WORKERS)
\ No newline at end of file
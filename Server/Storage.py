@@ -0,0 +1,480 @@
+import sqlite3
+import threading
+import queue
+import asyncio
+import atexit
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import Migrations
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+HOUR = 3600
+DAY = 86400
+USELIST_COLUMNS = 'roomId, userId, op_time, operation, set_temp, now_temp, fan_speed, mode, total_bill'
+STAY_COLUMNS = 'stay_id, roomId, client_name, client_id, checkin_ts, checkout_ts, bill'
+EXPORT_COLUMNS = {'USELIST': USELIST_COLUMNS, 'EARNING': 'roomId, op_time, money'}
+OPLOG_START_KEY = 'oplog_start' # META 中二进制详单日志的启用时刻
+
+def format_time(op_ts):
+    """epoch 秒 -> 本地时间字符串（op_time 列的格式）"""
+    return time.strftime(TIME_FORMAT, time.localtime(op_ts))
+
+def parse_time(op_time):
+    """本地时间字符串 -> epoch 秒"""
+    return int(time.mktime(time.strptime(op_time, TIME_FORMAT)))
+
+class Storage:
+    """数据库的唯一所有者：写操作经队列交给单一写线程串行执行并合并提交，读操作使用只读连接池。
+    给出 archive（Archive.Archive）时，详单与营收查询合并已归档的历史记录"""
+    def __init__(self, path='database.db', readers=4, archive=None):
+        self.path = path
+        self.archive = archive
+
+        # 写连接只在写线程中使用（启动迁移除外）；手动管理事务以便合并提交
+        self.database = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.cursor = self.database.cursor()
+        self.cursor.execute('PRAGMA journal_mode=WAL') # 读连接不阻塞写线程
+        Migrations.migrate(self.cursor)
+
+        self.write_queue = queue.Queue()
+        self.writer_thread = threading.Thread(target=self._run_writer, daemon=True)
+        self.writer_thread.start()
+
+        self.read_pool = queue.Queue()
+        for _ in range(readers):
+            self.read_pool.put(sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False))
+        self.read_executor = ThreadPoolExecutor(max_workers=readers)
+
+        self.closed = False
+        atexit.register(self.close)
+
+    def _run_writer(self):
+        """写线程：一次取出队列中所有待写任务，每个任务一个保存点，整批一次提交"""
+        running = True
+        while running:
+            jobs = [self.write_queue.get()]
+            while True:
+                try:
+                    jobs.append(self.write_queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in jobs: # 关闭信号：处理完已入队的任务后退出
+                running = False
+                jobs = [job for job in jobs if job is not None]
+            if not jobs:
+                continue
+
+            results = []
+            try:
+                self.cursor.execute('BEGIN IMMEDIATE')
+                for future, fn, args in jobs:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    self.cursor.execute('SAVEPOINT job')
+                    try:
+                        results.append((future, fn(self.cursor, *args), None))
+                        self.cursor.execute('RELEASE job')
+                    except Exception as e: # 单个任务失败只回滚它自己
+                        self.cursor.execute('ROLLBACK TO job')
+                        self.cursor.execute('RELEASE job')
+                        results.append((future, None, e))
+                self.cursor.execute('COMMIT')
+            except sqlite3.Error as e:
+                if self.database.in_transaction:
+                    self.database.rollback()
+                results = [(future, None, e) for future, _, _ in jobs if future.running()]
+            for future, result, error in results:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    def _run_read(self, fn, args):
+        connection = self.read_pool.get()
+        try:
+            return fn(connection.cursor(), *args)
+        finally:
+            self.read_pool.put(connection)
+
+    def write(self, fn, *args) -> Future:
+        """将 fn(cursor, *args) 交给写线程执行，返回在提交后完成的 Future"""
+        future = Future()
+        self.write_queue.put((future, fn, args))
+        return future
+
+    def read(self, fn, *args) -> Future:
+        """在只读连接池中执行 fn(cursor, *args)"""
+        return self.read_executor.submit(self._run_read, fn, args)
+
+    def close(self):
+        """等待已入队的写操作提交完毕，然后关闭所有连接"""
+        if self.closed:
+            return
+        self.closed = True
+        self.write_queue.put(None)
+        self.writer_thread.join()
+        self.read_executor.shutdown()
+        while not self.read_pool.empty():
+            self.read_pool.get().close()
+        self.database.close()
+
+    # ---------------- 房间 ----------------
+    # 房间状态由 RoomTable 在内存中维护，这里只负责启动加载与写穿
+
+    @staticmethod
+    def select_rooms_full(cursor):
+        cursor.execute('''
+            SELECT roomId, status, client_name, client_id, bill, stay_id, room_type, floor, tariff FROM ROOM
+        ''')
+        return cursor.fetchall()
+
+    @staticmethod
+    def select_max_stay_id(cursor):
+        cursor.execute('SELECT MAX(stay_id) FROM STAY')
+        return cursor.fetchone()[0] or 0
+
+    @staticmethod
+    def write_inventory(cursor, rooms, key, digest):
+        """批量写入房间清单 [(roomId, floor, room_type, tariff)]：新房间为空房，已有房间只更新属性"""
+        cursor.executemany('''
+            INSERT INTO ROOM (roomId, status, floor, room_type, tariff) VALUES (?, 'free', ?, ?, ?)
+            ON CONFLICT (roomId) DO UPDATE SET floor = excluded.floor, room_type = excluded.room_type,
+                tariff = excluded.tariff
+        ''', rooms)
+        Storage.write_meta(cursor, key, digest)
+
+    @staticmethod
+    def select_meta(cursor, key):
+        cursor.execute('SELECT value FROM META WHERE key = ?', (key,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def write_meta(cursor, key, value):
+        cursor.execute('INSERT INTO META (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value',
+                       (key, value))
+
+    @staticmethod
+    def oplog_start(cursor, start):
+        """写任务：二进制详单日志的启用时刻（epoch 秒），日志只包含此后的详单。首次启用时记录 start；
+        start 为 None（未启用日志）时清除记录，未启用期间的详单不在日志中，重新启用时从新的时刻开始"""
+        value = Storage.select_meta(cursor, OPLOG_START_KEY) if start is not None else None
+        if value is None:
+            Storage.write_meta(cursor, OPLOG_START_KEY, start)
+            return start
+        return int(value)
+
+    @staticmethod
+    def update_checkin(cursor, roomId, client_name, client_id, stay_id, checkin_ts):
+        cursor.execute('''
+            UPDATE ROOM SET status = ?, client_name = ?, client_id = ?, stay_id = ?
+            WHERE roomId = ?
+        ''', ('busy', client_name, client_id, stay_id, roomId))
+        cursor.execute('''
+            INSERT INTO STAY (stay_id, roomId, client_name, client_id, checkin_ts) VALUES (?, ?, ?, ?, ?)
+        ''', (stay_id, roomId, client_name, client_id, checkin_ts))
+
+    @staticmethod
+    def update_checkout(cursor, roomId, stay_id, checkout_ts, bill):
+        cursor.execute('''
+        UPDATE ROOM SET status = 'free', client_name = NULL, client_id = NULL, bill = 0.0, stay_id = NULL
+            WHERE roomId = ?
+        ''', (roomId,))
+        cursor.execute('UPDATE STAY SET checkout_ts = ?, bill = ? WHERE stay_id = ?', (checkout_ts, bill, stay_id))
+
+    # ---------------- 入住 ----------------
+
+    @staticmethod
+    def _select_stay(cursor, stay_id):
+        cursor.execute(f'SELECT {STAY_COLUMNS} FROM STAY WHERE stay_id = ?', (stay_id,))
+        return cursor.fetchone()
+
+    async def stay(self, stay_id: int) -> tuple | None:
+        """一次入住 (stay_id, roomId, client_name, client_id, checkin_ts, checkout_ts, bill)，未退房时后两项为 None"""
+        return await asyncio.wrap_future(self.read(self._select_stay, stay_id))
+
+    @staticmethod
+    def _select_latest_stay(cursor, client_id, roomId):
+        cursor.execute(f'''
+            SELECT {STAY_COLUMNS} FROM STAY WHERE client_id = ? AND roomId = ? ORDER BY checkin_ts DESC LIMIT 1
+        ''', (client_id, roomId))
+        return cursor.fetchone()
+
+    async def latest_stay(self, client_id: str, roomId: str) -> tuple | None:
+        """住户在该房间最近的一次入住"""
+        return await asyncio.wrap_future(self.read(self._select_latest_stay, client_id, roomId))
+
+    # ---------------- 详单与营收 ----------------
+
+    @staticmethod
+    def write_ledger(cursor, earnings, uselist, bills):
+        cursor.executemany('''
+            INSERT INTO EARNING (roomId, op_time, op_ts, money, stay_id) VALUES (?, ?, ?, ?, ?)
+        ''', earnings)
+        cursor.executemany('''
+            INSERT INTO USELIST (roomId, userId, op_time, op_ts, operation, set_temp, now_temp, fan_speed, mode, total_bill,
+                                 stay_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', uselist)
+        cursor.executemany('''UPDATE ROOM SET bill = ? WHERE roomId = ?''',
+                           [(bill, roomId) for roomId, bill in bills.items()])
+        # 同一事务内维护小时/日营收汇总，先在本批内合并同一个桶
+        for table, size in (('EARNING_HOURLY', HOUR), ('EARNING_DAILY', DAY)):
+            buckets = {}
+            for roomId, _, op_ts, money, _ in earnings:
+                key = (op_ts // size * size, roomId)
+                buckets[key] = buckets.get(key, 0.0) + money
+            cursor.executemany(f'''
+                INSERT INTO {table} (bucket_ts, roomId, money) VALUES (?, ?, ?)
+                ON CONFLICT (bucket_ts, roomId) DO UPDATE SET money = money + excluded.money
+            ''', [(bucket_ts, roomId, money) for (bucket_ts, roomId), money in buckets.items()])
+
+    @staticmethod
+    def _select_uselist_by_user(cursor, usrId, roomId, before):
+        cursor.execute(f'''
+            SELECT {USELIST_COLUMNS} FROM USELIST WHERE roomId = ? AND userId = ? AND op_ts < ? ORDER BY op_ts
+        ''', (roomId, usrId, 2 ** 62 if before is None else before))
+        return cursor.fetchall()
+
+    async def uselist_by_user(self, usrId: str, roomId: str, before: int | None = None) -> list[tuple]:
+        """住户在房间的详单；给出 before 时只取此前（epoch 秒）的记录"""
+        rows = await asyncio.wrap_future(self.read(self._select_uselist_by_user, usrId, roomId, before))
+        if not self.archive:
+            return rows
+        return await self._archived(self.archive.uselist, rows, 2, roomId, usrId, None,
+                                    None if before is None else before - 1)
+
+    @staticmethod
+    def _select_uselist_by_stay(cursor, stay_id):
+        cursor.execute(f'SELECT {USELIST_COLUMNS} FROM USELIST WHERE stay_id = ? ORDER BY op_ts', (stay_id,))
+        return cursor.fetchall()
+
+    async def uselist_by_stay(self, stay: tuple) -> list[tuple]:
+        """一次入住的详单；stay 为 Storage.stay() 的结果"""
+        stay_id, roomId, _, _, checkin_ts, checkout_ts, _ = stay
+        rows = await asyncio.wrap_future(self.read(self._select_uselist_by_stay, stay_id))
+        if not self.archive:
+            return rows
+        # 归档中不带 stay_id，按入住期间该房间的记录取
+        return await self._archived(self.archive.uselist, rows, 2, roomId, None, checkin_ts, checkout_ts)
+
+    @staticmethod
+    def _select_uselist_by_room(cursor, roomId, start_time, end_time, before):
+        before = 2 ** 62 if before is None else before
+        if start_time and end_time:
+            cursor.execute(f'''
+                SELECT {USELIST_COLUMNS} FROM USELIST WHERE roomId = ? AND op_ts >= ? AND op_ts <= ? AND op_ts < ?
+                ORDER BY op_ts
+            ''', (roomId, parse_time(start_time), parse_time(end_time), before))
+        else:
+            cursor.execute(f'SELECT {USELIST_COLUMNS} FROM USELIST WHERE roomId = ? AND op_ts < ? ORDER BY op_ts',
+                           (roomId, before))
+        return cursor.fetchall()
+
+    async def uselist_by_room(self, roomId: str, start_time: str | None, end_time: str | None,
+                              before: int | None = None) -> list[tuple]:
+        """房间在时间范围内（不给出时为全部）的详单；给出 before 时只取此前（epoch 秒）的记录"""
+        rows = await asyncio.wrap_future(self.read(self._select_uselist_by_room, roomId, start_time, end_time, before))
+        if not self.archive:
+            return rows
+        begin, end = (parse_time(start_time), parse_time(end_time)) if start_time and end_time else (None, None)
+        if before is not None:
+            end = before - 1 if end is None else min(end, before - 1)
+        return await self._archived(self.archive.uselist, rows, 2, roomId, None, begin, end)
+
+    @staticmethod
+    def _select_uselist_page(cursor, roomId, usrId, start_time, end_time, after, limit, stay_id):
+        conditions = ['roomId = ?']
+        args = [roomId]
+        if stay_id is not None:
+            conditions.append('stay_id = ?')
+            args.append(stay_id)
+        elif usrId is not None:
+            conditions.append('userId = ?')
+            args.append(usrId)
+        if start_time and end_time:
+            conditions.append('op_ts >= ? AND op_ts <= ?')
+            args += [parse_time(start_time), parse_time(end_time)]
+        if after is not None: # 键集分页：从上一页最后一行 (op_ts, rowid) 之后继续
+            conditions.append('(op_ts, rowid) > (?, ?)')
+            args += list(after)
+        cursor.execute(f'''
+            SELECT op_ts, rowid, {USELIST_COLUMNS} FROM USELIST WHERE {' AND '.join(conditions)}
+            ORDER BY op_ts, rowid LIMIT ?
+        ''', args + [limit])
+        rows = cursor.fetchall()
+        next_after = (rows[-1][0], rows[-1][1]) if len(rows) == limit else None
+        return [row[2:] for row in rows], next_after
+
+    async def uselist_page(self, roomId: str, usrId: str | None, start_time: str | None, end_time: str | None,
+                           after: tuple[int, int] | None, limit: int,
+                           stay_id: int | None = None) -> tuple[list[tuple], tuple[int, int] | None]:
+        """按 (op_ts, rowid) 顺序取一页详单，返回 (rows, 下一页起点)；没有下一页时起点为 None。给出 stay_id 时只取该次入住"""
+        return await asyncio.wrap_future(self.read(self._select_uselist_page, roomId, usrId, start_time, end_time,
+                                                   after, limit, stay_id))
+
+    @staticmethod
+    def _select_earning(cursor, start_time, end_time):
+        if start_time and end_time:
+            cursor.execute('''
+                SELECT roomId, op_time, money FROM EARNING WHERE op_ts >= ? AND op_ts <= ? ORDER BY op_ts
+            ''', (parse_time(start_time), parse_time(end_time)))
+        else:
+            cursor.execute('SELECT roomId, op_time, money FROM EARNING ORDER BY op_ts')
+        return cursor.fetchall()
+
+    async def earning(self, start_time: str | None, end_time: str | None) -> list[tuple]:
+        rows = await asyncio.wrap_future(self.read(self._select_earning, start_time, end_time))
+        if not self.archive:
+            return rows
+        begin, end = (parse_time(start_time), parse_time(end_time)) if start_time and end_time else (None, None)
+        return await self._archived(self.archive.earning, rows, 1, begin, end)
+
+    @staticmethod
+    def _select_export_page(cursor, table, begin, end, after, limit):
+        conditions = []
+        args = []
+        if begin is not None:
+            conditions.append('op_ts >= ?')
+            args.append(begin)
+        if end is not None:
+            conditions.append('op_ts <= ?')
+            args.append(end)
+        if after is not None:
+            conditions.append('(op_ts, rowid) > (?, ?)')
+            args += list(after)
+        cursor.execute(f'''
+            SELECT op_ts, rowid, {EXPORT_COLUMNS[table]} FROM {table} WHERE {' AND '.join(conditions) or 1}
+            ORDER BY op_ts, rowid LIMIT ?
+        ''', args + [limit])
+        rows = cursor.fetchall()
+        next_after = (rows[-1][0], rows[-1][1]) if len(rows) == limit else None
+        return [row[2:] for row in rows], next_after
+
+    async def export_page(self, table: str, begin: int | None, end: int | None, after: tuple[int, int] | None,
+                          limit: int) -> tuple[list[tuple], tuple[int, int] | None]:
+        """按 (op_ts, rowid) 顺序取 table（USELIST 或 EARNING）在 [begin, end] 内的一页记录，返回 (rows, 下一页起点)"""
+        return await asyncio.wrap_future(self.read(self._select_export_page, table, begin, end, after, limit))
+
+    @staticmethod
+    def _sum_range(cursor, table, column, begin, end, room_earn):
+        """将 table 中 column 落在 [begin, end) 的营收按房间累加到 room_earn，返回其中最早的 column 值，没有记录时为 None"""
+        if begin >= end:
+            return None
+        cursor.execute(f'''
+            SELECT roomId, SUM(money), MIN({column}) FROM {table} WHERE {column} >= ? AND {column} < ? GROUP BY roomId
+        ''', (begin, end))
+        first = None
+        for roomId, money, room_first in cursor.fetchall():
+            room_earn[roomId] = room_earn.get(roomId, 0.0) + money
+            first = room_first if first is None else min(first, room_first)
+        return first
+
+    @staticmethod
+    def _sum_detail(cursor, begin, end, room_earn, edges):
+        """扫描 [begin, end) 的营收明细；edges 不为 None 时记录 (begin, end, 数据库中最早的 op_ts)，供合并归档"""
+        first = Storage._sum_range(cursor, 'EARNING', 'op_ts', begin, end, room_earn)
+        if edges is not None and begin < end:
+            edges.append((begin, end, first))
+
+    @staticmethod
+    def _select_revenue(cursor, start_time, end_time, edges=None):
+        room_earn = {}
+        if not (start_time and end_time):
+            cursor.execute('SELECT roomId, SUM(money) FROM EARNING_DAILY GROUP BY roomId')
+            return dict(cursor.fetchall())
+        begin, end = parse_time(start_time), parse_time(end_time) + 1 # 闭区间转为半开区间
+        # 区间拆分：两端不足一小时的部分扫描明细，其余用整小时桶，其中的整日部分用日桶
+        hour_begin = -(-begin // HOUR) * HOUR
+        hour_end = end // HOUR * HOUR
+        if hour_begin >= hour_end:
+            Storage._sum_detail(cursor, begin, end, room_earn, edges)
+            return room_earn
+        Storage._sum_detail(cursor, begin, hour_begin, room_earn, edges)
+        Storage._sum_detail(cursor, hour_end, end, room_earn, edges)
+        day_begin = -(-hour_begin // DAY) * DAY
+        day_end = hour_end // DAY * DAY
+        if day_begin >= day_end:
+            Storage._sum_range(cursor, 'EARNING_HOURLY', 'bucket_ts', hour_begin, hour_end, room_earn)
+            return room_earn
+        Storage._sum_range(cursor, 'EARNING_HOURLY', 'bucket_ts', hour_begin, day_begin, room_earn)
+        Storage._sum_range(cursor, 'EARNING_HOURLY', 'bucket_ts', day_end, hour_end, room_earn)
+        Storage._sum_range(cursor, 'EARNING_DAILY', 'bucket_ts', day_begin, day_end, room_earn)
+        return room_earn
+
+    async def revenue(self, start_time: str | None, end_time: str | None) -> dict[str, float]:
+        """各房间在 [start_time, end_time] 内的营收合计，不给出时间范围时为全部历史"""
+        edges = [] if self.archive else None
+        room_earn = await asyncio.wrap_future(self.read(self._select_revenue, start_time, end_time, edges))
+        # 汇总表不归档，两端扫描的明细则可能已移入归档：落在已归档日期的一段从归档补上数据库中第一条记录之前的营收，
+        # 与 _archived 相同，两次读取之间被归档的记录按数据库中的第一条记录去重
+        for begin, end, first in edges or ():
+            last = (end if first is None else first) - 1
+            if begin <= last and time.strftime('%Y%m%d', time.localtime(begin)) <= self.archive.last_day('EARNING'):
+                archived = await asyncio.wrap_future(self.read_executor.submit(self.archive.earning, begin, last))
+                for roomId, _, money in archived:
+                    room_earn[roomId] = room_earn.get(roomId, 0.0) + money
+        return room_earn
+
+    # ---------------- 历史归档 ----------------
+    # 超出保留期的详单与营收明细移入归档文件（见 Archive.py），数据库只保留近期数据；
+    # 营收汇总表不归档，营收统计仍覆盖全部历史。删除后的空闲页由后续写入复用，数据库大小保持稳定
+
+    def archive_day(self, cursor, cutoff):
+        """写任务：将 cutoff 之前最早一天的 USELIST / EARNING 记录移入归档，返回移动的行数，没有可归档的记录时为 0。
+        归档文件先于事务提交写入（读者总能在数据库或归档中找到这些记录），提交失败时这一天会在下次重新归档，
+        归档按天替换之前写入的内容，不会重复"""
+        cursor.execute('SELECT MIN(op_ts) FROM (SELECT MIN(op_ts) AS op_ts FROM USELIST UNION ALL '
+                       'SELECT MIN(op_ts) FROM EARNING)')
+        first = cursor.fetchone()[0]
+        if first is None or first >= cutoff:
+            return 0
+        day = time.localtime(first)
+        end = min(cutoff, int(time.mktime((day.tm_year, day.tm_mon, day.tm_mday + 1, 0, 0, 0, 0, 0, -1))))
+        cursor.execute(f'SELECT op_ts, {USELIST_COLUMNS} FROM USELIST WHERE op_ts < ? ORDER BY op_ts', (end,))
+        uselist = cursor.fetchall()
+        cursor.execute('SELECT op_ts, roomId, op_time, money FROM EARNING WHERE op_ts < ? ORDER BY op_ts', (end,))
+        earning = cursor.fetchall()
+        self.archive.append('USELIST', time.strftime('%Y%m%d', day), uselist)
+        self.archive.append('EARNING', time.strftime('%Y%m%d', day), earning)
+        cursor.execute('DELETE FROM USELIST WHERE op_ts < ?', (end,))
+        cursor.execute('DELETE FROM EARNING WHERE op_ts < ?', (end,))
+        return len(uselist) + len(earning)
+
+    async def _archived(self, fn, rows, time_column, *args):
+        """在 rows（数据库中按时间排序的结果）之前补上 fn(*args, begin, end) 取出的归档记录。
+        先查数据库再查归档：两次读取之间被归档的记录在数据库结果中已有，按第一行的时间截去归档中的重复部分"""
+        *args, begin, end = args
+        if rows:
+            first = parse_time(rows[0][time_column]) - 1
+            end = first if end is None else min(end, first)
+        archived = await asyncio.wrap_future(self.read_executor.submit(fn, *args, begin, end))
+        return archived + rows
+
+    # ---------------- 温度遥测 ----------------
+
+    @staticmethod
+    def write_telemetry(cursor, minutes, hours):
+        # 同一个桶可能分多次写入（关闭服务时写入未结束的桶），按累加方式合并
+        for table, rows in (('TELEMETRY_MINUTE', minutes), ('TELEMETRY_HOUR', hours)):
+            cursor.executemany(f'''
+                INSERT INTO {table} (roomId, bucket_ts, samples, now_sum, now_min, now_max, set_temp)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (roomId, bucket_ts) DO UPDATE SET
+                    samples = samples + excluded.samples, now_sum = now_sum + excluded.now_sum,
+                    now_min = MIN(now_min, excluded.now_min), now_max = MAX(now_max, excluded.now_max),
+                    set_temp = excluded.set_temp
+            ''', rows)
+
+    @staticmethod
+    def _select_telemetry(cursor, table, roomId, begin, end):
+        cursor.execute(f'''
+            SELECT bucket_ts, samples, now_sum, now_min, now_max, set_temp FROM {table}
+            WHERE roomId = ? AND bucket_ts >= ? AND bucket_ts <= ? ORDER BY bucket_ts
+        ''', (roomId, begin, end))
+        return cursor.fetchall()
+
+    async def telemetry(self, table: str, roomId: str, begin: int, end: int) -> list[tuple]:
+        """房间在 [begin, end] 内的遥测汇总桶，table 为 TELEMETRY_MINUTE 或 TELEMETRY_HOUR"""
+        return await asyncio.wrap_future(self.read(self._select_telemetry, table, roomId, begin, end))
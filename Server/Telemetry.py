@@ -0,0 +1,183 @@
+import asyncio
+from array import array
+
+from Storage import parse_time
+
+MINUTE = 60
+HOUR = 3600
+
+class RoomSeries:
+    """单个房间最近的温度采样：定长环形缓冲，三列分别存放在 array 中，写满后覆盖最旧的采样"""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.ts = array('d', bytes(8 * capacity))
+        self.now_temp = array('d', bytes(8 * capacity))
+        self.set_temp = array('d', bytes(8 * capacity))
+        self.head = 0 # 下一个写入位置
+        self.count = 0
+
+    def append(self, ts, now_temp, set_temp):
+        self.ts[self.head] = ts
+        self.now_temp[self.head] = now_temp
+        self.set_temp[self.head] = set_temp
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def samples(self, begin, end):
+        """按时间顺序返回 [begin, end] 内的 (ts, now_temp, set_temp)"""
+        start = (self.head - self.count) % self.capacity
+        result = []
+        for i in range(self.count):
+            index = (start + i) % self.capacity
+            if begin <= self.ts[index] <= end:
+                result.append((self.ts[index], self.now_temp[index], self.set_temp[index]))
+        return result
+
+def _new_bucket(bucket_ts, now_temp, set_temp):
+    # [桶起点, 采样数, now_temp 之和, 最小值, 最大值, 最后一次的 set_temp]
+    return [bucket_ts, 0, 0.0, now_temp, now_temp, set_temp]
+
+def _merge(bucket, samples, now_sum, now_min, now_max, set_temp):
+    bucket[1] += samples
+    bucket[2] += now_sum
+    bucket[3] = min(bucket[3], now_min)
+    bucket[4] = max(bucket[4], now_max)
+    bucket[5] = set_temp
+
+class Telemetry:
+    """房间温度遥测：最近的原始采样保存在每个房间的环形缓冲中，并在内存中汇总为分钟/小时桶，
+    桶结束后定期批量写入 TELEMETRY_MINUTE / TELEMETRY_HOUR。详单（USELIST）只记录状态变化"""
+    def __init__(self, storage, clock, capacity=720, flush_interval=60):
+        self.storage = storage
+        self.clock = clock # 按时钟时间结束分钟/小时桶
+        self.capacity = capacity # 每个房间保留的原始采样数
+        self.flush_interval = flush_interval
+
+        self.series = {} # roomId -> RoomSeries
+        self.minutes = {} # roomId -> 未结束的分钟桶
+        self.hours = {} # roomId -> 未结束的小时桶
+        self.pending_minutes = [] # 已结束、尚未写入的 (roomId, 桶...)，提交成功后才移除
+        self.pending_hours = []
+        # 串行化写入，并使查询不会在提交完成、尚未移出待写入列表时把同一个桶计算两次
+        self.lock = asyncio.Lock()
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    def record(self, roomId, op_ts, now_temp, set_temp):
+        now_temp = float(now_temp)
+        set_temp = float(set_temp)
+        series = self.series.get(roomId)
+        if series is None:
+            series = self.series[roomId] = RoomSeries(self.capacity)
+        series.append(op_ts, now_temp, set_temp)
+
+        minute_ts = int(op_ts) // MINUTE * MINUTE
+        bucket = self.minutes.get(roomId)
+        if bucket and bucket[0] != minute_ts:
+            self._close_minute(roomId)
+            bucket = None
+        if bucket is None:
+            bucket = self.minutes[roomId] = _new_bucket(minute_ts, now_temp, set_temp)
+        _merge(bucket, 1, now_temp, now_temp, now_temp, set_temp)
+
+    def _close_minute(self, roomId):
+        """结束分钟桶，并入所在的小时桶"""
+        bucket = self.minutes.pop(roomId)
+        self.pending_minutes.append((roomId, *bucket))
+        hour_ts = bucket[0] // HOUR * HOUR
+        hour = self.hours.get(roomId)
+        if hour and hour[0] != hour_ts:
+            self._close_hour(roomId)
+            hour = None
+        if hour is None:
+            hour = self.hours[roomId] = _new_bucket(hour_ts, bucket[3], bucket[5])
+        _merge(hour, *bucket[1:])
+
+    def _close_hour(self, roomId):
+        self.pending_hours.append((roomId, *self.hours.pop(roomId)))
+
+    async def flush(self, now=None):
+        """结束 now 之前的桶（now 为 None 时结束全部）并批量写入；写入失败时桶留在待写入列表中，下次重试"""
+        for roomId, bucket in list(self.minutes.items()):
+            if now is None or bucket[0] + MINUTE <= now:
+                self._close_minute(roomId)
+        for roomId, bucket in list(self.hours.items()):
+            if now is None or bucket[0] + HOUR <= now:
+                self._close_hour(roomId)
+        async with self.lock:
+            # 写入期间结束的桶追加在列表末尾，提交成功后只移除已写入的部分
+            minutes, hours = self.pending_minutes[:], self.pending_hours[:]
+            if not minutes and not hours:
+                return
+            try:
+                await asyncio.wrap_future(self.storage.write(self.storage.write_telemetry, minutes, hours))
+            except Exception as e:
+                print(f"Error flushing telemetry: {e!r}")
+                return
+            del self.pending_minutes[:len(minutes)]
+            del self.pending_hours[:len(hours)]
+
+    async def _run(self):
+        while True:
+            await self.clock.sleep(self.flush_interval)
+            await self.flush(self.clock.time())
+
+    async def close(self):
+        """停止定期写入，并写入所有尚未结束的桶"""
+        # 不在提交中途取消：取消不会撤回已交给存储线程的写入，桶会在下面再写入一次
+        async with self.lock:
+            self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        await self.flush()
+
+    async def query(self, data):
+        """温度曲线：resolution 为 'raw'（内存中的最近采样）、'minute' 或 'hour'，时间范围可选"""
+        roomId = data['roomId']
+        resolution = data.get('resolution', 'raw')
+        begin = parse_time(data['start_time']) if data.get('start_time') else 0
+        end = parse_time(data['end_time']) if data.get('end_time') else float('inf')
+        if resolution == 'raw':
+            series = self.series.get(roomId)
+            samples = series.samples(begin, end) if series else []
+            return {
+                'roomId': roomId,
+                'resolution': resolution,
+                'samples': [{'ts': ts, 'now_temp': now_temp, 'set_temp': set_temp} for ts, now_temp, set_temp in samples]
+            }
+
+        if resolution == 'minute':
+            table, pending, open_buckets = 'TELEMETRY_MINUTE', self.pending_minutes, self.minutes
+        else:
+            table, pending, open_buckets = 'TELEMETRY_HOUR', self.pending_hours, self.hours
+        # 已写入的桶与内存中尚未写入的桶合并（重启后同一个桶可能两边都有）
+        buckets = {}
+        async with self.lock:
+            rows = await self.storage.telemetry(table, roomId, begin, min(end, 2 ** 62))
+            memory = [row[1:] for row in pending if row[0] == roomId]
+        if roomId in open_buckets:
+            memory.append(open_buckets[roomId])
+        if resolution == 'hour' and roomId in self.minutes: # 未结束的分钟桶尚未并入小时桶
+            minute = self.minutes[roomId]
+            memory.append([minute[0] // HOUR * HOUR, *minute[1:]])
+        for row in list(rows) + memory:
+            bucket_ts = row[0]
+            if not begin <= bucket_ts <= end:
+                continue
+            if bucket_ts in buckets:
+                _merge(buckets[bucket_ts], *row[1:])
+            else:
+                buckets[bucket_ts] = list(row)
+        return {
+            'roomId': roomId,
+            'resolution': resolution,
+            'samples': [{
+                'ts': bucket_ts,
+                'samples': samples,
+                'now_avg': round(now_sum / samples, 2),
+                'now_min': now_min,
+                'now_max': now_max,
+                'set_temp': set_temp
+            } for bucket_ts, samples, now_sum, now_min, now_max, set_temp in sorted(buckets.values()) if samples]
+        }
@@ -0,0 +1,63 @@
+# 自动分配空房（roomId 为 '000'）的入住耗时随房间总数的变化：对比线性扫描房间表（旧实现）与空房索引
+# 用法（在 Server 目录下）：python benchmark/checkin_benchmark.py [房间数 ...]
+import os
+import sys
+import time
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import Storage as st
+import RoomTable as rt
+import Inventory as inv
+import Clock as cl
+from synthetic import room_ids, write_inventory
+
+CHECKINS = 2000
+
+def scan_checkin(rooms):
+    """旧实现：按顺序扫描房间表找第一间空房，写穿方式相同"""
+    with rooms.lock:
+        room = next(room for room in rooms.rooms.values() if room.status == 'free')
+        room.status = 'busy'
+        rooms.free.remove(room.roomId)
+        rooms.storage.write(rooms.storage.update_checkin, room.roomId, 'bench', 'bench', None, int(time.time()))
+    return room.roomId
+
+def measure(count, checkin):
+    """先入住 90% 的房间，再测量剩余房间中的入住/退房循环，返回单次入住耗时（微秒）的中位数与 p99"""
+    directory = tempfile.mkdtemp()
+    storage = st.Storage(os.path.join(directory, 'bench.db'))
+    ids = room_ids(count)
+    write_inventory(os.path.join(directory, 'rooms.csv'), ids)
+    inv.load(storage, os.path.join(directory, 'rooms.csv'))
+    rooms = rt.RoomTable(storage, cl.RealClock())
+    for roomId in ids[:count * 9 // 10]:
+        rooms.checkin(roomId, 'bench', 'bench')
+    durations = []
+    for i in range(CHECKINS):
+        begin = time.perf_counter()
+        roomId = checkin(rooms, ids[i * 7919 % len(ids)])
+        durations.append((time.perf_counter() - begin) * 1e6)
+        with rooms.lock: # 退房：恢复空房，保持空房数量不变
+            room = rooms.rooms[roomId]
+            room.status = 'free'
+            rooms.free.add(room)
+    storage.close()
+    return statistics.median(durations), statistics.quantiles(durations, n=100, method='inclusive')[98]
+
+def main(counts):
+    # 第二个参数为本次入住希望靠近的房间
+    cases = [
+        ('线性扫描', lambda rooms, _: scan_checkin(rooms)),
+        ('空房索引', lambda rooms, _: rooms.checkin('000', 'bench', 'bench')[0]),
+        ('索引+相邻偏好', lambda rooms, near: rooms.checkin('000', 'bench', 'bench', near=near)[0]),
+    ]
+    print(f"{'房间数':>8} {'方式':<14} {'p50(us)':>9} {'p99(us)':>9}")
+    for count in counts:
+        for name, checkin in cases:
+            p50, p99 = measure(count, checkin)
+            print(f'{count:>8} {name:<14} {p50:>9.2f} {p99:>9.2f}')
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000])
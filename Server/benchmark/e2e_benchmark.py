@@ -0,0 +1,418 @@
+# 端到端 WebSocket 基准：以临时目录中的临时数据库启动 Server.py，打开大量房间、前台与管理员连接，按接近实际的比例
+# 发出请求，记录各路由的应答延迟分布，以及调度推送（"on" / "off" / 计费）的送达延迟，输出可逐次比较的报告。
+# 服务端使用墙上时间（不加速），推送中的 ts 为该推送应发出的时刻，送达延迟 = 收到时刻 - ts
+# 用法（在 Server 目录下）：
+#   python benchmark/e2e_benchmark.py --rooms 100 1000 --max-serving 3 100 --duration 30 -o e2e.json
+#   python benchmark/e2e_benchmark.py --rooms 100 1000 --max-serving 3 100 --duration 30 --baseline e2e.json
+# 房间数与服务上限的每个组合各启动一次服务。压测端与服务端在同一台机器上，压测端事件循环的延迟记为 harness/loop-lag，
+# 该值明显增大时结果受压测端自身的限制
+import os
+import sys
+import json
+import time
+import random
+import signal
+import socket
+import asyncio
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+
+from websockets.asyncio.client import connect
+
+import synthetic
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Server.py')
+BUCKETS_MS = [0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000] # 直方图各桶的上界，最后一桶为超出部分
+TIMEOUT = 10.0 # 单次请求等待答复的最长秒数
+CONNECT_CONCURRENCY = 200 # 同时建立的连接数
+P99_MIN_COUNT = 100 # 样本数不足时 p99 不稳定，与基线比较时只比较 p50
+# 房间操作的比例：温度上报、调风速、调设定温度、开关机
+ROOM_MIX = [('report', 0.5), ('speed', 0.2), ('set_temp', 0.15), ('power', 0.15)]
+# 前台与管理员请求的比例
+DESK_MIX = [('bill', 0.7), ('uselist', 0.3)]
+ADMIN_MIX = [('query_schedule', 0.4), ('query_room_info', 0.3), ('roominfo', 0.15), ('manager', 0.15)]
+
+class Histogram:
+    def __init__(self):
+        self.samples = [] # 秒
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+
+    def summary(self, duration):
+        samples = sorted(sample * 1000 for sample in self.samples)
+        buckets = [0] * (len(BUCKETS_MS) + 1)
+        bound = 0
+        for sample in samples:
+            while bound < len(BUCKETS_MS) and sample > BUCKETS_MS[bound]:
+                bound += 1
+            buckets[bound] += 1
+        if len(samples) > 1:
+            quantiles = statistics.quantiles(samples, n=100, method='inclusive')
+            p90, p99 = quantiles[89], quantiles[98]
+        else: # 只有一个样本时各分位数都是该样本
+            p90 = p99 = samples[0]
+        return {'count': len(samples), 'rate_per_s': len(samples) / duration, 'p50_ms': statistics.median(samples),
+                'p90_ms': p90, 'p99_ms': p99, 'max_ms': samples[-1], 'buckets': buckets}
+
+class Recorder:
+    """按路由记录延迟与错误"""
+    def __init__(self):
+        self.routes = {}
+        self.errors = {}
+
+    def add(self, route, seconds):
+        self.routes.setdefault(route, Histogram()).add(seconds)
+
+    def error(self, route):
+        self.errors[route] = self.errors.get(route, 0) + 1
+
+    def summary(self, duration):
+        routes = {route: histogram.summary(duration) for route, histogram in sorted(self.routes.items())
+                  if histogram.samples}
+        for route, count in self.errors.items():
+            routes.setdefault(route, {'count': 0})['errors'] = count
+        return routes
+
+def choose(rng, mix):
+    return rng.choices([name for name, _ in mix], [weight for _, weight in mix])[0]
+
+class Channel:
+    """请求与答复一一对应的连接（前台、管理员路由），记录每次请求的应答延迟"""
+    def __init__(self, url, route, recorder):
+        self.url = url
+        self.route = route
+        self.recorder = recorder
+        self.ws = None
+
+    async def open(self):
+        self.ws = await connect(f'{self.url}/ws/{self.route}', max_size=None)
+        return self
+
+    async def request(self, data=None, name=None):
+        name = name or self.route
+        begin = time.perf_counter()
+        try:
+            await self.ws.send(json.dumps(data or {}))
+            ret = json.loads(await asyncio.wait_for(self.ws.recv(), TIMEOUT))
+        except Exception:
+            self.recorder.error(name)
+            return None
+        self.recorder.add(name, time.perf_counter() - begin)
+        return ret
+
+    async def close(self):
+        if self.ws:
+            await self.ws.close()
+
+class RoomClient:
+    """一个房间的 /ws/room 连接：同一时刻只有一个请求等待答复，没有 ts 的消息为答复，带 ts 的为调度推送"""
+    def __init__(self, url, roomId, recorder, rng):
+        self.url = url
+        self.roomId = roomId
+        self.recorder = recorder
+        self.rng = rng
+        self.ws = None
+        self.reader = None
+        self.reply = None
+        self.power_on = False
+        self.serving = False # 按答复与推送判断是否正在送风，用于区分 "on" 推送（恢复送风）与计费推送
+        self.speed = rng.randrange(3)
+        self.set_temp = float(rng.randint(18, 25))
+        self.now_temp = round(rng.uniform(26.0, 32.0), 1)
+
+    async def open(self):
+        begin = time.perf_counter()
+        self.ws = await connect(f'{self.url}/ws/room?roomId={self.roomId}')
+        self.recorder.add('room/connect', time.perf_counter() - begin)
+        self.reader = asyncio.create_task(self._read())
+
+    async def _read(self):
+        async for message in self.ws:
+            received = time.time()
+            msg = json.loads(message)
+            if 'ts' in msg:
+                kind = 'off' if msg['state'] == 'off' else ('bill' if self.serving else 'on')
+                self.serving = msg['state'] != 'off'
+                self.recorder.add(f'push/{kind}', received - msg['ts'])
+            elif self.reply and not self.reply.done():
+                self.reply.set_result(msg)
+
+    async def request(self, name, new_request):
+        data = {'roomId': self.roomId, 'state': 'on' if self.power_on else 'off', 'speed': self.speed,
+                'now_temp': self.now_temp, 'set_temp': self.set_temp, 'mode': 'cool', 'new_request': new_request}
+        self.reply = asyncio.get_running_loop().create_future()
+        begin = time.perf_counter()
+        try:
+            await self.ws.send(json.dumps(data))
+            ret = await asyncio.wait_for(self.reply, TIMEOUT)
+        except Exception:
+            self.recorder.error(f'room/{name}')
+            return
+        self.recorder.add(f'room/{name}', time.perf_counter() - begin)
+        if new_request:
+            self.serving = ret['state'] == 'on'
+
+    async def operate(self):
+        operation = choose(self.rng, ROOM_MIX)
+        if operation == 'report':
+            self.now_temp = round(self.now_temp + self.rng.uniform(-0.5, 0.5), 1)
+            await self.request('report', 0)
+        elif operation == 'speed':
+            self.speed = self.rng.randrange(3)
+            await self.request('speed', 1)
+        elif operation == 'set_temp':
+            self.set_temp = float(self.rng.randint(18, 25))
+            await self.request('set_temp', 0)
+        else:
+            self.power_on = not self.power_on
+            await self.request('on' if self.power_on else 'off', 1)
+
+    async def run(self, stop, ramp, interval):
+        """ramp 秒内随机时刻开机，之后平均每 interval 秒一次操作，直到 stop 置位"""
+        await asyncio.sleep(self.rng.uniform(0, ramp))
+        self.power_on = True
+        await self.request('on', 1)
+        while not stop.is_set():
+            await asyncio.sleep(self.rng.expovariate(1 / interval))
+            if not stop.is_set():
+                await self.operate()
+
+    async def close(self):
+        if self.ws:
+            await self.ws.close()
+        if self.reader:
+            await asyncio.gather(self.reader, return_exceptions=True)
+
+async def desk(url, roomIds, recorder, rng, stop, interval):
+    """前台：查询账单与分页详单"""
+    bill, uselist = await Channel(url, 'bill', recorder).open(), await Channel(url, 'uselist', recorder).open()
+    while not stop.is_set():
+        await asyncio.sleep(rng.expovariate(1 / interval))
+        roomId = rng.choice(roomIds)
+        if choose(rng, DESK_MIX) == 'bill':
+            await bill.request({'roomId': roomId})
+        else:
+            await uselist.request({'type': 'room', 'roomId': roomId, 'start_time': None, 'end_time': None,
+                                   'page_size': 50})
+    await bill.close()
+    await uselist.close()
+
+async def admin(url, recorder, rng, stop, interval, dashboard):
+    """管理员：查询调度队列、房间状态与营收报表，并订阅看板推送（只计数）"""
+    channels = {route: await Channel(url, route, recorder).open() for route, _ in ADMIN_MIX}
+    subscriber = await connect(f'{url}/ws/subscribe', max_size=None)
+
+    async def watch():
+        async for _ in subscriber:
+            dashboard[0] += 1
+    watching = asyncio.create_task(watch())
+    while not stop.is_set():
+        await asyncio.sleep(rng.expovariate(1 / interval))
+        route = choose(rng, ADMIN_MIX)
+        if route == 'query_room_info':
+            await channels[route].request({'roomId': 'all'})
+        elif route == 'manager':
+            await channels[route].request({'format': 'json'})
+        else:
+            await channels[route].request()
+    await subscriber.close()
+    await asyncio.gather(watching, return_exceptions=True)
+    for channel in channels.values():
+        await channel.close()
+
+async def loop_lag(recorder, stop, period=0.01):
+    """压测端事件循环的调度延迟"""
+    while not stop.is_set():
+        begin = time.perf_counter()
+        await asyncio.sleep(period)
+        recorder.add('harness/loop-lag', time.perf_counter() - begin - period)
+
+async def gather_limited(coroutines, limit):
+    semaphore = asyncio.Semaphore(limit)
+
+    async def limited(coroutine):
+        async with semaphore:
+            return await coroutine
+    return await asyncio.gather(*(limited(coroutine) for coroutine in coroutines), return_exceptions=True)
+
+async def _sequential(channel, requests):
+    for data in requests:
+        await channel.request(data)
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+async def start_server(directory, rooms, max_serving, workers):
+    """在 directory 中启动服务（数据库与日志均在其中），等到可以连接为止，返回 (进程, url)"""
+    inventory = os.path.join(directory, 'rooms.csv')
+    synthetic.write_inventory(inventory, synthetic.room_ids(rooms))
+    port = free_port()
+    env = dict(os.environ, SOFTAIR_PORT=str(port), SOFTAIR_INVENTORY=inventory, SOFTAIR_MAX_SERVING=str(max_serving),
+               SOFTAIR_WORKERS=str(workers), SOFTAIR_CORE_SOCKET=os.path.join(directory, 'core.sock'))
+    env.pop('SOFTAIR_CLOCK_SPEED', None) # 推送送达延迟按墙上时间计算
+    with open(os.path.join(directory, 'server.log'), 'w') as log:
+        process = subprocess.Popen([sys.executable, os.path.abspath(SERVER)], cwd=directory, env=env, stdout=log,
+                                   stderr=subprocess.STDOUT, start_new_session=True)
+    url = f'ws://127.0.0.1:{port}'
+    deadline = time.monotonic() + 60
+    while True:
+        try:
+            ws = await connect(f'{url}/ws/query_schedule')
+            await ws.close()
+            return process, url
+        except OSError:
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise SystemExit(f'服务启动失败，见 {directory}/server.log')
+            await asyncio.sleep(0.2)
+
+def stop_server(process):
+    os.killpg(process.pid, signal.SIGINT)
+    try:
+        process.wait(30)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+
+async def run_once(args, rooms, max_serving):
+    directory = tempfile.mkdtemp(prefix='softair-e2e-')
+    process, url = await start_server(directory, rooms, max_serving, args.workers)
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    roomIds = synthetic.room_ids(rooms)
+    dashboard = [0]
+    try:
+        # 入住：前台连接并行办理，每个连接依次办理分到的房间
+        checkins = [await Channel(url, 'checkin', recorder).open() for _ in range(args.desks)]
+        await asyncio.gather(*(
+            _sequential(channel, [{'roomId': roomId, 'client_name': f'e2e-{roomId}', 'client_id': f'e2e-{roomId}'}
+                                  for roomId in roomIds[i::len(checkins)]])
+            for i, channel in enumerate(checkins)))
+
+        clients = [RoomClient(url, roomId, recorder, random.Random(f'{args.seed}-{roomId}')) for roomId in roomIds]
+        failed = sum(isinstance(result, Exception)
+                     for result in await gather_limited([client.open() for client in clients], CONNECT_CONCURRENCY))
+        if failed:
+            recorder.errors['room/connect'] = failed
+        clients = [client for client in clients if client.ws]
+
+        stop = asyncio.Event()
+        ramp = min(5.0, args.duration / 4)
+        tasks = [asyncio.create_task(client.run(stop, ramp, args.room_interval)) for client in clients]
+        tasks += [asyncio.create_task(desk(url, roomIds, recorder, random.Random(f'{args.seed}-desk-{i}'), stop,
+                                           args.desk_interval)) for i in range(args.desks)]
+        tasks += [asyncio.create_task(admin(url, recorder, random.Random(f'{args.seed}-admin-{i}'), stop,
+                                            args.admin_interval, dashboard)) for i in range(args.admins)]
+        tasks.append(asyncio.create_task(loop_lag(recorder, stop)))
+        await asyncio.sleep(args.duration)
+        stop.set()
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(result, Exception):
+                recorder.error(f'harness/{type(result).__name__}')
+
+        # 断开房间连接（服务端随之关机）后退房
+        await gather_limited([client.close() for client in clients], CONNECT_CONCURRENCY)
+        checkouts = [await Channel(url, 'checkout', recorder).open() for _ in range(args.desks)]
+        await asyncio.gather(*(_sequential(channel, [{'roomId': roomId} for roomId in roomIds[i::len(checkouts)]])
+                               for i, channel in enumerate(checkouts)))
+        for channel in checkins + checkouts:
+            await channel.close()
+    finally:
+        stop_server(process)
+    return {'rooms': rooms, 'max_serving': max_serving, 'workers': args.workers, 'duration': args.duration,
+            'dashboard_frames': dashboard[0], 'routes': recorder.summary(args.duration)}
+
+def print_run(run, histograms=False):
+    print(f"\n房间 {run['rooms']}  服务上限 {run['max_serving']}  worker {run['workers']}  "
+          f"{run['duration']:.0f} 秒  看板推送 {run['dashboard_frames']} 帧")
+    print(f"{'路由':<24} {'次数':>8} {'每秒':>8} {'p50(ms)':>9} {'p90(ms)':>9} {'p99(ms)':>9} {'max(ms)':>9} {'错误':>6}")
+    for route, result in run['routes'].items():
+        if not result['count']:
+            print(f"{route:<24} {0:>8} {'':>8} {'':>9} {'':>9} {'':>9} {'':>9} {result.get('errors', 0):>6}")
+            continue
+        print(f"{route:<24} {result['count']:>8} {result['rate_per_s']:>8.1f} {result['p50_ms']:>9.2f} "
+              f"{result['p90_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['max_ms']:>9.2f} {result.get('errors', 0):>6}")
+    if histograms:
+        bounds = [f'≤{bound:g}' for bound in BUCKETS_MS] + [f'>{BUCKETS_MS[-1]:g}']
+        print(f"\n{'直方图(ms)':<24} " + ' '.join(f'{bound:>6}' for bound in bounds))
+        for route, result in run['routes'].items():
+            if result['count']:
+                print(f'{route:<24} ' + ' '.join(f'{count:>6}' for count in result['buckets']))
+
+def _key(run, route):
+    return f"rooms={run['rooms']} serving={run['max_serving']} workers={run['workers']} {route}"
+
+def compare(runs, baseline, threshold, min_delta):
+    """与基线比较 p50 与 p99（样本足够时），返回变慢超过 threshold（比例）且超过 min_delta 毫秒的项"""
+    previous = {_key(run, route): result for run in baseline for route, result in run['routes'].items()}
+    regressions = []
+    print(f"\n{'项目':<52} {'基线 p50':>9} {'本次 p50':>9} {'基线 p99':>9} {'本次 p99':>9}")
+    for run in runs:
+        for route, result in run['routes'].items():
+            key = _key(run, route)
+            if not result['count'] or route.startswith('harness/'):
+                continue
+            if key not in previous or not previous[key]['count']:
+                print(f"{key:<52} {'-':>9} {result['p50_ms']:>9.2f} {'-':>9} {result['p99_ms']:>9.2f}  新增")
+                continue
+            before = previous[key]
+            compared = ('p50_ms', 'p99_ms') if min(result['count'], before['count']) >= P99_MIN_COUNT else ('p50_ms',)
+            slower = [p for p in compared
+                      if result[p] > before[p] * (1 + threshold) and result[p] - before[p] > min_delta]
+            if slower:
+                regressions.append(key)
+            print(f"{key:<52} {before['p50_ms']:>9.2f} {result['p50_ms']:>9.2f} {before['p99_ms']:>9.2f} "
+                  f"{result['p99_ms']:>9.2f}{'  变慢' if slower else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='端到端 WebSocket 延迟与吞吐基准')
+    parser.add_argument('--rooms', type=int, nargs='+', default=[100, 1000], help='房间数（每个房间一个连接）')
+    parser.add_argument('--max-serving', type=int, nargs='+', default=[3], help='同时送风的房间数上限')
+    parser.add_argument('--workers', type=int, default=1, help='服务端的 Sanic worker 数')
+    parser.add_argument('--duration', type=float, default=30.0, help='每次运行的负载时长（秒）')
+    parser.add_argument('--room-interval', type=float, default=5.0, help='每个房间两次操作之间的平均秒数')
+    parser.add_argument('--desks', type=int, default=10, help='前台连接数')
+    parser.add_argument('--desk-interval', type=float, default=1.0, help='每个前台两次查询之间的平均秒数')
+    parser.add_argument('--admins', type=int, default=2, help='管理员连接数')
+    parser.add_argument('--admin-interval', type=float, default=1.0, help='每个管理员两次查询之间的平均秒数')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--histograms', action='store_true', help='同时输出各路由的延迟直方图')
+    parser.add_argument('-o', '--output', help='保存报告的 JSON 文件')
+    parser.add_argument('--baseline', help='作为基线的报告 JSON 文件')
+    parser.add_argument('--threshold', type=float, default=0.2, help='p50 或 p99 超过基线的比例达到该值视为变慢')
+    parser.add_argument('--min-delta', type=float, default=1.0, help='视为变慢所需的最小增加量（毫秒）')
+    args = parser.parse_args()
+
+    runs = []
+    for rooms in args.rooms:
+        for max_serving in args.max_serving:
+            run = asyncio.run(run_once(args, rooms, max_serving))
+            print_run(run, args.histograms)
+            runs.append(run)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({
+                'meta': {
+                    'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'buckets_ms': BUCKETS_MS,
+                    'args': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+                },
+                'runs': runs,
+            }, file, indent=2, ensure_ascii=False)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(runs, json.load(file)['runs'], args.threshold, args.min_delta)
+        if regressions:
+            print(f'\n{len(regressions)} 项变慢超过 {args.threshold:.0%}')
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
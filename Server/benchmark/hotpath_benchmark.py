@@ -0,0 +1,313 @@
+# 服务端热点路径的微基准：房间请求的各个分支、服务队列满时的抢占、一次计费周期、add_bill、
+# 详单与报表查询（合成数据库，见 synthetic.py）、自动分配空房的入住。
+# 每项记录单次耗时的 p50 / p99 / 平均值（微秒），可保存为 JSON 并与基线结果比较，p50 变慢超过阈值时以非零状态退出
+# 用法（在 Server 目录下）：
+#   python benchmark/hotpath_benchmark.py -o baseline.json
+#   python benchmark/hotpath_benchmark.py --baseline baseline.json -o latest.json
+#   python benchmark/hotpath_benchmark.py --only reports --rows 1000 10000 100000 1000000 10000000
+# 合成数据库按行数缓存在 --data-dir 中，首次生成 10^7 行约需数分钟
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import Core as cr
+import Clock as cl
+import AirconSchedule as acs
+from Storage import parse_time
+
+import synthetic
+
+START_TS = parse_time('2025-01-01 08:00:00') # 虚拟时钟的起点
+GROUPS = ['request', 'preempt', 'billing', 'add_bill', 'reports', 'checkin']
+
+class Sampler:
+    """一项测量的样本：至少 min_runs 次，之后累计耗时达到 budget 秒或达到 max_runs 次为止"""
+    def __init__(self, budget, min_runs=5, max_runs=20000):
+        self.budget = budget
+        self.min_runs = min_runs
+        self.max_runs = max_runs
+        self.samples = []
+        self.total = 0.0
+
+    def more(self):
+        return len(self.samples) < self.min_runs or (self.total < self.budget and len(self.samples) < self.max_runs)
+
+    def add(self, begin):
+        """记录从 begin（time.perf_counter()）到现在的耗时"""
+        elapsed = time.perf_counter() - begin
+        self.samples.append(elapsed)
+        self.total += elapsed
+
+    def summary(self):
+        samples = [sample * 1e6 for sample in self.samples]
+        p99 = statistics.quantiles(samples, n=100, method='inclusive')[98] if len(samples) > 1 else samples[0]
+        return {'runs': len(samples), 'p50_us': statistics.median(samples), 'p99_us': p99,
+                'mean_us': statistics.mean(samples)}
+
+class Suite:
+    def __init__(self, budget):
+        self.budget = budget
+        self.results = {}
+
+    def sampler(self, **kwargs):
+        return Sampler(self.budget, **kwargs)
+
+    def record(self, name, sampler, size=None):
+        key = f'{name}[{size}]' if size is not None else name
+        self.results[key] = result = sampler.summary()
+        print(f"{key:<36} {result['runs']:>7} {result['p50_us']:>12.2f} {result['p99_us']:>12.2f} "
+              f"{result['mean_us']:>12.2f}")
+
+class _Sink:
+    """代替房间的 WebSocket，丢弃调度推送"""
+    async def send(self, message):
+        pass
+
+async def engine(rooms):
+    """临时数据库上的服务核心（虚拟时钟，调度任务不会自行推进），rooms 个房间全部入住"""
+    directory = tempfile.mkdtemp()
+    inventory = os.path.join(directory, 'rooms.csv')
+    roomIds = synthetic.room_ids(rooms)
+    synthetic.write_inventory(inventory, roomIds)
+    core = cr.Core(os.path.join(directory, 'bench.db'), inventory=inventory, clock=cl.VirtualClock(START_TS))
+    committed = [core.rooms.checkin(roomId, f'bench-{roomId}', f'bench-{roomId}')[2] for roomId in roomIds]
+    await asyncio.gather(*(asyncio.wrap_future(future) for future in committed))
+    return core, roomIds
+
+def room_message(roomId, state, speed=1, new_request=1):
+    return {'roomId': roomId, 'state': state, 'speed': speed, 'now_temp': 28.0, 'set_temp': 22.0, 'mode': 'cool',
+            'new_request': new_request}
+
+async def bench_request(suite):
+    """AirconSchedule.request 的各个分支。测量循环中不让出事件循环，调度任务不会插入执行"""
+    core, roomIds = await engine(50)
+    request = core.airconSchedule.request
+    scheduler = core.airconSchedule.scheduler
+    x, w = roomIds[0], roomIds[1]
+    serving = roomIds[2:2 + scheduler.MAX_SERVING]
+
+    # 服务队列未满：开机直接服务，随后关机
+    on, off = suite.sampler(), suite.sampler()
+    while on.more():
+        begin = time.perf_counter()
+        await request(room_message(x, 'on'))
+        on.add(begin)
+        begin = time.perf_counter()
+        await request(room_message(x, 'off'))
+        off.add(begin)
+    suite.record('request/on-serve', on)
+    suite.record('request/off', off)
+
+    report = suite.sampler()
+    while report.more():
+        begin = time.perf_counter()
+        await request(room_message(x, 'on', new_request=0))
+        report.add(begin)
+    suite.record('request/report', report)
+
+    # 服务队列已满（中速）：同风速进入等待、低风速被拒绝、高风速抢占
+    for roomId in serving:
+        await request(room_message(roomId, 'on'))
+    wait = suite.sampler()
+    while wait.more():
+        begin = time.perf_counter()
+        await request(room_message(w, 'on'))
+        wait.add(begin)
+        await request(room_message(w, 'off'))
+    suite.record('request/on-wait', wait)
+
+    reject = suite.sampler()
+    while reject.more():
+        begin = time.perf_counter()
+        await request(room_message(w, 'on', speed=0))
+        reject.add(begin)
+    suite.record('request/on-reject', reject)
+
+    preempt = suite.sampler()
+    while preempt.more():
+        victim = scheduler.preempt_heap.peek()
+        begin = time.perf_counter()
+        await request(room_message(w, 'on', speed=2))
+        preempt.add(begin)
+        await request(room_message(w, 'off'))
+        await request(room_message(victim.ID, 'on')) # 被抢占的房间回到服务队列
+    suite.record('request/on-preempt', preempt)
+
+    pause = suite.sampler()
+    while pause.more():
+        begin = time.perf_counter()
+        await request(room_message(serving[0], 'pause'))
+        pause.add(begin)
+        await request(room_message(serving[0], 'on'))
+    suite.record('request/pause', pause)
+    await core.close()
+
+async def bench_preempt(suite, sizes):
+    """Scheduler.request_on 的抢占，等待队列中有 N 个房间"""
+    core, _ = await engine(50)
+    for size in sizes:
+        scheduler = acs.Scheduler({}, core.rooms, core.ledger, core.clock)
+        for i in range(scheduler.MAX_SERVING):
+            scheduler.request_on(f's{i}', 0, 22.0, 28.0, 'cool')
+        for i in range(size): # 同为低风速，进入等待队列
+            scheduler.request_on(f'w{i}', 0, 22.0, 28.0, 'cool')
+        sampler = suite.sampler()
+        while sampler.more():
+            victim = scheduler.preempt_heap.peek()
+            begin = time.perf_counter()
+            scheduler.request_on('p', 2, 22.0, 28.0, 'cool')
+            sampler.add(begin)
+            scheduler.request_off('p')
+            scheduler.request_on(victim.ID, 0, 22.0, 28.0, 'cool')
+        suite.record('scheduler/preempt', sampler, size)
+    await core.close()
+
+async def bench_billing(suite, sizes):
+    """一次计费周期（Scheduler.handle_due_events）：N 个服务中的房间同时到期，各自计费并推送账单"""
+    core, roomIds = await engine(max(sizes))
+    for size in sizes:
+        scheduler = acs.Scheduler({roomId: _Sink() for roomId in roomIds[:size]}, core.rooms, core.ledger, core.clock)
+        scheduler.MAX_SERVING = size
+        for i, roomId in enumerate(roomIds[:size]):
+            scheduler.request_on(roomId, i % 3, 22.0, 28.0, 'cool')
+        sampler = suite.sampler(min_runs=3, max_runs=200)
+        while sampler.more():
+            await core.clock.run_until(scheduler.events[0][0])
+            begin = time.perf_counter()
+            scheduler.handle_due_events(core.clock.time())
+            sampler.add(begin)
+            await asyncio.gather(*scheduler.send_tasks)
+        suite.record('scheduler/billing-tick', sampler, size)
+    await core.close()
+
+async def bench_add_bill(suite):
+    core, roomIds = await engine(50)
+    scheduler = core.airconSchedule.scheduler
+    sampler = suite.sampler()
+    while sampler.more():
+        begin = time.perf_counter()
+        scheduler.add_bill(roomIds[0], 0.5)
+        sampler.add(begin)
+    suite.record('scheduler/add_bill', sampler)
+    await core.close()
+
+async def bench_reports(suite, sizes, data_dir):
+    """FrontDesk.userList 与 Manager.show，合成数据库中详单与营收各 N 行"""
+    for rows in sizes:
+        path, inventory = synthetic.cached(rows, directory=data_dir)
+        roomId, client_id, (start_time, end_time) = synthetic.probe(path)
+        core = cr.Core(path, inventory=inventory)
+        cases = [
+            ('uselist/usr', core.frontDesk.userList, {'type': 'usr', 'roomId': roomId, 'usrId': client_id}),
+            ('uselist/room-week', core.frontDesk.userList,
+             {'type': 'room', 'roomId': roomId, 'start_time': start_time, 'end_time': end_time}),
+            ('uselist/page', core.frontDesk.userList,
+             {'type': 'room', 'roomId': roomId, 'start_time': None, 'end_time': None, 'page_size': 200}),
+            ('manager/text-week', core.manager.show, {'start_time': start_time, 'end_time': end_time}),
+            ('manager/json-all', core.manager.show, {'format': 'json'}),
+        ]
+        for name, fn, data in cases:
+            sampler = suite.sampler(min_runs=3)
+            while sampler.more():
+                begin = time.perf_counter()
+                await fn(data)
+                sampler.add(begin)
+            suite.record(name, sampler, rows)
+        await core.close()
+
+async def bench_checkin(suite, sizes):
+    """FrontDesk.checkin 自动分配空房（含写穿提交），90% 的房间已入住"""
+    for rooms in sizes:
+        directory = tempfile.mkdtemp()
+        inventory = os.path.join(directory, 'rooms.csv')
+        roomIds = synthetic.room_ids(rooms)
+        synthetic.write_inventory(inventory, roomIds)
+        core = cr.Core(os.path.join(directory, 'bench.db'), inventory=inventory)
+        committed = [core.rooms.checkin(roomId, 'bench', 'bench')[2] for roomId in roomIds[:len(roomIds) * 9 // 10]]
+        await asyncio.gather(*(asyncio.wrap_future(future) for future in committed))
+        sampler = suite.sampler(max_runs=2000)
+        while sampler.more():
+            begin = time.perf_counter()
+            ret = await core.frontDesk.checkin({'roomId': '000', 'client_name': 'bench', 'client_id': 'bench'})
+            sampler.add(begin)
+            await core.frontDesk.checkout({'roomId': ret['allocate_room']})
+        suite.record('frontdesk/checkin-auto', sampler, rooms)
+        await core.close()
+
+def compare(results, baseline, threshold):
+    """与基线比较 p50，返回变慢超过 threshold（比例）的项"""
+    regressions = []
+    print(f"\n{'项目':<36} {'基线 p50(us)':>13} {'本次 p50(us)':>13} {'比值':>7}")
+    for key, result in results.items():
+        if key not in baseline:
+            print(f"{key:<36} {'-':>13} {result['p50_us']:>13.2f} {'新增':>7}")
+            continue
+        ratio = result['p50_us'] / baseline[key]['p50_us']
+        slower = ratio > 1 + threshold
+        if slower:
+            regressions.append(key)
+        print(f"{key:<36} {baseline[key]['p50_us']:>13.2f} {result['p50_us']:>13.2f} {ratio:>7.2f}"
+              f"{'  变慢' if slower else ''}")
+    return regressions
+
+async def run(args):
+    suite = Suite(args.budget)
+    print(f"{'项目':<36} {'次数':>7} {'p50(us)':>12} {'p99(us)':>12} {'平均(us)':>12}")
+    groups = args.only or GROUPS
+    if 'request' in groups:
+        await bench_request(suite)
+    if 'preempt' in groups:
+        await bench_preempt(suite, args.queue)
+    if 'billing' in groups:
+        await bench_billing(suite, args.serving)
+    if 'add_bill' in groups:
+        await bench_add_bill(suite)
+    if 'reports' in groups:
+        await bench_reports(suite, args.rows, args.data_dir)
+    if 'checkin' in groups:
+        await bench_checkin(suite, args.rooms)
+    return suite.results
+
+def main():
+    parser = argparse.ArgumentParser(description='服务端热点路径的微基准')
+    parser.add_argument('--only', nargs='+', choices=GROUPS, help='只运行指定的项目组')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='详单与报表查询的合成数据库行数')
+    parser.add_argument('--queue', type=int, nargs='+', default=[10, 100, 1000, 10000], help='抢占时等待队列的长度')
+    parser.add_argument('--serving', type=int, nargs='+', default=[3, 100, 1000, 10000], help='计费周期中服务的房间数')
+    parser.add_argument('--rooms', type=int, nargs='+', default=[100, 1000, 10000], help='自动分配入住时的房间总数')
+    parser.add_argument('--budget', type=float, default=0.5, help='每项测量的累计耗时上限（秒）')
+    parser.add_argument('--data-dir', default=synthetic.DEFAULT_DIR, help='合成数据库的缓存目录')
+    parser.add_argument('-o', '--output', help='保存结果的 JSON 文件')
+    parser.add_argument('--baseline', help='作为基线的结果 JSON 文件')
+    parser.add_argument('--threshold', type=float, default=0.2, help='p50 超过基线的比例达到该值视为变慢')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({
+                'meta': {
+                    'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'args': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+                },
+                'results': results,
+            }, file, indent=2, ensure_ascii=False)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file)['results'], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} 项变慢超过 {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
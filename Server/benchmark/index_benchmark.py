@@ -0,0 +1,77 @@
+# 迁移前后详单/营收查询耗时随表规模的变化
+# 用法（在 Server 目录下）：python benchmark/index_benchmark.py [行数 ...]
+import os
+import sys
+import time
+import random
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import Migrations
+from Storage import format_time, parse_time
+
+ROOMS = [f'{floor}{i:02d}' for floor in range(1, 11) for i in range(1, 21)] # 200 个房间
+DAY = 24 * 3600
+START_TS = parse_time('2025-01-01 00:00:00')
+
+def populate(cursor, rows):
+    """按旧表结构（无 op_ts、无索引）写入 rows 条详单与营收，时间均匀分布在一年内"""
+    rng = random.Random(rows)
+    uselist = []
+    earning = []
+    for _ in range(rows):
+        roomId = rng.choice(ROOMS)
+        op_time = format_time(START_TS + rng.randrange(365 * DAY))
+        uselist.append((roomId, f'u{rng.randrange(rows // 20 + 1)}', op_time, 'on', 22.0, 25.0, 1, 'cool', 1.0))
+        earning.append((roomId, op_time, 0.5))
+    cursor.execute('BEGIN')
+    cursor.executemany('INSERT INTO USELIST VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', uselist)
+    cursor.executemany('INSERT INTO EARNING VALUES (?, ?, ?)', earning)
+    cursor.execute('COMMIT')
+    return uselist[0][0], uselist[0][1]
+
+def timed(cursor, sql, args, repeat=20):
+    begin = time.perf_counter()
+    for _ in range(repeat):
+        cursor.execute(sql, args)
+        cursor.fetchall()
+    return (time.perf_counter() - begin) / repeat * 1000
+
+def run(rows):
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    database = sqlite3.connect(path, isolation_level=None)
+    cursor = database.cursor()
+    Migrations.migrate(cursor, target=1)
+    roomId, userId = populate(cursor, rows)
+    start_time, end_time = '2025-03-01 00:00:00', '2025-03-08 00:00:00'
+
+    before = [
+        timed(cursor, 'SELECT * FROM USELIST WHERE userId = ? AND roomId = ?', (userId, roomId)),
+        timed(cursor, 'SELECT * FROM USELIST WHERE roomId = ? AND op_time >= ? AND op_time <= ?',
+              (roomId, start_time, end_time)),
+        timed(cursor, 'SELECT * FROM EARNING WHERE op_time >= ? AND op_time <= ?', (start_time, end_time)),
+    ]
+    begin = time.perf_counter()
+    Migrations.migrate(cursor)
+    migrate_ms = (time.perf_counter() - begin) * 1000
+    after = [
+        timed(cursor, 'SELECT * FROM USELIST WHERE roomId = ? AND userId = ? ORDER BY op_ts', (roomId, userId)),
+        timed(cursor, 'SELECT * FROM USELIST WHERE roomId = ? AND op_ts >= ? AND op_ts <= ? ORDER BY op_ts',
+              (roomId, parse_time(start_time), parse_time(end_time))),
+        timed(cursor, 'SELECT * FROM EARNING WHERE op_ts >= ? AND op_ts <= ? ORDER BY op_ts',
+              (parse_time(start_time), parse_time(end_time))),
+    ]
+    database.close()
+    os.remove(path)
+    return before, after, migrate_ms
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000, 1000000]
+    names = ['usr 详单', 'room 详单', '营收报表']
+    print(f"{'行数':>10} {'查询':<10} {'迁移前(ms)':>12} {'迁移后(ms)':>12} {'加速比':>8}")
+    for rows in sizes:
+        before, after, migrate_ms = run(rows)
+        for name, b, a in zip(names, before, after):
+            print(f'{rows:>10} {name:<10} {b:>12.3f} {a:>12.3f} {b / a:>8.1f}')
+        print(f"{rows:>10} {'迁移耗时':<10} {migrate_ms:>12.1f}")
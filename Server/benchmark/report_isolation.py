@@ -0,0 +1,89 @@
+# 大营收报表生成期间房间请求的应答延迟：对比报表在事件循环中格式化（旧实现）与在线程中格式化
+# 用法（在 Server 目录下）：python benchmark/report_isolation.py [营收行数] [持续秒数]
+# 只输出延迟数据；应答不被报表阻塞的断言见 tests/test_report_isolation.py
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import Core as cr
+from Storage import format_time
+
+ROOMS = ['101', '102', '103', '104', '201', '202', '203', '204']
+
+def insert_earnings(cursor, rows):
+    rng = random.Random(rows)
+    start = time.time() - 30 * 24 * 3600
+    earning = []
+    for _ in range(rows):
+        op_ts = int(start + rng.randrange(30 * 24 * 3600))
+        earning.append((rng.choice(ROOMS), format_time(op_ts), 0.5, op_ts))
+    cursor.executemany('INSERT INTO EARNING (roomId, op_time, money, op_ts) VALUES (?, ?, ?, ?)', earning)
+
+async def blocking_show(core, data):
+    """旧实现：报表文本在事件循环中生成"""
+    all_earn = await core.storage.earning(data.get('start_time'), data.get('end_time'))
+    return core.manager._format_report(data.get('start_time'), data.get('end_time'), all_earn)
+
+async def room_acks(core, stop):
+    """每 5ms 到达一次房间温度上报，记录从到达到应答完成的耗时（毫秒），包含事件循环被占用时的排队时间"""
+    latencies = []
+    data = {'roomId': '101', 'state': 'on', 'speed': 1, 'now_temp': 25.0, 'set_temp': 22.0, 'mode': 'cool',
+            'new_request': 0}
+    while not stop.is_set():
+        arrival = time.perf_counter() + 0.005
+        await asyncio.sleep(0.005)
+        await core.call('room', data)
+        latencies.append((time.perf_counter() - arrival) * 1000)
+    return latencies
+
+async def reports(core, show, stop, concurrency=2):
+    durations = []
+
+    async def worker():
+        while not stop.is_set():
+            begin = time.perf_counter()
+            await show({})
+            durations.append((time.perf_counter() - begin) * 1000)
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return durations
+
+async def measure(core, seconds, show=None):
+    stop = asyncio.Event()
+    tasks = [asyncio.create_task(room_acks(core, stop))]
+    if show:
+        tasks.append(asyncio.create_task(reports(core, show, stop)))
+    await asyncio.sleep(seconds)
+    stop.set()
+    results = await asyncio.gather(*tasks)
+    return results[0], results[1] if show else []
+
+def percentile(values, p):
+    return statistics.quantiles(values, n=100, method='inclusive')[p - 1] if len(values) > 1 else values[0]
+
+async def main(rows, seconds):
+    core = cr.Core(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    await asyncio.wrap_future(core.storage.write(insert_earnings, rows))
+    await core.call('checkin', {'roomId': '101', 'client_name': 'bench', 'client_id': 'bench'})
+
+    print(f"{'场景':<16} {'应答次数':>8} {'p50(ms)':>9} {'p99(ms)':>9} {'max(ms)':>9} {'报表耗时(ms)':>13}")
+    cases = [
+        ('无报表', None),
+        ('报表在事件循环中', lambda data: blocking_show(core, data)),
+        ('报表在线程中', lambda data: core.call('manager', data)),
+    ]
+    for name, show in cases:
+        latencies, durations = await measure(core, seconds, show)
+        report = f'{statistics.mean(durations):>13.1f}' if durations else f"{'-':>13}"
+        print(f'{name:<16} {len(latencies):>8} {statistics.median(latencies):>9.3f} {percentile(latencies, 99):>9.3f} '
+              f'{max(latencies):>9.3f} {report}')
+    await core.close()
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    asyncio.run(main(rows, seconds))
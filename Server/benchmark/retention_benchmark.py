@@ -0,0 +1,70 @@
+# 历史归档对数据库大小与 VACUUM 耗时的影响：逐天写入详单与营收，对比不归档与保留 RETENTION_DAYS 天
+# 用法（在 Server 目录下）：python benchmark/retention_benchmark.py [天数] [每天行数]
+import os
+import sys
+import time
+import random
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import Storage as st
+import Archive as ar
+from Storage import format_time
+
+RETENTION_DAYS = 30
+REPORT_EVERY = 15 # 每隔多少天统计一次
+ROOMS = [f'{floor}{i:02d}' for floor in range(1, 11) for i in range(1, 21)]
+DAY = 24 * 3600
+
+def insert_day(cursor, day_ts, rows, rng):
+    uselist = []
+    earning = []
+    for _ in range(rows):
+        roomId = rng.choice(ROOMS)
+        op_ts = day_ts + rng.randrange(DAY)
+        uselist.append((roomId, f'u{rng.randrange(1000)}', format_time(op_ts), op_ts, 'on', 22.0, 25.0, 1, 'cool', 1.0,
+                        None))
+        earning.append((roomId, format_time(op_ts), op_ts, 0.5, None))
+    st.Storage.write_ledger(cursor, earning, uselist, {})
+
+def measure(path):
+    """数据库文件大小（MB）与 VACUUM 耗时（ms）"""
+    connection = sqlite3.connect(path, isolation_level=None)
+    connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    size = os.path.getsize(path) / 2 ** 20
+    begin = time.perf_counter()
+    connection.execute('VACUUM')
+    elapsed = (time.perf_counter() - begin) * 1000
+    connection.close()
+    return size, elapsed
+
+def run(days, rows, retention):
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'bench.db')
+    storage = st.Storage(path, archive=ar.Archive(os.path.join(directory, 'archive')) if retention else None)
+    rng = random.Random(rows)
+    start = int(time.time()) // DAY * DAY - days * DAY
+    results = []
+    for day in range(days):
+        storage.write(insert_day, start + day * DAY, rows, rng).result()
+        if retention:
+            cutoff = start + (day + 1 - RETENTION_DAYS) * DAY
+            while storage.write(storage.archive_day, cutoff).result():
+                pass
+        if (day + 1) % REPORT_EVERY == 0:
+            results.append((day + 1, *measure(path)))
+    storage.close()
+    return results
+
+def main(days, rows):
+    plain = run(days, rows, False)
+    archived = run(days, rows, True)
+    print(f"{'天数':>6} {'不归档 MB':>10} {'VACUUM(ms)':>11} {'归档 MB':>10} {'VACUUM(ms)':>11}")
+    for (day, size, vacuum), (_, archived_size, archived_vacuum) in zip(plain, archived):
+        print(f'{day:>6} {size:>10.1f} {vacuum:>11.1f} {archived_size:>10.1f} {archived_vacuum:>11.1f}')
+
+if __name__ == '__main__':
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    main(days, rows)
@@ -0,0 +1,48 @@
+# 服务核心的启动耗时：首次加载房间清单（冷启动）与清单未变化时（跳过加载）
+# 用法（在 Server 目录下）：python benchmark/startup_benchmark.py [房间数 ...]
+# 任一规模的启动耗时超过 LIMIT_S 则以非零状态退出
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import Core as cr
+
+LIMIT_S = 1.0
+TYPES = ['standard', 'standard', 'standard', 'deluxe', 'suite']
+
+def write_inventory(path, count):
+    floors = max(1, count // 50)
+    with open(path, 'w') as file:
+        file.write('roomId,floor,room_type,tariff\n')
+        for i in range(count):
+            floor, number = i // (count // floors) + 1, i % (count // floors) + 1
+            room_type = TYPES[i % len(TYPES)]
+            file.write(f'{floor}{number:02d},{floor},{room_type},{1.5 if room_type == "suite" else 1.0}\n')
+
+async def start(path, inventory):
+    """创建并关闭 Core，返回创建耗时（秒）"""
+    begin = time.perf_counter()
+    core = cr.Core(path, inventory=inventory)
+    elapsed = time.perf_counter() - begin
+    await core.close()
+    return elapsed
+
+def main(counts):
+    print(f"{'房间数':>8} {'冷启动(s)':>10} {'清单未变(s)':>12}")
+    ok = True
+    for count in counts:
+        directory = tempfile.mkdtemp()
+        inventory = os.path.join(directory, 'rooms.csv')
+        write_inventory(inventory, count)
+        path = os.path.join(directory, 'bench.db')
+        cold = asyncio.run(start(path, inventory))
+        warm = asyncio.run(start(path, inventory))
+        print(f'{count:>8} {cold:>10.3f} {warm:>12.3f}')
+        ok = ok and max(cold, warm) <= LIMIT_S
+    return ok
+
+if __name__ == '__main__':
+    sys.exit(0 if main([int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000]) else 1)
@@ -0,0 +1,165 @@
+# 合成数据库：按当前表结构生成指定行数的详单与营收（含 STAY、小时/日汇总），供基准测试使用。
+# 数据按行数与种子确定，生成后缓存在目录中，再次使用同样的参数时直接复用
+# 用法（在 Server 目录下）：python benchmark/synthetic.py [行数 ...] [--rooms 200] [--dir 目录]
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import Migrations
+from Storage import format_time, parse_time
+
+DAY = 24 * 3600
+START_TS = parse_time('2025-01-01 00:00:00')
+DAYS = 365 # 记录均匀分布在一年内
+DEFAULT_DIR = os.path.join(tempfile.gettempdir(), 'softair-bench')
+TYPES = ['standard', 'standard', 'standard', 'deluxe', 'suite']
+MODES = ['cool', 'heat']
+OPERATIONS = ['on', 'off', 'on', 'pause']
+BATCH = 100000
+
+def room_ids(count):
+    """count 个房间号，每层 50 间"""
+    floors = max(1, count // 50)
+    return [f'{floor + 1}{number + 1:02d}' for floor in range(floors) for number in range(count // floors)]
+
+def write_inventory(path, roomIds):
+    """与数据库中房间一致的房间清单 CSV（见 Inventory.py）"""
+    with open(path, 'w') as file:
+        file.write('roomId,floor,room_type,tariff\n')
+        for i, roomId in enumerate(roomIds):
+            room_type = TYPES[i % len(TYPES)]
+            file.write(f'{roomId},{roomId[:-2]},{room_type},{1.5 if room_type == "suite" else 1.0}\n')
+
+def make_stays(rng, roomIds):
+    """每个房间在一年内连续的入住（1 到 5 天，之间空闲 0 到 2 天），全部已退房。返回 [(stay_id, roomId, client_id, 入住, 退房)]"""
+    stays = []
+    for roomId in roomIds:
+        ts = START_TS + rng.randrange(2 * DAY)
+        while True:
+            checkout_ts = ts + rng.randrange(DAY, 5 * DAY)
+            if checkout_ts >= START_TS + DAYS * DAY:
+                break
+            stays.append((len(stays) + 1, roomId, f'u{len(stays) + 1}', ts, checkout_ts))
+            ts = checkout_ts + rng.randrange(2 * DAY)
+    return stays
+
+def _records(rng, stays, rows, make):
+    """rows 条记录，每条随机落在一次入住期间"""
+    for _ in range(rows):
+        stay = stays[rng.randrange(len(stays))]
+        op_ts = rng.randrange(stay[3], stay[4])
+        yield make(stay, op_ts)
+
+def _uselist(rng):
+    def make(stay, op_ts):
+        stay_id, roomId, client_id = stay[:3]
+        return (roomId, client_id, format_time(op_ts), op_ts, rng.choice(OPERATIONS), float(rng.randint(18, 25)),
+                round(rng.uniform(18.0, 32.0), 2), rng.randrange(3), rng.choice(MODES), round(rng.uniform(0, 300), 2),
+                stay_id)
+    return make
+
+def _earning(rng):
+    def make(stay, op_ts):
+        return (stay[1], format_time(op_ts), op_ts, rng.choice((1 / 3, 0.5, 1.0)), stay[0])
+    return make
+
+def _insert_batches(cursor, sql, records):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= BATCH:
+            cursor.executemany(sql, batch)
+            batch = []
+    if batch:
+        cursor.executemany(sql, batch)
+
+def generate(path, rows, rooms=200, seed=0):
+    """生成含 rows 条详单与 rows 条营收的数据库，所有房间空闲"""
+    rng = random.Random(seed)
+    roomIds = room_ids(rooms)
+    database = sqlite3.connect(path, isolation_level=None)
+    cursor = database.cursor()
+    Migrations.migrate(cursor)
+    # 生成期间不需要崩溃保护
+    cursor.execute('PRAGMA journal_mode=OFF')
+    cursor.execute('PRAGMA synchronous=OFF')
+    stays = make_stays(rng, roomIds)
+    cursor.execute('BEGIN')
+    # 先删除明细表的索引，批量写入后重建，比逐行维护索引快得多
+    cursor.execute('''
+        SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name IN ('USELIST', 'EARNING') AND sql IS NOT NULL
+    ''')
+    indexes = cursor.fetchall()
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX {name}')
+    cursor.executemany('''INSERT INTO ROOM (roomId, status, floor, room_type, tariff) VALUES (?, 'free', ?, ?, ?)''',
+                       [(roomId, roomId[:-2], TYPES[i % len(TYPES)], 1.5 if TYPES[i % len(TYPES)] == 'suite' else 1.0)
+                        for i, roomId in enumerate(roomIds)])
+    cursor.executemany('INSERT INTO STAY (stay_id, roomId, client_name, client_id, checkin_ts, checkout_ts, bill) '
+                       'VALUES (?, ?, ?, ?, ?, ?, 0.0)',
+                       [(stay_id, roomId, f'name-{client_id}', client_id, checkin_ts, checkout_ts)
+                        for stay_id, roomId, client_id, checkin_ts, checkout_ts in stays])
+    _insert_batches(cursor, '''
+        INSERT INTO USELIST (roomId, userId, op_time, op_ts, operation, set_temp, now_temp, fan_speed, mode, total_bill,
+                             stay_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', _records(rng, stays, rows, _uselist(rng)))
+    _insert_batches(cursor, 'INSERT INTO EARNING (roomId, op_time, op_ts, money, stay_id) VALUES (?, ?, ?, ?, ?)',
+                    _records(rng, stays, rows, _earning(rng)))
+    for _, sql in indexes:
+        cursor.execute(sql)
+    for table, size in (('EARNING_HOURLY', 3600), ('EARNING_DAILY', DAY)):
+        cursor.execute(f'''
+            INSERT INTO {table} (bucket_ts, roomId, money)
+            SELECT op_ts / {size} * {size}, roomId, SUM(money) FROM EARNING GROUP BY 1, 2
+        ''')
+    cursor.execute('UPDATE STAY SET bill = (SELECT COALESCE(SUM(money), 0.0) FROM EARNING '
+                   'WHERE EARNING.stay_id = STAY.stay_id)')
+    cursor.execute('COMMIT')
+    cursor.execute('PRAGMA journal_mode=WAL')
+    database.close()
+    return roomIds
+
+def cached(rows, rooms=200, seed=0, directory=DEFAULT_DIR):
+    """返回 (数据库路径, 房间清单路径)，不存在时生成"""
+    os.makedirs(directory, exist_ok=True)
+    name = os.path.join(directory, f'synthetic-{rows}-{rooms}-{seed}')
+    path, inventory = f'{name}.db', f'{name}.csv'
+    if not os.path.exists(inventory): # 清单最后写入，存在即表示数据库已完整生成
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        roomIds = generate(path, rows, rooms, seed)
+        write_inventory(inventory, roomIds)
+    return path, inventory
+
+def probe(path):
+    """基准查询使用的目标：(roomId, 该房间最后一次入住的住户 ID, 年中一周的 (start_time, end_time))"""
+    database = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    roomId, client_id = database.execute('''
+        SELECT roomId, client_id FROM STAY WHERE roomId = (SELECT MIN(roomId) FROM ROOM)
+        ORDER BY checkin_ts DESC LIMIT 1
+    ''').fetchone()
+    database.close()
+    week = START_TS + (DAYS // 2) * DAY # 年中的一周
+    return roomId, client_id, (format_time(week), format_time(week + 7 * DAY))
+
+def main():
+    parser = argparse.ArgumentParser(description='生成基准测试用的合成数据库')
+    parser.add_argument('rows', type=int, nargs='*', default=[1000, 10000, 100000])
+    parser.add_argument('--rooms', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--dir', default=DEFAULT_DIR)
+    args = parser.parse_args()
+    for rows in args.rows:
+        begin = time.perf_counter()
+        path, _ = cached(rows, args.rooms, args.seed, args.dir)
+        print(f'{rows:>10} 行  {time.perf_counter() - begin:8.1f} s  {path}')
+
+if __name__ == '__main__':
+    main()
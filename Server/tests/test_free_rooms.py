@@ -0,0 +1,28 @@
+# 空房索引的选房偏好（见 RoomTable.FreeRooms.find）
+# 用法（在 Server 目录下）：python -m unittest discover tests
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import RoomTable as rt
+
+class FreeRoomsTest(unittest.TestCase):
+    def setUp(self):
+        self.free = rt.FreeRooms()
+        for roomId, room_type in (('201', 'standard'), ('205', 'standard'), ('206', 'suite'), ('301', 'standard')):
+            self.free.add(rt.RoomInfo(roomId, room_type=room_type))
+
+    def test_near_prefers_closest_on_same_floor(self):
+        self.assertEqual(self.free.find(near='204'), '205')
+
+    def test_near_given_as_number(self):
+        # JSON 客户端可能发送 "near": 203
+        self.assertEqual(self.free.find(near=203), '201')
+        self.assertEqual(self.free.find(floor=2, room_type='suite', near=203), '206')
+
+    def test_near_on_other_floor_falls_back(self):
+        self.assertEqual(self.free.find(floor=3, near=203), '301')
+
+if __name__ == '__main__':
+    unittest.main()
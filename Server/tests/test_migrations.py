@@ -0,0 +1,63 @@
+# 数据库迁移（见 Migrations.py）：迁移前已入住的房间补建 STAY 后，当前住户的详单与营收记入这次入住
+# 用法（在 Server 目录下）：python -m unittest discover tests
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import Core as cr
+import Migrations as mi
+from Storage import format_time
+
+class AddStaysTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'test.db')
+        database = sqlite3.connect(self.path, isolation_level=None)
+        cursor = database.cursor()
+        # 迁移到补建 STAY 之前的版本：101 由 u1 入住，之前住过 u0
+        mi.migrate(cursor, mi.MIGRATIONS.index(mi._add_stays))
+        self.first = int(time.time()) - 3600
+        cursor.execute('''
+            INSERT INTO ROOM (roomId, status, client_name, client_id, bill) VALUES ('101', 'busy', 'n1', 'u1', 1.0)
+        ''')
+        uselist = [('u0', self.first - 600, 'on'), ('u0', self.first - 540, 'off'),
+                   ('u1', self.first, 'on'), ('u1', self.first + 120, 'off')]
+        cursor.executemany('''
+            INSERT INTO USELIST (roomId, userId, op_time, operation, set_temp, now_temp, fan_speed, mode, total_bill, op_ts)
+            VALUES ('101', ?, ?, ?, 24.0, 28.0, 1, 'cool', 0.0, ?)
+        ''', [(userId, format_time(op_ts), operation, op_ts) for userId, op_ts, operation in uselist])
+        cursor.executemany("INSERT INTO EARNING (roomId, op_time, money, op_ts) VALUES ('101', ?, 0.5, ?)",
+                           [(format_time(op_ts), op_ts) for op_ts in (self.first - 570, self.first + 60, self.first + 120)])
+        mi.migrate(cursor)
+        self.cursor = cursor
+
+    def tearDown(self):
+        self.cursor.connection.close()
+
+    def test_backfill_current_stay(self):
+        cursor = self.cursor
+        cursor.execute('SELECT stay_id, checkin_ts FROM STAY WHERE roomId = ?', ('101',))
+        stay_id, checkin_ts = cursor.fetchone()
+        self.assertEqual(checkin_ts, self.first)
+        cursor.execute('SELECT stay_id FROM ROOM WHERE roomId = ?', ('101',))
+        self.assertEqual(cursor.fetchone()[0], stay_id)
+        cursor.execute('SELECT userId, stay_id FROM USELIST ORDER BY op_ts')
+        self.assertEqual(cursor.fetchall(), [('u0', None), ('u0', None), ('u1', stay_id), ('u1', stay_id)])
+        cursor.execute('SELECT stay_id FROM EARNING ORDER BY op_ts')
+        self.assertEqual([row[0] for row in cursor.fetchall()], [None, stay_id, stay_id])
+
+    async def test_current_guest_uselist(self):
+        core = cr.Core(self.path)
+        try:
+            data = {'roomId': '101', 'type': 'usr', 'usrId': 'u1', 'start_time': 'NULL', 'end_time': 'NULL'}
+            self.assertEqual((await core.call('uselist', data))['uselist'].count('- 房间号'), 2)
+            page = await core.call('uselist', dict(data, page_size=10))
+            self.assertEqual([record['userId'] for record in page['records']], ['u1', 'u1'])
+        finally:
+            await core.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+# 在已有详单历史的数据库上启用二进制详单日志（见 OpLog.py）：启用之前的详单仍能查到，结果与只用 sqlite 时相同
+# 用法（在 Server 目录下）：python -m unittest discover tests
+import os
+import sys
+import time
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import Core as cr
+from Storage import format_time
+
+ROOM_ON = {'roomId': '101', 'state': 'on', 'speed': 1, 'now_temp': 28.0, 'set_temp': 24.0, 'mode': 'cool',
+           'new_request': 1}
+ROOM_OFF = dict(ROOM_ON, state='off')
+
+def insert_history(cursor):
+    # 启用日志之前的两条详单，住户 u1 没有入住记录（STAY）
+    op_ts = int(time.time()) - 86400
+    cursor.executemany('''
+        INSERT INTO USELIST (roomId, userId, op_time, operation, set_temp, now_temp, fan_speed, mode, total_bill, op_ts)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [('101', 'u1', format_time(op_ts), 'on', 24.0, 28.0, 1, 'cool', 0.0, op_ts),
+          ('101', 'u1', format_time(op_ts + 60), 'off', 24.0, 26.0, 1, 'cool', 0.5, op_ts + 60)])
+
+def count(uselist):
+    return uselist['uselist'].count('- 房间号')
+
+class OpLogHistoryTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.path = os.path.join(directory, 'test.db')
+        self.oplog = os.path.join(directory, 'oplog')
+
+    async def query(self, core):
+        usr = await core.call('uselist', {'roomId': '101', 'type': 'usr', 'usrId': 'u1', 'start_time': 'NULL',
+                                          'end_time': 'NULL'})
+        room = await core.call('uselist', {'roomId': '101', 'type': 'room', 'usrId': 'NULL', 'start_time': None,
+                                           'end_time': None})
+        return usr, room
+
+    async def test_history_before_oplog(self):
+        core = cr.Core(self.path)
+        core.storage.write(insert_history).result()
+        await core.close()
+
+        core = cr.Core(self.path, oplog=self.oplog)
+        usr, room = await self.query(core)
+        self.assertEqual(count(usr), 2)
+        self.assertEqual(count(room), 2)
+        # 启用之后的详单写入日志，与之前的历史拼接
+        await core.call('checkin', {'roomId': '101', 'client_name': 'g1', 'client_id': 'g1'})
+        await core.call('room', ROOM_ON)
+        await core.call('room', ROOM_OFF)
+        with_oplog = await self.query(core)
+        await core.close()
+        self.assertGreater(count(with_oplog[1]), 2)
+
+        core = cr.Core(self.path)
+        without_oplog = await self.query(core)
+        await core.close()
+        self.assertEqual(with_oplog, without_oplog)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+# 大营收报表（/ws/manager）生成期间，房间请求（/ws/room）的应答不被阻塞
+# 用法（在 Server 目录下）：python -m unittest discover tests
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import Core as cr
+from Storage import format_time
+
+ROWS = 200000
+ROOMS = ['101', '102', '103', '104', '201', '202', '203', '204']
+ROOM_REQUEST = {'roomId': '101', 'state': 'on', 'speed': 1, 'now_temp': 25.0, 'set_temp': 22.0, 'mode': 'cool',
+                'new_request': 0}
+
+def insert_earnings(cursor, rows):
+    rng = random.Random(rows)
+    start = time.time() - 30 * 24 * 3600
+    earning = []
+    for _ in range(rows):
+        op_ts = int(start + rng.randrange(30 * 24 * 3600))
+        earning.append((rng.choice(ROOMS), format_time(op_ts), 0.5, op_ts))
+    cursor.executemany('INSERT INTO EARNING (roomId, op_time, money, op_ts) VALUES (?, ?, ?, ?)', earning)
+
+class ReportIsolationTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.core = cr.Core(os.path.join(tempfile.mkdtemp(), 'test.db'))
+        await asyncio.wrap_future(self.core.storage.write(insert_earnings, ROWS))
+        await self.core.call('checkin', {'roomId': '101', 'client_name': 'test', 'client_id': 'test'})
+
+    async def asyncTearDown(self):
+        await self.core.close()
+
+    async def test_room_acks_during_large_report(self):
+        report = asyncio.create_task(self.core.call('manager', {}))
+        begin = time.perf_counter()
+        latencies = []
+        while not report.done():
+            # 从请求到达（计划时刻）到应答完成的耗时，包含事件循环被占用时的排队时间
+            arrival = time.perf_counter() + 0.005
+            await asyncio.sleep(0.005)
+            await self.core.call('room', ROOM_REQUEST)
+            latencies.append(time.perf_counter() - arrival)
+        duration = time.perf_counter() - begin
+        self.assertIn('content', await report)
+        # 报表本身需要足够长，测试才有意义；报表在事件循环中生成时单次应答会被推迟到报表结束
+        self.assertGreater(duration, 0.2)
+        self.assertGreater(len(latencies), 10)
+        self.assertLess(max(latencies), min(0.1, duration / 3))
+
+if __name__ == '__main__':
+    unittest.main()